@@ -1,4 +1,7 @@
 from .user import User, LoginHistory
-from .transaction import Category, Transaction, CouponTemplate, UserCoupon, Anomaly
+from .transaction import Category, Transaction, CouponTemplate, UserCoupon, Anomaly, AnomalyScanState, MerchantName
 from .admin_settings import AdminSettings
 from .group import UserGroup
+from .prediction import NextCategoryPrediction, UserFeatureStats, UserFraudState
+from .rollup import SpendDaily, SpendMonthly, SnapshotRefresh
+from .cohort import UserActivityDaily
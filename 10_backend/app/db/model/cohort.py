@@ -0,0 +1,38 @@
+"""
+사용자 일별 활동 코호트 모델
+
+스케줄러가 하루 단위로 가입/활동 사용자 집합을 비트맵(bit i = user_id i, zlib 압축)으로 저장합니다.
+이탈률·리텐션·이탈 추이는 사용자/거래 테이블을 다시 읽지 않고 비트맵 연산으로 계산합니다.
+관리자(is_superuser) 계정은 모든 집합에서 제외합니다.
+"""
+
+from sqlalchemy import Column, Date, DateTime, Integer, LargeBinary
+from app.db.database import Base
+
+
+class UserActivityDaily(Base):
+    """
+    일별 사용자 코호트 (하루 1행)
+    """
+    __tablename__ = "user_activity_daily"
+
+    day = Column(Date, primary_key=True)
+
+    # 건수
+    signups = Column(Integer, nullable=False, default=0)  # 그날 가입한 사용자 수
+    active_users = Column(Integer, nullable=False, default=0)  # 그날 거래가 있는 사용자 수
+    total_users = Column(Integer, nullable=False, default=0)  # 그날까지 가입한 사용자 수
+
+    # 사용자 집합 비트맵
+    signup_bitmap = Column(LargeBinary, nullable=False)  # 그날 가입
+    active_bitmap = Column(LargeBinary, nullable=False)  # 그날 거래
+    users_bitmap = Column(LargeBinary, nullable=False)  # 그날까지 가입
+    active_7d_bitmap = Column(LargeBinary, nullable=False)  # 그날 포함 최근 7일 거래
+    active_30d_bitmap = Column(LargeBinary, nullable=False)  # 최근 30일
+    active_90d_bitmap = Column(LargeBinary, nullable=False)  # 최근 90일
+
+    # 타임스탬프
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<UserActivityDaily(day={self.day}, signups={self.signups}, active_users={self.active_users})>"
@@ -0,0 +1,95 @@
+"""
+ML 예측 결과 캐시 모델
+
+야간 배치 작업이 미리 계산한 사용자별 "다음 소비 카테고리" 예측과
+예측 피처 계산에 쓰이는 사용자별 누적 통계(피처 저장소)와
+이상거래 모델의 사용자별 최근 거래 윈도 상태를 저장합니다.
+"""
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, ForeignKey, Integer, SmallInteger, String, Text
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class NextCategoryPrediction(Base):
+    """
+    다음 소비 카테고리 예측 캐시 테이블 (사용자당 1행)
+    """
+    __tablename__ = "next_category_predictions"
+
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # 예측 결과
+    predicted_category = Column(String(50), nullable=False)  # 외식, 교통 등
+    predicted_category_code = Column(Integer, nullable=False)  # 0~5
+    confidence = Column(Float, nullable=False)  # top1 확률
+    probabilities = Column(Text, nullable=True)  # JSON: {"교통": 0.05, "외식": 0.78, ...}
+
+    # 예측 근거
+    transaction_count = Column(Integer, nullable=False, default=0)
+    last_transaction_at = Column(DateTime(timezone=True), nullable=True)
+
+    # 타임스탬프
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<NextCategoryPrediction(user_id={self.user_id}, category='{self.predicted_category}', confidence={self.confidence:.2f})>"
+
+
+class UserFeatureStats(Base):
+    """
+    사용자별 누적 거래 통계 (피처 저장소, 사용자당 1행)
+
+    거래 추가 시 증분 갱신되며, 평균/표준편차/카테고리 비율 등
+    예측 피처를 거래 이력 재조회 없이 O(1)로 계산하는 데 사용합니다.
+    카테고리 코드는 "다음 카테고리" 모델 기준 (0:교통 1:생활 2:쇼핑 3:식료품 4:외식 5:주유 6:기타)
+    이상거래(is_fraudulent)로 표시된 거래는 집계에서 제외합니다.
+    """
+    __tablename__ = "user_feature_stats"
+
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # 금액 통계 (평균 = 합계/건수, 분산 = 제곱합 기반)
+    tx_count = Column(BigInteger, nullable=False, default=0)
+    amount_sum = Column(Float, nullable=False, default=0)
+    amount_sq_sum = Column(Float, nullable=False, default=0)
+
+    # 카테고리 코드별 거래 건수
+    cat0_count = Column(Integer, nullable=False, default=0)  # 교통
+    cat1_count = Column(Integer, nullable=False, default=0)  # 생활
+    cat2_count = Column(Integer, nullable=False, default=0)  # 쇼핑
+    cat3_count = Column(Integer, nullable=False, default=0)  # 식료품
+    cat4_count = Column(Integer, nullable=False, default=0)  # 외식
+    cat5_count = Column(Integer, nullable=False, default=0)  # 주유
+    cat6_count = Column(Integer, nullable=False, default=0)  # 기타
+
+    # 마지막 거래
+    last_transaction_at = Column(DateTime(timezone=True), nullable=True)
+    last_category_code = Column(SmallInteger, nullable=True)
+
+    # 타임스탬프
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<UserFeatureStats(user_id={self.user_id}, tx_count={self.tx_count})>"
+
+
+class UserFraudState(Base):
+    """
+    이상거래 모델용 사용자별 최근 거래 윈도 (사용자당 1행)
+
+    최근 ROLLING_WINDOW건의 로그 금액/거래 유형을 도착 순서(거래 id 순)로 저장해
+    z3/z5/z10, IQR z, 순위 백분위, 유형 변경률을 이력 재조회 없이 계산합니다.
+    """
+    __tablename__ = "user_fraud_state"
+
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    log_amounts = Column(Text, nullable=False, default="[]")  # JSON: [log1p(금액), ...] (오래된 순)
+    types = Column(Text, nullable=False, default="[]")        # JSON: ["PAYMENT", ...]
+    last_transaction_id = Column(BigInteger, nullable=False, default=0)  # 윈도에 반영된 마지막 거래
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<UserFraudState(user_id={self.user_id}, last_transaction_id={self.last_transaction_id})>"
@@ -0,0 +1,62 @@
+"""
+소비 집계(rollup) 모델
+
+분석 대시보드/리포트가 transactions 전체를 SUM/GROUP BY 하지 않도록
+사용자·카테고리별 일/월 합계를 미리 저장합니다.
+이상거래(is_fraudulent)로 표시된 거래는 집계에서 제외합니다.
+카테고리가 없는 거래는 category_id = 0 (UNCATEGORIZED_ID)으로 집계합니다.
+"""
+
+from sqlalchemy import BigInteger, Column, Date, DateTime, ForeignKey, Integer, Numeric, String
+
+from app.db.database import Base
+
+UNCATEGORIZED_ID = 0  # 카테고리 없음 (categories에 없는 id → 조회 시 "기타")
+
+
+class SpendDaily(Base):
+    """
+    사용자·카테고리·일별 소비 합계
+    """
+    __tablename__ = "spend_daily"
+
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    category_id = Column(BigInteger, primary_key=True, default=UNCATEGORIZED_ID)
+
+    total = Column(Numeric(16, 2), nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SpendDaily(user_id={self.user_id}, day={self.day}, category_id={self.category_id}, total={self.total})>"
+
+
+class SpendMonthly(Base):
+    """
+    사용자·카테고리·월별 소비 합계 (month는 해당 월 1일)
+    """
+    __tablename__ = "spend_monthly"
+
+    user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    category_id = Column(BigInteger, primary_key=True, default=UNCATEGORIZED_ID)
+
+    total = Column(Numeric(16, 2), nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SpendMonthly(user_id={self.user_id}, month={self.month}, category_id={self.category_id}, total={self.total})>"
+
+
+class SnapshotRefresh(Base):
+    """
+    주기적으로 갱신하는 분석 스냅샷의 마지막 갱신 시각 (응답의 "data as of")
+    """
+    __tablename__ = "snapshot_refreshes"
+
+    name = Column(String(50), primary_key=True)  # 예: "admin_spend"
+    refreshed_at = Column(DateTime, nullable=False)
+    duration_ms = Column(Integer, nullable=True)
+
+    def __repr__(self):
+        return f"<SnapshotRefresh(name={self.name}, refreshed_at={self.refreshed_at})>"
@@ -8,7 +8,7 @@ RDS Transaction 모델 - AWS RDS PostgreSQL 스키마에 맞춤
 
 from sqlalchemy import (
     BigInteger, Boolean, Column, DateTime, ForeignKey, 
-    String, Text, Numeric, Integer
+    String, Text, Numeric, Integer, Index
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -57,6 +57,12 @@ class Transaction(Base):
     # 이상 거래 플래그 (신고된 거래는 True)
     is_fraudulent = Column(Boolean, default=False, nullable=False)
 
+    # 이상거래 점수화 시각 (실시간/대기열/스캐너 중 먼저 점수화한 경로가 기록, NULL이면 미점수화)
+    fraud_scored_at = Column(DateTime(timezone=True), nullable=True)
+
+    # 클라이언트 중복 방지 키 (일괄 생성 재시도 시 같은 거래를 다시 만들지 않음)
+    dedupe_key = Column(String(100), nullable=True)
+
     # 관계
     category = relationship("Category", back_populates="transactions")
     user = relationship("User", backref="transactions")
@@ -65,6 +71,32 @@ class Transaction(Base):
         return f"<Transaction(id={self.id}, merchant='{self.merchant_name}', amount={self.amount})>"
 
 
+# 사용자·카테고리별 최근 거래 조회 (이상 탐지 카테고리 평균, ROW_NUMBER 윈도 쿼리)
+Index(
+    "ix_transactions_user_category_time",
+    Transaction.user_id, Transaction.category_id, Transaction.transaction_time.desc()
+)
+
+# 사용자 거래 목록 (is_fraudulent = false, 최신순 키셋 페이지네이션) 인덱스 범위 스캔
+Index(
+    "ix_transactions_user_fraud_time",
+    Transaction.user_id, Transaction.is_fraudulent,
+    Transaction.transaction_time.desc(), Transaction.id.desc()
+)
+
+# 최근 저장된 거래 조회 (코호트 갱신 시 과거 날짜로 들어온 거래 찾기)
+Index("ix_transactions_created_at", Transaction.created_at)
+
+# 사용자별 dedupe_key 중복 방지 (키가 있는 거래만)
+Index(
+    "ux_transactions_user_dedupe_key",
+    Transaction.user_id, Transaction.dedupe_key,
+    unique=True,
+    postgresql_where=Transaction.dedupe_key.isnot(None),
+    sqlite_where=Transaction.dedupe_key.isnot(None)
+)
+
+
 class CouponTemplate(Base):
     """
     쿠폰 템플릿 테이블 (정규화)
@@ -136,7 +168,7 @@ class Anomaly(Base):
     __tablename__ = "anomalies"
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
-    transaction_id = Column(BigInteger, ForeignKey("transactions.id", ondelete="CASCADE"), nullable=False)
+    transaction_id = Column(BigInteger, ForeignKey("transactions.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id = Column(BigInteger, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     severity = Column(String(20), nullable=True)  # low/medium/high
@@ -151,3 +183,39 @@ class Anomaly(Base):
 
     def __repr__(self):
         return f"<Anomaly(id={self.id}, transaction_id={self.transaction_id}, severity='{self.severity}')>"
+
+
+class AnomalyScanState(Base):
+    """
+    이상 탐지 스캔 진행 상태 (high-water mark)
+    - last_transaction_id까지의 거래는 이미 점수화됨
+    - 스캐너는 이 값보다 큰 id의 거래만 새로 검사
+    - last_transaction_id 아래 빈 id 구간(늦게 커밋되는 트랜잭션)은 pending_gaps에 두고 다시 확인
+    """
+    __tablename__ = "anomaly_scan_state"
+
+    name = Column(String(50), primary_key=True)  # 스캐너 이름 (기본: transactions)
+    last_transaction_id = Column(BigInteger, default=0, nullable=False)
+    scanned_count = Column(BigInteger, default=0, nullable=False)  # 누적 검사 거래 수
+    flagged_count = Column(BigInteger, default=0, nullable=False)  # 누적 탐지 건수
+    pending_gaps = Column(Text, nullable=True)  # JSON: [[시작 id, 끝 id, 발견 시각(epoch)], ...]
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<AnomalyScanState(name='{self.name}', last_transaction_id={self.last_transaction_id})>"
+
+
+class MerchantName(Base):
+    """
+    가맹점명 정규화 테이블
+    - 거래에 기록된 원본 가맹점명 → 검색용 정규화 이름 (NFKC, 소문자, 법인 표기/공백/기호 제거)
+    - 검색어도 같은 방식으로 정규화해 표기가 달라도 같은 가맹점을 찾음
+    """
+    __tablename__ = "merchant_names"
+
+    raw_name = Column(String(255), primary_key=True)
+    normalized_name = Column(String(255), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<MerchantName(raw_name='{self.raw_name}', normalized_name='{self.normalized_name}')>"
@@ -4,6 +4,7 @@ from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import logging
+import asyncio
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -190,12 +191,20 @@ async def startup_event():
     from app.services.db_init import ensure_database_and_tables
     await ensure_database_and_tables()
     
-    # ML 모델 로드
-    ml.load_model()
+    # ML 모델 사전 로드 (카테고리 분류 / 이상거래 탐지)
+    # 첫 요청이 joblib 로드 비용을 부담하지 않도록 시작 시 레지스트리에 올려둠
+    from app.services.model_registry import load_default_models
+    loop = asyncio.get_event_loop()
+    loaded = await loop.run_in_executor(None, load_default_models)
+    logger.info(f"ML models loaded: {loaded}")
     
     # 스케줄러 시작 (reports용)
     from app.services.scheduler import start_scheduler
     start_scheduler()
+    
+    # 실시간 이상거래 점수화 대기열 워커 시작 (인라인 판정이 늦을 때의 느린 경로)
+    from app.services.realtime_fraud import start_fallback_worker
+    start_fallback_worker()
 
 
 @app.on_event("shutdown")
@@ -204,5 +213,13 @@ async def shutdown_event():
     from app.services.scheduler import shutdown_scheduler
     shutdown_scheduler()
     
+    # 실시간 이상거래 대기열 워커 종료
+    from app.services.realtime_fraud import stop_fallback_worker
+    await stop_fallback_worker()
+    
+    # 추론 스레드풀 종료
+    from app.services.inference_executor import shutdown_inference_executor
+    shutdown_inference_executor()
+    
     logger.info("Caffeine API stopped")
     logger.info("=" * 60)
\ No newline at end of file
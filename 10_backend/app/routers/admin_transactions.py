@@ -19,6 +19,7 @@ from app.services.admin_transactions import (
     get_all_transactions,
     get_transaction_detail,
 )
+from app.services.pagination import MAX_PAGE_SIZE, InvalidCursorError
 
 
 router = APIRouter(
@@ -48,7 +49,10 @@ async def api_get_all_transactions(
     max_amount: Optional[float] = Query(None, description="최대 금액"),
     search: Optional[str] = Query(None, description="가맹점명/설명 검색"),
     page: int = Query(1, ge=1, description="페이지 번호"),
-    page_size: int = Query(20, ge=1, description="페이지 크기"),
+    page_size: int = Query(20, ge=1, description="페이지 크기 (MAX_PAGE_SIZE를 넘으면 MAX_PAGE_SIZE로 제한)"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (주면 page 대신 커서 기준 조회)"),
+    count: Optional[str] = Query(None, pattern="^(exact|approximate|none)$", description="총 개수 계산 방식 (exact/approximate/none)"),
+    sort: str = Query("recent", pattern="^(recent|relevance)$", description="정렬 (relevance: 검색어 유사도 순)"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -59,20 +63,40 @@ async def api_get_all_transactions(
     
     - 모든 일반 사용자의 거래 내역을 조회합니다
     - 필터링, 검색, 페이징 지원
+    - cursor: (transaction_time, id) 키셋 페이지네이션 (깊은 페이지도 일정한 비용)
+    - sort=relevance: 검색 유사도 순 (page 조회만, pg_trgm이 없으면 최신순)
     """
     await verify_superuser(current_user)
     
-    return await get_all_transactions(
-        db=db,
-        category=category,
-        start_date=start_date,
-        end_date=end_date,
-        min_amount=min_amount,
-        max_amount=max_amount,
-        search=search,
-        page=page,
-        page_size=page_size
-    )
+    # 관리자 통합 분석 화면은 page_size=999999로 전체를 요청함 → 거부하지 않고 상한으로 제한
+    page_size = min(page_size, MAX_PAGE_SIZE)
+    
+    if sort == "relevance" and cursor:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sort=relevance does not support cursor"
+        )
+    
+    try:
+        return await get_all_transactions(
+            db=db,
+            category=category,
+            start_date=start_date,
+            end_date=end_date,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            search=search,
+            page=page,
+            page_size=page_size,
+            cursor=cursor,
+            count=count,
+            sort=sort
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
 
 @router.get("/{transaction_id}", response_model=AdminTransactionBase)
@@ -10,7 +10,7 @@
 
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List
+from typing import Optional, List, Any, Dict
 
 from app.db.database import get_db
 from app.services.analysis import (
@@ -26,9 +26,19 @@ from app.services.analysis import (
     get_user_trends,
     get_user_full_analysis,
     get_mock_insights,
+    get_mock_category_breakdown,
+    get_mock_monthly_trend,
     # 관리자용 서비스 함수
     get_admin_full_analysis,
 )
+from app.services.dashboard_cache import get_or_compute, get_dashboard_cache_stats
+
+
+def _not_mock(value) -> bool:
+    """DB 조회 실패 시의 Mock 응답은 캐시하지 않음"""
+    if isinstance(value, list):
+        return value not in (get_mock_category_breakdown(), get_mock_monthly_trend())
+    return "MOCK" not in getattr(value, "data_source", "")
 
 
 router = APIRouter(
@@ -49,8 +59,11 @@ async def api_get_dashboard_summary(
     month: Optional[int] = Query(None, description="월"),
     db: AsyncSession = Depends(get_db)
 ):
-    """대시보드 요약 통계"""
-    return await get_user_summary(db, user_id, year, month)
+    """대시보드 요약 통계 (사용자별 캐시)"""
+    return await get_or_compute(
+        user_id, "summary", (year, month), DashboardSummary,
+        lambda: get_user_summary(db, user_id, year, month), cacheable=_not_mock
+    )
 
 
 @router.get("/categories", response_model=List[CategoryBreakdown])
@@ -61,8 +74,11 @@ async def api_get_category_breakdown(
     month: Optional[int] = Query(None, description="월"),
     db: AsyncSession = Depends(get_db)
 ):
-    """카테고리별 소비 분석"""
-    return await get_user_categories(db, user_id, months, year, month)
+    """카테고리별 소비 분석 (사용자별 캐시)"""
+    return await get_or_compute(
+        user_id, "categories", (months, year, month), List[CategoryBreakdown],
+        lambda: get_user_categories(db, user_id, months, year, month), cacheable=_not_mock
+    )
 
 
 @router.get("/monthly-trend", response_model=List[MonthlyTrend])
@@ -71,8 +87,11 @@ async def api_get_monthly_trend(
     months: int = Query(6, description="조회 개월 수"),
     db: AsyncSession = Depends(get_db)
 ):
-    """월별 지출 추이"""
-    return await get_user_trends(db, user_id, months)
+    """월별 지출 추이 (사용자별 캐시)"""
+    return await get_or_compute(
+        user_id, "monthly-trend", (months,), List[MonthlyTrend],
+        lambda: get_user_trends(db, user_id, months), cacheable=_not_mock
+    )
 
 
 @router.get("/insights", response_model=List[SpendingInsight])
@@ -89,8 +108,17 @@ async def api_get_full_analysis(
     user_id: int = Query(..., description="사용자 ID (필수)"),
     db: AsyncSession = Depends(get_db)
 ):
-    """전체 분석 데이터 (사용자용)"""
-    return await get_user_full_analysis(db, user_id)
+    """전체 분석 데이터 (사용자용, 사용자별 캐시)"""
+    return await get_or_compute(
+        user_id, "full", (), AnalysisResponse,
+        lambda: get_user_full_analysis(db, user_id), cacheable=_not_mock
+    )
+
+
+@router.get("/cache-stats")
+async def api_get_dashboard_cache_stats() -> Dict[str, Any]:
+    """대시보드 캐시 적중/미스 카운터"""
+    return get_dashboard_cache_stats()
 
 
 # ============================================================
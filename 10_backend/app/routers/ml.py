@@ -1,14 +1,42 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query, Depends, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
 import joblib
 import pandas as pd
 import numpy as np
 import os
 import io
+import orjson
+import codecs
+import asyncio
+import itertools
 import logging
-from typing import Dict, Any
+from collections import Counter
+from typing import Dict, Any, List, Iterator, Optional
 from datetime import datetime
+from app.db.database import get_db
+from app.db.model.user import User
+from app.routers.user import get_current_user
 from app.services.preprocessing import get_preprocessor
+from app.services.model_registry import (
+    CATEGORY_MODEL,
+    get_registry,
+    get_active_model,
+    resolve_model_path,
+)
+from app.services.inference_executor import (
+    InferenceQueueFullError,
+    get_inference_executor,
+    run_inference,
+)
+from app.services.micro_batcher import MicroBatcher
+from app.services.next_prediction import (
+    NextCategoryResult,
+    refresh_next_predictions,
+    predict_user_next_category,
+    get_cached_prediction,
+)
 
 # 로깅 설정
 logger = logging.getLogger(__name__)
@@ -20,67 +48,141 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# 모델 전역 변수
-model = None
+# 스트리밍 업로드 설정
+STREAM_CHUNK_ROWS = 5000          # 청크당 기본 행 수
+STREAM_MAX_CHUNK_ROWS = 50000     # 청크당 최대 행 수 (메모리 상한)
+ENCODING_SCAN_BLOCK = 1 << 20     # 인코딩 판별 시 읽는 블록 크기 (1MB)
+STREAM_BUSY_RETRY_SECONDS = 0.05  # 추론 대기열 포화 시 재시도 간격
+STREAM_BUSY_MAX_WAIT_SECONDS = float(os.getenv("STREAM_BUSY_MAX_WAIT_SECONDS", 30))  # 청크당 최대 대기 시간
+
+# 단건 예측(/ml/predict) 마이크로배치 설정 (max_size 1이면 배치 없이 바로 처리)
+PREDICT_BATCH_MAX_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", 32))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", 5))
 
-def load_model():
+# 추론 대기열 포화 시 응답 메시지 (503)
+INFERENCE_BUSY_DETAIL = "추론 요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도해주세요."
+
+def load_model(path: Optional[str] = None, activate: bool = True):
     """
-    XGBoost 모델 로드 (model_xgboost_acc_73.47.joblib)
+    XGBoost 카테고리 모델을 레지스트리에 로드 (model_xgboost_acc_73.47.joblib)
     
-    모델 위치: 10_backend/app/model_xgboost_acc_73.47.joblib
+    모델 위치: 10_backend/app/model_xgboost_acc_73.47.joblib (CATEGORY_MODEL_PATH로 변경 가능)
     정확도: 73.47%
+    앱 시작 시 load_default_models()로 미리 로드되므로 요청 처리 중에는 호출하지 않습니다.
     """
-    global model
     try:
-        # 모델 파일 경로: /10_backend/app/model_xgboost_acc_73.47.joblib
-        # 현재 파일: /10_backend/app/routers/ml.py
-        app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # /10_backend/app
-        model_path = os.path.join(app_dir, "model_xgboost_acc_73.47.joblib")
-        
-        if not os.path.exists(model_path):
-            logger.error(f"Model not found: {model_path}")
-            return
-
-        model = joblib.load(model_path)
-        logger.info(f"XGBoost model loaded: {os.path.basename(model_path)}")
-        
+        return get_registry().load(CATEGORY_MODEL, path=path, activate=activate)
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
+        return None
 
-# 앱 시작 시 모델 로드 (main.py에서 호출 예정)
+def get_model():
+    """
+    활성 카테고리 모델 버전 반환 (로드되지 않았으면 None)
+
+    반환된 ModelVersion은 요청이 끝날 때까지 그대로 사용하므로
+    처리 도중 활성 버전이 교체되어도 영향을 받지 않습니다.
+    """
+    return get_active_model(CATEGORY_MODEL)
+
+# 앱 시작 시 모델 로드 (main.py에서 load_default_models 호출)
 
 class PredictionRequest(BaseModel):
     features: Dict[str, Any]
 
+class NextCategoryBatchRequest(BaseModel):
+    """다중 사용자 다음 카테고리 예측 요청 (user_ids 생략 시 활성 사용자 전체)"""
+    user_ids: Optional[List[int]] = Field(None, max_length=10000)
+
+class NextCategoryBatchResponse(BaseModel):
+    processed_users: int
+    predictions: List[NextCategoryResult]
+
+class ModelLoadRequest(BaseModel):
+    """모델 버전 로드 요청 (app/ 또는 app/models/ 내부 파일명)"""
+    filename: Optional[str] = None  # 생략 시 기본 경로
+    version: Optional[str] = None   # 생략 시 파일 해시
+    activate: bool = True
+
+class ModelActivateRequest(BaseModel):
+    version: str
+
+def _preprocess_and_predict(preprocessor, model, df: pd.DataFrame) -> np.ndarray:
+    """전처리 + 예측 (CPU 연산이므로 추론 워커 스레드에서 실행)"""
+    return model.predict(preprocessor.preprocess(df))
+
+def _predict_feature_rows(rows: List[Dict[str, Any]]) -> List[Any]:
+    """
+    단건 예측 요청 묶음을 한 DataFrame으로 전처리/예측 (마이크로배치 처리 함수)
+
+    각 행은 독립된 단건 거래로 전처리되므로 결과는 요청별로 따로 처리한 것과 같습니다.
+    입력 키 구성이 같은 요청끼리 묶고, 묶음 처리가 실패하면 행 단위로 다시 처리해
+    잘못된 요청만 실패시킵니다.
+
+    Returns:
+        요청 순서대로 예측 클래스(int) 또는 Exception
+    """
+    model = get_model()
+    if model is None:
+        return [RuntimeError("Model not loaded")] * len(rows)
+
+    preprocessor = get_preprocessor()
+    results: List[Any] = [None] * len(rows)
+
+    groups: Dict[tuple, List[int]] = {}
+    for i, row in enumerate(rows):
+        groups.setdefault(tuple(sorted(row)), []).append(i)
+
+    for positions in groups.values():
+        df = pd.DataFrame([rows[i] for i in positions])
+        try:
+            df_processed = preprocessor.preprocess(df, independent_rows=True)
+            # 전처리 과정에서 시간순 정렬되므로 인덱스 기준으로 요청 순서에 맞춤
+            predictions = pd.Series(model.predict(df_processed), index=df_processed.index).sort_index()
+            for i, pred in zip(positions, predictions.tolist()):
+                results[i] = pred
+        except Exception:
+            for i in positions:
+                try:
+                    results[i] = _preprocess_and_predict(preprocessor, model, pd.DataFrame([rows[i]]))[0]
+                except Exception as e:
+                    results[i] = e
+
+    return results
+
+# 동시에 들어온 /ml/predict 요청을 모아 한 번에 예측
+_predict_batcher = MicroBatcher(
+    _predict_feature_rows,
+    max_batch_size=PREDICT_BATCH_MAX_SIZE,
+    max_wait_ms=PREDICT_BATCH_MAX_WAIT_MS,
+    name="predict"
+)
+
 @router.post("/predict")
 async def predict(request: PredictionRequest):
-    global model
+    model = get_model()
     if model is None:
-        load_model()
-        if model is None:
-            raise HTTPException(status_code=500, detail="Model not loaded")
+        raise HTTPException(status_code=500, detail="Model not loaded")
     
     try:
         # 단일 예측 요청 처리
-        # 입력된 딕셔너리를 DataFrame으로 변환
-        input_data = pd.DataFrame([request.features])
-        
-        # 전처리 수행
-        preprocessor = get_preprocessor()
+        features = dict(request.features)
         
         # 날짜/시간 필수 컬럼 확인 및 임시 생성 (단일 예측 시)
-        if '날짜' not in input_data.columns:
-            input_data['날짜'] = datetime.now().strftime('%Y-%m-%d')
-        if '시간' not in input_data.columns:
-            input_data['시간'] = datetime.now().strftime('%H:%M')
+        if '날짜' not in features:
+            features['날짜'] = datetime.now().strftime('%Y-%m-%d')
+        if '시간' not in features:
+            features['시간'] = datetime.now().strftime('%H:%M')
             
-        df_processed = preprocessor.preprocess(input_data)
-        
-        # 예측 수행
-        prediction = model.predict(df_processed)
+        # 전처리 + 예측 수행 (동시 요청은 마이크로배치로 묶어 추론 워커 스레드에서 실행)
+        if PREDICT_BATCH_MAX_SIZE > 1:
+            prediction = await _predict_batcher.submit(features)
+        else:
+            input_data = pd.DataFrame([features])
+            prediction = (await run_inference(_preprocess_and_predict, get_preprocessor(), model, input_data))[0]
         
         # 결과 반환
-        result = prediction[0].item() if hasattr(prediction[0], 'item') else prediction[0]
+        result = prediction.item() if hasattr(prediction, 'item') else prediction
         
         # 실제 메타데이터에 있는 클래스 매핑 사용권장
         # 여기서는 하드코딩된 맵 대신 메타데이터를 읽거나 유지
@@ -94,13 +196,87 @@ async def predict(request: PredictionRequest):
             
         return {"prediction": prediction_str}
 
+    except InferenceQueueFullError:
+        raise HTTPException(status_code=503, detail=INFERENCE_BUSY_DETAIL)
     except Exception as e:
         logger.error(f"Prediction Error: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Prediction Error: {str(e)}")
 
 
+def _text_column(df: pd.DataFrame, col: str, default: str = '') -> pd.Series:
+    """문자열 컬럼 추출 (컬럼이 없거나 결측치면 default)"""
+    if col not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    values = df[col]
+    return values.astype(object).where(values.notna(), default).astype(str)
+
+
+def _build_transaction_columns(df_result: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    예측 결과 DataFrame을 프론트엔드 거래 필드별 컬럼 배열로 변환
+
+    행 단위 반복 없이 컬럼 전체 연산으로 금액/일시/카드 타입/메모를 계산합니다.
+
+    Args:
+        df_result: 원본 컬럼 + 'AI예측카테고리' 컬럼을 가진 DataFrame
+
+    Returns:
+        {필드명: 배열} 딕셔너리 (id는 원본 CSV의 행 번호 기준)
+    """
+    # 금액을 절댓값으로 변환 (양수, 소수점 이하 버림)
+    if '금액' in df_result.columns:
+        amounts = df_result['금액']
+        if not pd.api.types.is_numeric_dtype(amounts):
+            # 천 단위 구분 기호 제거 (DataPreprocessor와 같은 처리, "1,000" → 1000)
+            amounts = amounts.astype(str).str.replace(',', '')
+        amounts = pd.to_numeric(amounts, errors='coerce').fillna(0)
+        amount = np.abs(np.trunc(amounts.to_numpy(dtype=np.float64))).astype(np.int64)
+    else:
+        amount = np.zeros(len(df_result), dtype=np.int64)
+
+    # 날짜 + 시간 조합
+    date_str = _text_column(df_result, '날짜').str.strip()
+    time_str = _text_column(df_result, '시간').str.strip()
+    datetime_str = (date_str + ' ' + time_str).str.strip()
+
+    # 카드 타입 결정
+    is_check = _text_column(df_result, '결제수단').str.contains('체크', regex=False)
+    card_type = np.where(is_check.to_numpy(dtype=bool), '체크', '신용')
+
+    merchant = _text_column(df_result, '내용', '알 수 없음').to_numpy()
+
+    return {
+        "id": (df_result.index.to_numpy() + 1).astype(str),
+        "merchant": merchant,
+        "businessName": merchant,
+        "amount": amount,
+        "category": _text_column(df_result, 'AI예측카테고리', '기타').to_numpy(),
+        "date": datetime_str.to_numpy(),
+        "notes": _text_column(df_result, '메모').to_numpy(),
+        "cardType": card_type,
+        "originalCategory": _text_column(df_result, '대분류').to_numpy(),
+        "aiPredicted": np.ones(len(df_result), dtype=bool)
+    }
+
+
+def _format_transactions(df_result: pd.DataFrame) -> List[Dict[str, Any]]:
+    """예측 결과 DataFrame을 프론트엔드 거래 객체 리스트로 변환 (records 형식)"""
+    columns = _build_transaction_columns(df_result)
+    keys = list(columns)
+    values = [columns[key].tolist() for key in keys]
+    return [dict(zip(keys, row)) for row in zip(*values)]
+
+
+def _columnar_transactions(df_result: pd.DataFrame) -> Dict[str, List[Any]]:
+    """예측 결과 DataFrame을 필드별 병렬 배열로 변환 (columnar 형식)"""
+    return {key: values.tolist() for key, values in _build_transaction_columns(df_result).items()}
+
+
 @router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(
+    file: UploadFile = File(...),
+    response_format: str = Query("records", alias="format", pattern="^(records|columnar)$", description="records 또는 columnar")
+):
     """
     CSV 파일을 업로드하고 ML 모델로 예측을 수행합니다.
     
@@ -112,113 +288,286 @@ async def upload_file(file: UploadFile = File(...)):
     
     Args:
         file: 업로드된 CSV 파일
+        format: 응답 형식
+            - records (기본): transactions가 거래 객체 배열
+            - columnar: transactions가 {필드명: 값 배열} 형태의 병렬 배열 (응답 크기 절감)
         
     Returns:
         {
             "filename": 파일명,
             "total_rows": 전체 행 수,
-            "columns": 컬럼 목록,
-            "preview": 상위 5개 행 (원본 + 예측 결과),
-            "predictions": 전체 예측 결과 (카테고리별 개수)
+            "format": 응답 형식,
+            "transactions": 전체 거래 내역,
+            "summary": 카테고리별 예측 개수
         }
     """
-    global model
-    
+    model = get_model()
+    if model is None:
+        raise HTTPException(status_code=500, detail="모델이 로드되지 않았습니다.")
+
     try:
         # 1. CSV 파일 읽기
         content = await file.read()
+
+        # 2~6. 파싱 / 전처리 / 예측 / 변환 / 직렬화 (추론 워커 스레드)
+        body = await run_inference(_predict_upload_content, model, content, file.filename, response_format)
+        return Response(content=body, media_type="application/json")
         
-        # 한글 인코딩 대응 (utf-8 시도 후 실패 시 cp949)
-        try:
-            df_original = pd.read_csv(io.BytesIO(content), encoding='utf-8')
-        except UnicodeDecodeError:
-            df_original = pd.read_csv(io.BytesIO(content), encoding='cp949')
-        
-        # 2. 데이터 전처리
-        preprocessor = get_preprocessor()
-        
-        try:
-            # 전처리 수행
-            df_processed = preprocessor.preprocess(df_original)
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=f"전처리 실패: {str(e)}")
-        
-        # 3. ML 예측 수행
-        if model is None:
-            load_model()
-            if model is None:
-                raise HTTPException(status_code=500, detail="모델이 로드되지 않았습니다.")
-        
-        # 예측 실행
-        predictions = model.predict(df_processed)
-        
-        # 4. 카테고리 매핑 (모델 메타데이터 기준)
-        category_map = {
-            0: '교통',
-            1: '생활',
-            2: '쇼핑',
-            3: '식료품',
-            4: '외식',
-            5: '주유'
+    except HTTPException:
+        raise
+    except InferenceQueueFullError:
+        raise HTTPException(status_code=503, detail=INFERENCE_BUSY_DETAIL)
+    except Exception as e:
+        logger.error(f"File upload failed: {e}")
+        raise HTTPException(status_code=400, detail=f"파일 처리 실패: {str(e)}")
+
+
+def _predict_upload_content(model, content: bytes, filename: str, response_format: str) -> bytes:
+    """
+    업로드 CSV 전체 예측 후 JSON bytes 반환 (추론 워커 스레드에서 실행)
+
+    Raises:
+        HTTPException: 전처리 실패 (400)
+    """
+    # 한글 인코딩 대응 (utf-8 시도 후 실패 시 cp949)
+    try:
+        df_original = pd.read_csv(io.BytesIO(content), encoding='utf-8')
+    except UnicodeDecodeError:
+        df_original = pd.read_csv(io.BytesIO(content), encoding='cp949')
+    
+    # 2. 데이터 전처리
+    preprocessor = get_preprocessor()
+    
+    try:
+        # 전처리 수행
+        df_processed = preprocessor.preprocess(df_original)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"전처리 실패: {str(e)}")
+    
+    # 3. ML 예측 수행
+    predictions = model.predict(df_processed)
+    
+    # 4. 카테고리 매핑 (모델 메타데이터 기준)
+    category_map = {
+        0: '교통',
+        1: '생활',
+        2: '쇼핑',
+        3: '식료품',
+        4: '외식',
+        5: '주유'
+    }
+    
+    # 예측 결과를 카테고리명으로 변환
+    # 전처리 과정에서 시간순 정렬되므로 인덱스 기준으로 원본 행에 맞춤
+    predicted_categories = pd.Series(
+        [category_map.get(int(pred), '기타') for pred in predictions],
+        index=df_processed.index
+    )
+    
+    # 원본 데이터에 예측 결과 추가
+    df_result = df_original.assign(AI예측카테고리=predicted_categories)
+    
+    # 5. 프론트엔드 형식으로 변환 (컬럼 단위 연산)
+    if response_format == "columnar":
+        transactions_formatted = _columnar_transactions(df_result)
+    else:
+        transactions_formatted = _format_transactions(df_result)
+
+    # 카테고리별 예측 개수 집계
+    prediction_summary = df_result['AI예측카테고리'].value_counts().to_dict()
+
+    # 6. 결과 직렬화 (orjson으로 바로 JSON bytes)
+    return orjson.dumps({
+        "filename": filename,
+        "total_rows": len(df_original),
+        "format": response_format,
+        "transactions": transactions_formatted,  # 전체 거래 내역
+        "summary": {
+            "by_category": prediction_summary,
+            "total": len(predictions)
         }
-        
-        # 예측 결과를 카테고리명으로 변환
-        predicted_categories = [category_map.get(int(pred), '기타') for pred in predictions]
-        
-        # 원본 데이터에 예측 결과 추가
-        df_result = df_original.copy()
-        df_result['AI예측카테고리'] = predicted_categories
-        
-        # 5. 프론트엔드 형식으로 변환
-        transactions_formatted = []
-        for idx, row in df_result.iterrows():
-            # 금액을 절댓값으로 변환 (양수)
-            amount = abs(int(row.get('금액', 0))) if pd.notna(row.get('금액')) else 0
-
-            # 날짜 + 시간 조합
-            date_str = str(row.get('날짜', '')).strip()
-            time_str = str(row.get('시간', '')).strip()
-            datetime_str = f"{date_str} {time_str}".strip()
-
-            # 카드 타입 결정
-            payment_method = str(row.get('결제수단', ''))
-            card_type = '체크' if '체크' in payment_method else '신용'
-
-            # 거래 객체 생성
-            transaction = {
-                "id": str(idx + 1),
-                "merchant": str(row.get('내용', '알 수 없음')),
-                "businessName": str(row.get('내용', '알 수 없음')),
-                "amount": amount,
-                "category": row.get('AI예측카테고리', '기타'),
-                "date": datetime_str,
-                "notes": str(row.get('메모', '')) if pd.notna(row.get('메모')) else '',
-                "cardType": card_type,
-                "originalCategory": str(row.get('대분류', '')) if pd.notna(row.get('대분류')) else '',
-                "aiPredicted": True
-            }
-            transactions_formatted.append(transaction)
+    })
 
-        # 카테고리별 예측 개수 집계
-        prediction_summary = df_result['AI예측카테고리'].value_counts().to_dict()
 
-        # 6. 결과 반환
-        return {
-            "filename": file.filename,
-            "total_rows": len(df_original),
-            "transactions": transactions_formatted,  # 전체 거래 내역
+def _detect_csv_encoding(fileobj) -> str:
+    """
+    업로드 파일의 인코딩 판별 (utf-8 시도 후 실패 시 cp949)
+
+    파일 전체를 메모리에 올리지 않고 블록 단위 증분 디코더로 검사합니다.
+    검사 후 파일 포인터는 처음으로 되돌립니다.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    fileobj.seek(0)
+    try:
+        while True:
+            block = fileobj.read(ENCODING_SCAN_BLOCK)
+            if not block:
+                decoder.decode(b'', final=True)
+                return 'utf-8'
+            decoder.decode(block)
+    except UnicodeDecodeError:
+        return 'cp949'
+    finally:
+        fileobj.seek(0)
+
+
+def _encode_stream_event(event: str, payload: Dict[str, Any], stream_format: str) -> str:
+    """스트리밍 응답 한 건을 NDJSON 또는 SSE 형식으로 직렬화"""
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {orjson.dumps(payload).decode()}\n\n"
+    return orjson.dumps({"type": event, **payload}).decode() + "\n"
+
+
+def _iter_upload_predictions(
+    model,
+    chunks: Iterator[pd.DataFrame],
+    stream_format: str
+) -> Iterator[str]:
+    """
+    CSV 청크별로 전처리 → 예측 → 변환을 수행하고 결과를 즉시 내보냄
+
+    전처리 통계(User_AvgAmount 등)는 청크 단위로 계산됩니다.
+    동기 제너레이터이므로 StreamingResponse가 스레드풀에서 실행합니다.
+    스트림 도중 모델이 교체되어도 요청 시점의 모델 버전으로 끝까지 예측합니다.
+    """
+    preprocessor = get_preprocessor()
+    category_map = {
+        0: '교통', 1: '생활', 2: '쇼핑',
+        3: '식료품', 4: '외식', 5: '주유'
+    }
+    by_category = Counter()
+    total = 0
+
+    try:
+        for chunk_no, chunk in enumerate(chunks):
+            df_processed = preprocessor.preprocess(chunk)
+            predictions = model.predict(df_processed)
+
+            # 전처리 과정에서 시간순 정렬되므로 인덱스 기준으로 원본 행에 맞춤
+            chunk['AI예측카테고리'] = pd.Series(
+                [category_map.get(int(pred), '기타') for pred in predictions],
+                index=df_processed.index
+            )
+
+            transactions = _format_transactions(chunk)
+            by_category.update(chunk['AI예측카테고리'].value_counts().to_dict())
+            total += len(transactions)
+
+            yield _encode_stream_event("chunk", {
+                "chunk": chunk_no,
+                "rows": len(transactions),
+                "transactions": transactions
+            }, stream_format)
+
+        yield _encode_stream_event("summary", {
+            "total_rows": total,
             "summary": {
-                "by_category": prediction_summary,
-                "total": len(predictions)
+                "by_category": dict(by_category),
+                "total": total
             }
-        }
-        
-    except HTTPException:
-        raise
+        }, stream_format)
+
     except Exception as e:
-        logger.error(f"File upload failed: {e}")
+        logger.error(f"Streaming upload failed: {e}")
+        yield _encode_stream_event("error", {
+            "detail": f"파일 처리 실패: {str(e)}",
+            "processed_rows": total
+        }, stream_format)
+
+
+def _open_csv_chunks(fileobj, chunk_size: int):
+    """
+    청크 리더 생성 후 첫 청크는 미리 읽어 형식 오류를 400으로 응답할 수 있게 함
+
+    Returns:
+        (청크 리더, 첫 청크 또는 None)
+    """
+    # 인코딩 판별 (블록 단위 검사)
+    encoding = _detect_csv_encoding(fileobj)
+    reader = pd.read_csv(fileobj, encoding=encoding, chunksize=chunk_size)
+    return reader, next(reader, None)
+
+
+async def _stream_in_executor(request: Request, events: Iterator[str], stream_format: str):
+    """
+    동기 이벤트 제너레이터를 한 청크씩 추론 워커 스레드에서 진행시키는 비동기 제너레이터
+
+    청크 파싱/전처리/예측이 모두 추론 실행기의 동시 실행 제한을 따릅니다.
+    대기열 포화가 청크당 STREAM_BUSY_MAX_WAIT_SECONDS 넘게 이어지면 error 이벤트를 보내고 종료하며,
+    재시도 중 클라이언트 연결이 끊기면 바로 종료합니다.
+    """
+    loop = asyncio.get_running_loop()
+    busy_since = None
+    while True:
+        try:
+            event = await run_inference(next, events, None)
+        except InferenceQueueFullError:
+            # 대기열 포화 시 잠시 후 재시도 (이미 응답이 시작된 스트림)
+            busy_since = busy_since or loop.time()
+            if loop.time() - busy_since >= STREAM_BUSY_MAX_WAIT_SECONDS:
+                logger.warning("Streaming upload aborted: inference queue full")
+                events.close()
+                yield _encode_stream_event("error", {"detail": INFERENCE_BUSY_DETAIL}, stream_format)
+                return
+            await asyncio.sleep(STREAM_BUSY_RETRY_SECONDS)
+            if await request.is_disconnected():
+                events.close()
+                return
+            continue
+        busy_since = None
+        if event is None:
+            break
+        yield event
+
+
+@router.post("/upload/stream")
+async def upload_file_stream(
+    request: Request,
+    file: UploadFile = File(...),
+    chunk_size: int = Query(STREAM_CHUNK_ROWS, ge=1, le=STREAM_MAX_CHUNK_ROWS, description="청크당 행 수"),
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$", description="ndjson 또는 sse")
+):
+    """
+    대용량 CSV 스트리밍 업로드 및 예측
+
+    파일을 한 번에 읽지 않고 chunk_size 행 단위로 파싱하여
+    청크마다 전처리/예측 후 결과를 바로 내보냅니다.
+    최대 메모리 사용량은 파일 크기가 아닌 청크 크기에 비례합니다.
+
+    응답 (NDJSON, 한 줄에 한 이벤트):
+        {"type": "chunk", "chunk": 0, "rows": 5000, "transactions": [...]}
+        ...
+        {"type": "summary", "total_rows": 120000, "summary": {"by_category": {...}, "total": 120000}}
+
+    SSE 형식은 같은 내용을 event/data 필드로 전송합니다.
+    처리 도중 오류가 나거나 추론 대기열 포화가 오래 이어지면 {"type": "error", "detail": ...} 이벤트로 종료합니다.
+    """
+    model = get_model()
+    if model is None:
+        raise HTTPException(status_code=500, detail="모델이 로드되지 않았습니다.")
+
+    try:
+        # 인코딩 판별 + 첫 청크 파싱 (추론 워커 스레드)
+        reader, first_chunk = await run_inference(_open_csv_chunks, file.file, chunk_size)
+    except InferenceQueueFullError:
+        raise HTTPException(status_code=503, detail=INFERENCE_BUSY_DETAIL)
+    except Exception as e:
+        logger.error(f"Streaming upload failed: {e}")
         raise HTTPException(status_code=400, detail=f"파일 처리 실패: {str(e)}")
 
+    if first_chunk is None:
+        raise HTTPException(status_code=400, detail="CSV 파일에 거래 데이터가 없습니다.")
+
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_in_executor(
+            request,
+            _iter_upload_predictions(model, itertools.chain([first_chunk], reader), stream_format),
+            stream_format
+        ),
+        media_type=media_type
+    )
+
 
 def calculate_confidence_metrics(probabilities: np.ndarray) -> dict:
     """
@@ -272,128 +621,334 @@ async def predict_next_category(file: UploadFile = File(...)):
             }
         }
     """
-    global model
-
     try:
         # 1. CSV 파일 읽기
         content = await file.read()
 
-        # 한글 인코딩 대응 (utf-8 시도 후 실패 시 cp949)
-        try:
-            df_original = pd.read_csv(io.BytesIO(content), encoding='utf-8')
-        except UnicodeDecodeError:
-            df_original = pd.read_csv(io.BytesIO(content), encoding='cp949')
-
-        # CSV 로드 완료
-
-        # 2. 예외 처리: 빈 CSV
-        if len(df_original) == 0:
-            raise HTTPException(status_code=400, detail="CSV 파일에 거래 데이터가 없습니다.")
-
-        # 3. 필수 컬럼 확인
-        required_cols = ['날짜', '시간', '금액', '대분류']
-        missing_cols = [col for col in required_cols if col not in df_original.columns]
-        if missing_cols:
-            raise HTTPException(
-                status_code=400,
-                detail=f"필수 컬럼이 없습니다: {', '.join(missing_cols)}"
-            )
-
-        # 4. 예외 처리: 단일 거래
-        if len(df_original) == 1:
-            category_map = {
-                0: '교통', 1: '생활', 2: '쇼핑',
-                3: '식료품', 4: '외식', 5: '주유'
-            }
-            return {
-                "predicted_category": "외식",
-                "predicted_category_code": 4,
-                "confidence": 0.17,
-                "probabilities": {cat: 1/6 for cat in category_map.values()},
-                "context": {
-                    "total_transactions": 1,
-                    "note": "단일 거래로 예측 정확도가 낮습니다."
-                }
-            }
-
-        # 5. 데이터 전처리
-        preprocessor = get_preprocessor()
+        # 2~12. 파싱 / 피처 생성 / 예측 (추론 워커 스레드)
+        return await run_inference(_predict_next_from_content, get_model(), content)
 
-        # 6. 다음 거래 예측을 위한 피처 생성
-        df_next_features = preprocessor.preprocess_for_next_prediction(df_original)
-        # 피처 생성 완료
-
-        # 7. ML 예측 수행
-        if model is None:
-            load_model()
-            if model is None:
-                raise HTTPException(status_code=500, detail="모델이 로드되지 않았습니다.")
+    except HTTPException:
+        raise
+    except InferenceQueueFullError:
+        raise HTTPException(status_code=503, detail=INFERENCE_BUSY_DETAIL)
+    except Exception as e:
+        logger.error(f"Next prediction failed: {e}")
+        raise HTTPException(status_code=400, detail=f"다음 소비 예측 실패: {str(e)}")
 
-        # 예측 실행 (확률 포함)
-        prediction_proba = model.predict_proba(df_next_features)
-        prediction = model.predict(df_next_features)
 
-        # 예측 완료
+def _predict_next_from_content(model, content: bytes) -> Dict[str, Any]:
+    """
+    업로드 CSV로 다음 소비 카테고리 예측 (추론 워커 스레드에서 실행)
 
-        # 8. 카테고리 매핑
+    Raises:
+        HTTPException: 빈 CSV / 필수 컬럼 누락 (400), 모델 미로드 (500)
+    """
+    # 한글 인코딩 대응 (utf-8 시도 후 실패 시 cp949)
+    try:
+        df_original = pd.read_csv(io.BytesIO(content), encoding='utf-8')
+    except UnicodeDecodeError:
+        df_original = pd.read_csv(io.BytesIO(content), encoding='cp949')
+
+    # CSV 로드 완료
+
+    # 2. 예외 처리: 빈 CSV
+    if len(df_original) == 0:
+        raise HTTPException(status_code=400, detail="CSV 파일에 거래 데이터가 없습니다.")
+
+    # 3. 필수 컬럼 확인
+    required_cols = ['날짜', '시간', '금액', '대분류']
+    missing_cols = [col for col in required_cols if col not in df_original.columns]
+    if missing_cols:
+        raise HTTPException(
+            status_code=400,
+            detail=f"필수 컬럼이 없습니다: {', '.join(missing_cols)}"
+        )
+
+    # 4. 예외 처리: 단일 거래
+    if len(df_original) == 1:
         category_map = {
             0: '교통', 1: '생활', 2: '쇼핑',
             3: '식료품', 4: '외식', 5: '주유'
         }
+        return {
+            "predicted_category": "외식",
+            "predicted_category_code": 4,
+            "confidence": 0.17,
+            "probabilities": {cat: 1/6 for cat in category_map.values()},
+            "context": {
+                "total_transactions": 1,
+                "note": "단일 거래로 예측 정확도가 낮습니다."
+            }
+        }
 
-        predicted_category_code = int(prediction[0])
-        predicted_category = category_map.get(predicted_category_code, '기타')
+    # 5. 데이터 전처리
+    preprocessor = get_preprocessor()
 
-        # 9. 확률 딕셔너리 생성
-        probabilities_dict = {
-            category_map[i]: float(prediction_proba[0][i])
-            for i in range(len(prediction_proba[0]))
-        }
+    # 6. 다음 거래 예측을 위한 피처 생성
+    df_next_features = preprocessor.preprocess_for_next_prediction(df_original)
+    # 피처 생성 완료
 
-        # 10. 신뢰도 메트릭 계산
-        confidence_metrics = calculate_confidence_metrics(prediction_proba[0])
+    # 7. ML 예측 수행
+    if model is None:
+        raise HTTPException(status_code=500, detail="모델이 로드되지 않았습니다.")
 
-        # 11. 컨텍스트 정보 생성
-        # df_original에서 통계 추출
-        preprocessor_temp = get_preprocessor()
-        df_clean = preprocessor_temp._clean_data(df_original.copy())
+    # 예측 실행 (확률 포함)
+    prediction_proba = model.predict_proba(df_next_features)
+    prediction = model.predict(df_next_features)
 
-        last_transaction = df_clean.iloc[-1]
-        user_avg_amount = df_clean['Amount'].mean()
+    # 예측 완료
 
-        # 가장 빈번한 카테고리 찾기
-        category_map_reverse = {
-            '교통': 0, '생활': 1, '쇼핑': 2, '식료품': 3, '외식': 4, '주유': 5,
-            '식비': 4, '카페': 4, '간식': 3, '마트': 3, '편의점': 3,
-            '카페/간식': 4  # 추가
-        }
-        df_clean['category_encoded'] = df_clean['대분류'].map(category_map_reverse).fillna(6)
-        most_frequent_category_code = df_clean['category_encoded'].mode()[0] if len(df_clean) > 0 else 4
-        most_frequent_category = category_map.get(int(most_frequent_category_code), '외식')
-
-        last_category_code = category_map_reverse.get(last_transaction.get('대분류', '외식'), 4)
-        last_category = category_map.get(int(last_category_code), '외식')
-
-        context = {
-            "total_transactions": len(df_original),
-            "last_transaction_date": last_transaction['CreateDate'].strftime('%Y-%m-%d %H:%M'),
-            "last_category": last_category,
-            "user_avg_amount": float(user_avg_amount),
-            "most_frequent_category": most_frequent_category
-        }
+    # 8. 카테고리 매핑
+    category_map = {
+        0: '교통', 1: '생활', 2: '쇼핑',
+        3: '식료품', 4: '외식', 5: '주유'
+    }
 
-        # 12. 최종 결과 반환
-        return {
-            "predicted_category": predicted_category,
-            "predicted_category_code": predicted_category_code,
-            "confidence": confidence_metrics["top1_confidence"],
-            "probabilities": probabilities_dict,
-            "context": context,
-            "confidence_metrics": confidence_metrics
-        }
+    predicted_category_code = int(prediction[0])
+    predicted_category = category_map.get(predicted_category_code, '기타')
 
-    except HTTPException:
-        raise
+    # 9. 확률 딕셔너리 생성
+    probabilities_dict = {
+        category_map[i]: float(prediction_proba[0][i])
+        for i in range(len(prediction_proba[0]))
+    }
+
+    # 10. 신뢰도 메트릭 계산
+    confidence_metrics = calculate_confidence_metrics(prediction_proba[0])
+
+    # 11. 컨텍스트 정보 생성
+    # df_original에서 통계 추출
+    preprocessor_temp = get_preprocessor()
+    df_clean = preprocessor_temp._clean_data(df_original.copy())
+
+    last_transaction = df_clean.iloc[-1]
+    user_avg_amount = df_clean['Amount'].mean()
+
+    # 가장 빈번한 카테고리 찾기
+    category_map_reverse = {
+        '교통': 0, '생활': 1, '쇼핑': 2, '식료품': 3, '외식': 4, '주유': 5,
+        '식비': 4, '카페': 4, '간식': 3, '마트': 3, '편의점': 3,
+        '카페/간식': 4  # 추가
+    }
+    df_clean['category_encoded'] = df_clean['대분류'].map(category_map_reverse).fillna(6)
+    most_frequent_category_code = df_clean['category_encoded'].mode()[0] if len(df_clean) > 0 else 4
+    most_frequent_category = category_map.get(int(most_frequent_category_code), '외식')
+
+    last_category_code = category_map_reverse.get(last_transaction.get('대분류', '외식'), 4)
+    last_category = category_map.get(int(last_category_code), '외식')
+
+    context = {
+        "total_transactions": len(df_original),
+        "last_transaction_date": last_transaction['CreateDate'].strftime('%Y-%m-%d %H:%M'),
+        "last_category": last_category,
+        "user_avg_amount": float(user_avg_amount),
+        "most_frequent_category": most_frequent_category
+    }
+
+    # 12. 최종 결과 반환
+    return {
+        "predicted_category": predicted_category,
+        "predicted_category_code": predicted_category_code,
+        "confidence": confidence_metrics["top1_confidence"],
+        "probabilities": probabilities_dict,
+        "context": context,
+        "confidence_metrics": confidence_metrics
+    }
+
+
+
+@router.post("/predict-next/batch", response_model=NextCategoryBatchResponse)
+async def predict_next_category_batch(
+    request: NextCategoryBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    여러 사용자의 다음 소비 카테고리를 DB 거래 이력으로 일괄 예측하고 캐시에 저장합니다.
+
+    **Admin only endpoint**
+
+    - 사용자 이력을 한 번에 조회하여 사용자별 피처를 벡터화 계산
+    - predict_proba 1회 호출로 전체 채점 (배치 단위)
+    - 결과는 next_category_predictions 테이블에 저장
+    - user_ids를 생략하면 활성 사용자 전체를 처리하고 건수만 반환
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    current_model = get_model()
+    if current_model is None:
+        raise HTTPException(status_code=500, detail="모델이 로드되지 않았습니다.")
+
+    try:
+        results = await refresh_next_predictions(db, current_model, request.user_ids)
+    except InferenceQueueFullError:
+        raise HTTPException(status_code=503, detail=INFERENCE_BUSY_DETAIL)
     except Exception as e:
-        logger.error(f"Next prediction failed: {e}")
-        raise HTTPException(status_code=400, detail=f"다음 소비 예측 실패: {str(e)}")
+        logger.error(f"Batch next prediction failed: {e}")
+        raise HTTPException(status_code=500, detail=f"배치 예측 실패: {str(e)}")
+
+    return NextCategoryBatchResponse(
+        processed_users=len(results),
+        predictions=[NextCategoryResult(**r) for r in results] if request.user_ids is not None else []
+    )
+
+
+@router.get("/predict-next/cached", response_model=NextCategoryResult)
+async def get_cached_next_category(
+    user_id: Optional[int] = Query(None, description="사용자 ID (관리자만 지정 가능, 기본: 본인)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    야간 배치가 미리 계산한 다음 소비 카테고리 예측을 조회합니다.
+    """
+    target_user_id = user_id if (user_id is not None and current_user.is_superuser) else current_user.id
+
+    cached = await get_cached_prediction(db, target_user_id)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="캐시된 예측 결과가 없습니다.")
+    return cached
+
+
+@router.get("/predict-next/live", response_model=NextCategoryResult)
+async def get_live_next_category(
+    user_id: Optional[int] = Query(None, description="사용자 ID (관리자만 지정 가능, 기본: 본인)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    DB에 저장된 전체 거래 이력 기준으로 다음 소비 카테고리를 즉시 예측합니다.
+
+    - 거래 이력을 다시 읽지 않고 사용자 피처 저장소(누적 통계)에서 O(1)로 피처 생성
+    - 결과는 캐시 테이블에 저장하지 않음
+    """
+    target_user_id = user_id if (user_id is not None and current_user.is_superuser) else current_user.id
+
+    current_model = get_model()
+    if current_model is None:
+        raise HTTPException(status_code=500, detail="모델이 로드되지 않았습니다.")
+
+    try:
+        result = await predict_user_next_category(db, current_model, target_user_id)
+    except InferenceQueueFullError:
+        raise HTTPException(status_code=503, detail=INFERENCE_BUSY_DETAIL)
+    except Exception as e:
+        logger.error(f"Live next prediction failed: {e}")
+        raise HTTPException(status_code=500, detail=f"다음 소비 예측 실패: {str(e)}")
+
+    if result is None:
+        raise HTTPException(status_code=404, detail="거래 내역이 없습니다.")
+    return NextCategoryResult(**result)
+
+
+# ============================================================
+# 모델 레지스트리 관리 (Admin only)
+# ============================================================
+
+def _require_superuser(current_user: User):
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+
+@router.get("/models")
+async def get_model_status(current_user: User = Depends(get_current_user)):
+    """
+    로드된 모델 버전 목록과 버전별 로드 시간/메모리/지연 시간(p50, p99) 조회
+
+    **Admin only endpoint**
+    """
+    _require_superuser(current_user)
+    return get_registry().status()
+
+
+@router.post("/models/{name}/load")
+async def load_model_version(
+    name: str,
+    request: ModelLoadRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    모델 파일을 새 버전으로 로드 (기존 버전은 로드가 끝날 때까지 계속 서빙)
+
+    **Admin only endpoint**
+    """
+    _require_superuser(current_user)
+
+    try:
+        path = resolve_model_path(request.filename) if request.filename else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    # joblib 로드는 블로킹 작업이므로 스레드풀에서 실행
+    loop = asyncio.get_event_loop()
+    try:
+        model_version = await loop.run_in_executor(
+            None,
+            lambda: get_registry().load(name, path=path, version=request.version, activate=request.activate)
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Model load failed: {e}")
+        raise HTTPException(status_code=500, detail=f"모델 로드 실패: {str(e)}")
+
+    return {"status": "loaded", "name": name, "active": request.activate, **model_version.stats()}
+
+
+@router.post("/models/{name}/activate")
+async def activate_model_version(
+    name: str,
+    request: ModelActivateRequest,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    활성 모델 버전 교체 (처리 중인 요청은 기존 버전으로 완료)
+
+    **Admin only endpoint**
+    """
+    _require_superuser(current_user)
+    try:
+        get_registry().activate(name, request.version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"status": "activated", "name": name, "version": request.version}
+
+
+@router.get("/inference/stats")
+async def get_inference_stats(current_user: User = Depends(get_current_user)):
+    """
+    추론 실행기 상태 (대기열 깊이, 실행 중 작업 수, 대기/실행 시간 p50·p99)
+    및 /ml/predict 마이크로배치 통계 (배치 수, 평균 배치 크기)
+
+    **Admin only endpoint**
+    """
+    _require_superuser(current_user)
+    return {
+        **get_inference_executor().stats(),
+        "predict_batcher": _predict_batcher.stats()
+    }
+
+
+@router.delete("/models/{name}/{version}")
+async def unload_model_version(
+    name: str,
+    version: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    비활성 모델 버전 해제
+
+    **Admin only endpoint**
+    """
+    _require_superuser(current_user)
+    try:
+        get_registry().unload(name, version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "unloaded", "name": name, "version": version}
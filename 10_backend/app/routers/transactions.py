@@ -1,14 +1,29 @@
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from typing import List, Optional
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import and_, func, or_, select, update, delete
+from sqlalchemy import and_, func, or_, select, tuple_, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from app.db.database import get_db
 from app.db.model.transaction import Anomaly, Category, Transaction
 from app.core.jwt import verify_access_token
+from app.services.feature_store import apply_new_transactions, invalidate_user_stats
+from app.services.fraud_state import invalidate_fraud_state
+from app.services.realtime_fraud import score_on_insert, scoring_row
+from app.services.transaction_bulk import insert_transactions_bulk
+from app.services.category_cache import get_category_ids
+from app.services.spend_rollup import add_transactions, clear_user_rollups
+from app.services.dashboard_cache import invalidate_dashboard
+from app.services.transaction_search import (
+    autocomplete_merchants, get_search_backend, invalidate_merchant_index,
+    register_merchant_names, search_condition
+)
+from app.services.pagination import (
+    MAX_PAGE_SIZE, InvalidCursorError, cached_count, decode_cursor, encode_cursor
+)
 
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
@@ -55,11 +70,20 @@ class TransactionBase(BaseModel):
 
 class TransactionList(BaseModel):
     """거래 목록 응답 스키마"""
-    total: int
+    total: Optional[int] = None  # count=none이면 None
     page: int
     page_size: int
     transactions: List[TransactionBase]
     data_source: str = "DB"
+    next_cursor: Optional[str] = None  # 다음 페이지 커서 (없으면 마지막 페이지)
+    has_more: bool = False
+    total_is_estimate: bool = False  # count=approximate로 캐시된 값을 돌려준 경우
+    sort: str = "recent"  # 실제 적용된 정렬 (pg_trgm이 없으면 relevance 요청도 recent)
+
+class MerchantSuggestion(BaseModel):
+    """가맹점 자동완성 항목"""
+    merchant: str
+    count: int  # 해당 가맹점 거래 수
 
 class TransactionUpdate(BaseModel):
     """거래 수정 요청 스키마"""
@@ -74,17 +98,26 @@ class TransactionCreate(BaseModel):
     description: Optional[str] = None
     transaction_date: Optional[str] = None  # ISO format: 2025-12-16T10:30:00
     currency: Optional[str] = "KRW"  # 일괄 생성 호환용
+    dedupe_key: Optional[str] = None  # 클라이언트 중복 방지 키 (같은 키로 다시 보내면 새로 만들지 않음)
 
 class TransactionBulkCreate(BaseModel):
     """거래 일괄 생성 요청 스키마"""
     user_id: int
     transactions: List[TransactionCreate]
 
+class BulkRowFailure(BaseModel):
+    """일괄 생성 실패 행"""
+    index: int  # 요청 transactions 배열의 위치
+    dedupe_key: Optional[str] = None
+    error: str
+
 class TransactionBulkResponse(BaseModel):
     """거래 일괄 생성 응답 스키마"""
     status: str
     created_count: int
     failed_count: int
+    skipped_count: int = 0  # dedupe_key 중복으로 건너뛴 행
+    failures: List[BulkRowFailure] = []
     message: str
 
 class AnomalyReport(BaseModel):
@@ -103,9 +136,23 @@ async def get_transactions(
     max_amount: Optional[float] = None,
     search: Optional[str] = None,
     page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1), # 상한선 제거하여 유연성 확보
+    page_size: int = Query(20, ge=1, description="페이지 크기 (MAX_PAGE_SIZE를 넘으면 MAX_PAGE_SIZE로 제한)"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (주면 page 대신 커서 기준 조회)"),
+    count: Optional[str] = Query(None, pattern="^(exact|approximate|none)$", description="총 개수 계산 방식 (기본: page 조회 exact, 커서 조회 none)"),
+    sort: str = Query("recent", pattern="^(recent|relevance)$", description="정렬 (relevance: 검색어 유사도 순, search 필요)"),
     db: AsyncSession = Depends(get_db)
 ):
+    """
+    거래 내역 조회 (최신순)
+
+    - page/page_size: 기존 OFFSET 페이지 조회
+    - cursor: (transaction_time, id) 키셋 조회, 응답의 next_cursor로 다음 페이지 요청
+    - count: exact (COUNT), approximate (최근 COUNT 결과 재사용), none (계산 안 함)
+    - search: 가맹점명/설명 검색 (pg_trgm이 있으면 오타 허용 + 가맹점명 정규화)
+    - sort=relevance: 검색 유사도 순 (page 조회만 지원, pg_trgm이 없으면 최신순)
+    """
+    # 큰 page_size는 거부하지 않고 상한으로 제한
+    page_size = min(page_size, MAX_PAGE_SIZE)
     try:
         # user_id가 없으면 빈 목록 반환 (인증되지 않은 경우)
         if user_id is None:
@@ -116,6 +163,14 @@ async def get_transactions(
                 transactions=[],
                 data_source="DB"
             )
+
+        try:
+            position = decode_cursor(cursor) if cursor else None
+        except InvalidCursorError:
+            raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다.")
+        count_mode = count or ("none" if cursor else "exact")
+        if sort == "relevance" and cursor:
+            raise HTTPException(status_code=400, detail="sort=relevance는 cursor 조회를 지원하지 않습니다.")
         
         # 기본 쿼리 및 카운트 쿼리 생성
         query = select(Transaction).options(selectinload(Transaction.category))
@@ -144,14 +199,20 @@ async def get_transactions(
         if max_amount is not None:
             conditions.append(Transaction.amount <= max_amount)
         
+        rank = None
         if search:
-            search_pattern = f"%{search}%"
-            conditions.append(
-                or_(
-                    Transaction.merchant_name.ilike(search_pattern),
-                    Transaction.description.ilike(search_pattern)
-                )
-            )
+            search_backend = await get_search_backend(db)
+            search_clause, rank = search_condition(search_backend, search)
+            conditions.append(search_clause)
+        applied_sort = "relevance" if sort == "relevance" and rank is not None else "recent"
+
+        # 카테고리 이름 필터 (이름 → id 캐시, 카테고리 없는 거래는 "기타"로 취급)
+        if category:
+            category_ids = (await get_category_ids(db)).get(category, [])
+            category_condition = Transaction.category_id.in_(category_ids)
+            if category == "기타":
+                category_condition = or_(category_condition, Transaction.category_id.is_(None))
+            conditions.append(category_condition)
         
         # 조건 적용
         if conditions:
@@ -159,26 +220,35 @@ async def get_transactions(
             count_query = count_query.where(and_(*conditions))
         
         # 총 개수 조회
-        total_result = await db.execute(count_query)
-        total = total_result.scalar() or 0
-        
-        # 페이징 적용 (최신순)
-        offset = (page - 1) * page_size
-        query = query.order_by(Transaction.transaction_time.desc()).offset(offset).limit(page_size)
+        total = None
+        if count_mode == "exact":
+            total = (await db.execute(count_query)).scalar() or 0
+        elif count_mode == "approximate":
+            count_key = ("transactions", user_id, category, start_date, end_date, min_amount, max_amount, search)
+            total = await cached_count(count_key, lambda: db.scalar(count_query))
+        
+        # 페이징 적용 (최신순, 같은 시각은 id 역순 / relevance는 유사도 우선)
+        if applied_sort == "relevance":
+            query = query.order_by(rank.desc())
+        query = query.order_by(Transaction.transaction_time.desc(), Transaction.id.desc())
+        if position:
+            query = query.where(tuple_(Transaction.transaction_time, Transaction.id) < tuple_(*position))
+        else:
+            query = query.offset((page - 1) * page_size)
+        query = query.limit(page_size + 1)  # 다음 페이지 존재 여부 확인용 1건 추가
         
         # 데이터 조회
         result = await db.execute(query)
         rows = result.scalars().all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1].transaction_time, rows[-1].id) if has_more and applied_sort == "recent" else None
         
         # 응답 데이터 변환
         transactions = []
         for tx in rows:
             cat_name = tx.category.name if tx.category else "기타"
             
-            # 카테고리 이름 필터
-            if category and cat_name != category:
-                continue
-                
             transactions.append(TransactionBase(
                 id=tx.id,
                 merchant=tx.merchant_name or "알 수 없음",
@@ -195,86 +265,91 @@ async def get_transactions(
             page=page,
             page_size=page_size,
             transactions=transactions,
-            data_source="DB (AWS RDS)"
+            data_source="DB (AWS RDS)",
+            next_cursor=next_cursor,
+            has_more=has_more,
+            total_is_estimate=count_mode == "approximate",
+            sort=applied_sort
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"거래 내역 조회 실패: {e}")
         raise HTTPException(status_code=500, detail="거래 내역을 불러올 수 없습니다.")
 
+# 가맹점 자동완성 API
+@router.get("/merchants/autocomplete", response_model=List[MerchantSuggestion])
+async def get_merchant_autocomplete(
+    user_id: int = Query(..., description="사용자 ID"),
+    q: str = Query("", max_length=100, description="가맹점명 접두어 (공백/기호/대소문자 무시)"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    사용자가 거래한 가맹점 중 접두어가 일치하는 것 (거래 수 많은 순)
+    """
+    try:
+        suggestions = await autocomplete_merchants(db, user_id, q, limit)
+        return [MerchantSuggestion(**item) for item in suggestions]
+    except Exception as e:
+        logger.error(f"가맹점 자동완성 실패: {e}")
+        raise HTTPException(status_code=500, detail="가맹점 목록을 불러올 수 없습니다.")
+
 # 거래 내역 일괄 생성 API
 @router.post("/bulk", response_model=TransactionBulkResponse)
 async def create_transactions_bulk(
     data: TransactionBulkCreate,
     db: AsyncSession = Depends(get_db)
 ):
+    """
+    거래 일괄 생성 (청크 단위 executemany)
+
+    - 행별 실패는 failures(index, dedupe_key, error)로 보고하고 나머지는 저장
+    - dedupe_key가 이미 저장된 행은 건너뜀 (skipped_count, 재시도해도 중복 생성 없음)
+    """
     try:
-        from sqlalchemy import insert
-        
-        created_count = 0
-        failed_count = 0
-        
-        # 카테고리 매핑 조회
-        cat_query = select(Category)
-        cat_result = await db.execute(cat_query)
-        categories = {c.name: c.id for c in cat_result.scalars().all()}
-        
-        for tx in data.transactions:
-            try:
-                category_id = categories.get(tx.category)
-                if not category_id:
-                    category_id = categories.get('기타') or (list(categories.values())[0] if categories else None)
-                
-                import random
-                try:
-                    # 1. Try standard format with Seconds
-                    dt = datetime.strptime(tx.transaction_date, "%Y-%m-%d %H:%M:%S")
-                    # User Request: Truncate seconds even if provided
-                    tx_time = dt.replace(second=0, microsecond=0)
-                except ValueError:
-                    try:
-                        # 2. Try format without Seconds (User's case: YYYY-MM-DD HH:MM)
-                        tx_time = datetime.strptime(tx.transaction_date, "%Y-%m-%d %H:%M")
-                        # seconds are already 0 here
-                    except ValueError:
-                        try:
-                            # 3. Try Date only
-                            tx_time = datetime.strptime(tx.transaction_date, "%Y-%m-%d")
-                        except ValueError:
-                            # 4. Fallback: Random past date (Team Logic)
-                            days_ago = random.randint(0, 365)
-                            tx_time = datetime.now() - timedelta(days=days_ago)
-                            tx_time = tx_time.replace(second=0, microsecond=0)
-                
-                insert_stmt = insert(Transaction).values(
-                    user_id=data.user_id,
-                    category_id=category_id,
-                    amount=tx.amount,
-                    currency=tx.currency,
-                    merchant_name=tx.merchant,
-                    description=tx.description,
-                    status="completed",
-                    transaction_time=tx_time
-                )
-                await db.execute(insert_stmt)
-                created_count += 1
-                
-            except Exception as e:
-                logger.warning(f"거래 개별 생성 실패: {e}")
-                failed_count += 1
-        
+        result = await insert_transactions_bulk(db, data.user_id, data.transactions)
+
+        # 실시간 이상거래 점수화 (Anomaly 행을 같은 트랜잭션에 저장, 대량이면 커밋 후 대기열로)
+        await score_on_insert(db, [
+            scoring_row(SimpleNamespace(**row), row["category_name"]) for row in result.created
+        ])
+        await register_merchant_names(db, [row["merchant_name"] for row in result.created])
+        await add_transactions(db, [row["id"] for row in result.created])
+
+        # 사용자 피처 저장소 증분 갱신 (거래와 같은 트랜잭션)
+        await apply_new_transactions(db, data.user_id, [
+            {
+                "amount": row["amount"],
+                "category_name": row["category_name"],
+                "transaction_time": row["transaction_time"]
+            }
+            for row in result.created
+        ])
         await db.commit()
+        invalidate_merchant_index(data.user_id)
+        await invalidate_dashboard(data.user_id)
     except Exception as e:
         logger.error(f"일괄 생성 처리 중 치명적 오류: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     
     # 예산 체크 및 알림 발송 (생략하거나 유지 가능)
 
+    created_count = len(result.created)
+    failed_count = len(result.failures)
+    skipped_count = len(result.skipped)
+    message = f"{created_count}건 생성 완료, {failed_count}건 실패"
+    if skipped_count:
+        message += f", {skipped_count}건 중복 건너뜀"
+
     return TransactionBulkResponse(
         status="success",
         created_count=created_count,
         failed_count=failed_count,
-        message=f"{created_count}건 생성 완료, {failed_count}건 실패"
+        skipped_count=skipped_count,
+        failures=[BulkRowFailure(**failure) for failure in result.failures],
+        message=message
     )
 
 # 단일 거래 생성 API
@@ -292,6 +367,7 @@ async def create_transaction(
     - merchant_name: 가맹점명 (필수)
     - description: 설명/메모 (선택)
     - transaction_date: 거래 시각 ISO format (선택, 기본값: 현재 시각)
+    - dedupe_key: 클라이언트 중복 방지 키 (선택, 이미 있으면 기존 거래 반환)
     """
     try:
         # merchant_name과 merchant 둘 다 지원 (일괄 생성 호환)
@@ -299,6 +375,26 @@ async def create_transaction(
         if not merchant:
             raise HTTPException(status_code=422, detail="merchant_name 또는 merchant 필드가 필요합니다")
 
+        # 같은 dedupe_key로 이미 만든 거래가 있으면 그대로 반환 (재시도 멱등성)
+        if data.dedupe_key:
+            existing = await db.execute(
+                select(Transaction)
+                .where(Transaction.user_id == user_id, Transaction.dedupe_key == data.dedupe_key)
+                .options(selectinload(Transaction.category))
+            )
+            existing_tx = existing.scalar_one_or_none()
+            if existing_tx:
+                return TransactionBase(
+                    id=existing_tx.id,
+                    merchant=existing_tx.merchant_name or "알 수 없음",
+                    amount=float(existing_tx.amount),
+                    category=existing_tx.category.name if existing_tx.category else "기타",
+                    transaction_date=existing_tx.transaction_time.strftime("%Y-%m-%d %H:%M:%S"),
+                    description=existing_tx.description,
+                    status=existing_tx.status,
+                    currency=existing_tx.currency
+                )
+
         # 카테고리 조회
         cat_query = select(Category).where(Category.name == data.category)
         cat_result = await db.execute(cat_query)
@@ -328,14 +424,30 @@ async def create_transaction(
             category_id=category.id if category else None,
             transaction_time=tx_time,
             status="completed",
-            currency=data.currency or "KRW"
+            currency=data.currency or "KRW",
+            dedupe_key=data.dedupe_key
         )
 
         db.add(new_tx)
+        await db.flush()
+
+        # 실시간 이상거래 점수화 (Anomaly 행을 같은 트랜잭션에 저장)
+        await score_on_insert(db, [scoring_row(new_tx, category.name if category else None)])
+        await register_merchant_names(db, [merchant])
+        await add_transactions(db, [new_tx.id])
+
+        # 사용자 피처 저장소 증분 갱신 (거래와 같은 트랜잭션)
+        await apply_new_transactions(db, user_id, [{
+            "amount": data.amount,
+            "category_name": category.name if category else None,
+            "transaction_time": new_tx.transaction_time
+        }])
         await db.commit()
         await db.refresh(new_tx)
+        invalidate_merchant_index(user_id)
+        await invalidate_dashboard(user_id)
 
-        return TransactionBase(
+        created = TransactionBase(
             id=new_tx.id,
             merchant=new_tx.merchant_name or "알 수 없음",
             amount=float(new_tx.amount),
@@ -346,6 +458,8 @@ async def create_transaction(
             currency=new_tx.currency
         )
 
+        return created
+
     except Exception as e:
         logger.error(f"거래 생성 실패: {e}")
         await db.rollback()
@@ -363,7 +477,12 @@ async def delete_all_transactions(
     try:
         delete_stmt = delete(Transaction).where(Transaction.user_id == user_id)
         result = await db.execute(delete_stmt)
+        await invalidate_user_stats(db, user_id)
+        await invalidate_fraud_state(db, user_id)
+        await clear_user_rollups(db, user_id)
         await db.commit()
+        invalidate_merchant_index(user_id)
+        await invalidate_dashboard(user_id)
         return {
             "status": "success",
             "message": f"{result.rowcount}건의 거래가 삭제되었습니다.",
@@ -3,8 +3,8 @@ User Analytics Router
 Provides endpoints for tracking new signups, churned users, and churn metrics
 """
 
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy import select, func, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -14,6 +14,8 @@ from app.db.model.user import User
 from app.db.model.transaction import Transaction
 from app.db.schema.user import UserResponse
 from app.routers.user import get_current_user
+from app.services.user_activity import list_users_with_activity, get_churn_counts
+from app.services.user_cohorts import USER_COHORTS_ENABLED, cohort_churn_counts, churn_trend, retention_curve
 from pydantic import BaseModel
 from fastapi import HTTPException, status
 
@@ -28,6 +30,29 @@ class ChurnMetrics(BaseModel):
     active_users: int
     new_signups: int
     total_users: int
+    data_as_of: Optional[datetime] = None  # Daily cohort refresh time (None when computed in real time)
+
+
+class ChurnTrendPoint(BaseModel):
+    """Churn rate on a given day"""
+    day: date
+    total_users: int
+    active_users: Optional[int]  # None when the churn window starts before the first stored cohort day
+    churned_users: Optional[int]
+    churn_rate: Optional[float]
+
+
+class RetentionCohort(BaseModel):
+    """Day-N retention of users who signed up on cohort_date"""
+    cohort_date: date
+    cohort_size: int
+    retention: Dict[int, Optional[float]]
+
+
+class RetentionResponse(BaseModel):
+    """Retention curves by signup cohort"""
+    cohorts: List[RetentionCohort]
+    average: Dict[int, Optional[float]]
 
 
 # Helper to check superuser
@@ -61,6 +86,11 @@ async def is_user_churned(db: AsyncSession, user_id: int, days: int = 30) -> boo
     return result.scalar_one_or_none() is None
 
 
+def _user_response(user: User, has_activity: bool) -> UserResponse:
+    """Build UserResponse with the computed recent activity flag"""
+    return UserResponse(**{**user.__dict__, 'has_recent_activity': has_activity})
+
+
 @router.get("/", response_model=List[UserResponse])
 async def get_all_users_admin(
     db: AsyncSession = Depends(get_db),
@@ -72,24 +102,10 @@ async def get_all_users_admin(
     **Admin only endpoint**
     """
     await verify_superuser(current_user)
-    result = await db.execute(
-        select(User)
-        .where(User.is_superuser == False)
-        .order_by(User.id.asc())
-    )
-    users = result.scalars().all()
-    
-    # Calculate has_recent_activity for each user
-    user_responses = []
-    for user in users:
-        has_activity = not await is_user_churned(db, user.id, days=30)
-        user_dict = {
-            **user.__dict__,
-            'has_recent_activity': has_activity
-        }
-        user_responses.append(UserResponse(**user_dict))
     
-    return user_responses
+    # has_recent_activity is computed for all users in the same query
+    rows = await list_users_with_activity(db, order_by=[User.id.asc()], activity_days=30)
+    return [_user_response(user, has_activity) for user, has_activity in rows]
 
 
 @router.get("/new-signups", response_model=List[UserResponse])
@@ -106,30 +122,13 @@ async def get_new_signups(
     await verify_superuser(current_user)
     cutoff_date = datetime.now() - timedelta(days=days)
     
-    result = await db.execute(
-        select(User)
-        .where(
-            and_(
-                User.created_at >= cutoff_date,
-                User.is_superuser == False
-            )
-        )
-        .order_by(User.created_at.desc())
+    rows = await list_users_with_activity(
+        db,
+        where=[User.created_at >= cutoff_date],
+        order_by=[User.created_at.desc()],
+        activity_days=30
     )
-    
-    users = result.scalars().all()
-    
-    # Calculate has_recent_activity for each user
-    user_responses = []
-    for user in users:
-        has_activity = not await is_user_churned(db, user.id, days=30)
-        user_dict = {
-            **user.__dict__,
-            'has_recent_activity': has_activity
-        }
-        user_responses.append(UserResponse(**user_dict))
-    
-    return user_responses
+    return [_user_response(user, has_activity) for user, has_activity in rows]
 
 
 @router.get("/churned", response_model=List[UserResponse])
@@ -146,30 +145,16 @@ async def get_churned_users(
     """
     await verify_superuser(current_user)
     
-    # Get all non-superuser users
-    result = await db.execute(
-        select(User)
-        .where(User.is_superuser == False)
-    )
-    all_users = result.scalars().all()
-    
-    # Filter churned users (no transactions in last N days)
-    churned_user_responses = []
-    for user in all_users:
-        if await is_user_churned(db, user.id, days):
-            user_dict = {
-                **user.__dict__,
-                'has_recent_activity': False  # Churned users have no recent activity
-            }
-            churned_user_responses.append(UserResponse(**user_dict))
-    
-    return churned_user_responses
+    # Churned users (no transactions in last N days) are filtered in SQL
+    rows = await list_users_with_activity(db, activity_days=days, churned_only=True)
+    return [_user_response(user, False) for user, _ in rows]
 
 
 @router.get("/stats/churn-rate", response_model=ChurnMetrics)
 async def get_churn_rate(
     churn_days: int = Query(30, ge=1, le=365, description="Days of inactivity for churn"),
     signup_days: int = Query(30, ge=1, le=365, description="Days to count new signups"),
+    realtime: bool = Query(False, description="Compute from transactions instead of daily cohorts"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -183,40 +168,21 @@ async def get_churn_rate(
     - **active_users**: Number of users with recent transactions
     - **new_signups**: New users in the specified period
     - **total_users**: Total registered users (excluding superusers)
+    - **data_as_of**: Daily cohort refresh time; periods are whole days including today
+    
+    Falls back to real-time computation until today's cohort row exists.
     """
     await verify_superuser(current_user)
     
-    # Get total non-superuser users
-    total_result = await db.execute(
-        select(func.count(User.id))
-        .where(User.is_superuser == False)
-    )
-    total_users = total_result.scalar() or 0
-    
-    # Get new signups (excluding superusers)
-    signup_cutoff = datetime.now() - timedelta(days=signup_days)
-    signup_result = await db.execute(
-        select(func.count(User.id))
-        .where(
-            and_(
-                User.created_at >= signup_cutoff,
-                User.is_superuser == False
-            )
-        )
-    )
-    new_signups = signup_result.scalar() or 0
-    
-    # Get all non-superuser users and check transaction history
-    result = await db.execute(
-        select(User)
-        .where(User.is_superuser == False)
-    )
-    all_users = result.scalars().all()
-    
-    total_churned = 0
-    for user in all_users:
-        if await is_user_churned(db, user.id, churn_days):
-            total_churned += 1
+    # Bitmap operations on today's cohort row, else a single query over users/transactions
+    counts = None
+    if USER_COHORTS_ENABLED and not realtime:
+        counts = await cohort_churn_counts(db, churn_days, signup_days)
+    if counts is None:
+        counts = await get_churn_counts(db, churn_days, signup_days)
+    total_users = counts["total_users"]
+    total_churned = counts["total_churned"]
+    new_signups = counts["new_signups"]
     
     active_users = total_users - total_churned
     churn_rate = (total_churned / total_users * 100) if total_users > 0 else 0.0
@@ -226,5 +192,46 @@ async def get_churn_rate(
         total_churned=total_churned,
         active_users=active_users,
         new_signups=new_signups,
-        total_users=total_users
+        total_users=total_users,
+        data_as_of=counts.get("data_as_of")
     )
+
+
+@router.get("/stats/churn-trend", response_model=List[ChurnTrendPoint])
+async def get_churn_trend(
+    days: int = Query(90, ge=1, le=365, description="Number of days of history"),
+    churn_days: int = Query(30, ge=1, le=365, description="Days of inactivity for churn"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get daily churn rate history from the daily cohort tables
+    
+    **Admin only endpoint**
+    
+    Points whose churn window starts before the first stored cohort day have null
+    active_users/churned_users/churn_rate (the window would be missing activity).
+    """
+    await verify_superuser(current_user)
+    return await churn_trend(db, days, churn_days)
+
+
+@router.get("/stats/retention", response_model=RetentionResponse)
+async def get_retention(
+    days: int = Query(30, ge=1, le=365, description="Signup cohorts from the last N days"),
+    offsets: List[int] = Query([1, 7, 30], description="Day-N retention offsets"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get day-N retention by daily signup cohort from the daily cohort tables
+    
+    **Admin only endpoint**
+    
+    - **retention**: Percentage of the cohort with a transaction exactly N days after signup (null if not reached yet)
+    - **average**: Cohort-size weighted average per offset
+    """
+    await verify_superuser(current_user)
+    if any(n < 0 or n > 365 for n in offsets):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="offsets must be between 0 and 365")
+    return await retention_curve(db, days, sorted(set(offsets)))
@@ -0,0 +1,126 @@
+"""
+Admin Analytics Snapshot
+관리자 분석 대시보드(/analysis/admin/full)용 전체 사용자 월·카테고리별 소비 스냅샷
+
+관리자 대시보드는 요청마다 전체 사용자 집계를 users와 조인해 다시 합산하지 않고
+스케줄러가 주기적으로 갱신한 스냅샷(admin_spend_snapshot)을 읽습니다.
+
+- PostgreSQL: MATERIALIZED VIEW + 고유 인덱스 → REFRESH MATERIALIZED VIEW CONCURRENTLY
+  (갱신 중에도 조회가 막히지 않음)
+- 그 외(SQLite 개발 환경): 같은 이름의 일반 테이블을 한 트랜잭션에서 DELETE + INSERT ... SELECT
+
+스냅샷 행 수는 (월 수 × 카테고리 수)라 사용자/거래 수와 무관합니다.
+마지막 갱신 시각은 snapshot_refreshes에 기록되어 응답의 data_as_of로 나갑니다.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional, List, Tuple
+import os
+import time
+import logging
+
+from sqlalchemy import text, select, Date, Numeric, BigInteger, Integer
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+
+from app.db.model.rollup import SnapshotRefresh
+
+logger = logging.getLogger(__name__)
+
+ADMIN_SNAPSHOT_ENABLED = os.getenv("ADMIN_SNAPSHOT", "1") == "1"
+ADMIN_SNAPSHOT_REFRESH_SECONDS = int(os.getenv("ADMIN_SNAPSHOT_REFRESH_SECONDS", 300))
+
+SNAPSHOT_NAME = "admin_spend"
+
+# 관리자 제외 전체 사용자의 월·카테고리별 합계 (소비 집계 spend_monthly 기준)
+ADMIN_SNAPSHOT_SELECT = """
+SELECT m.month AS month, m.category_id AS category_id,
+       SUM(m.total) AS total, SUM(m.count) AS count
+FROM spend_monthly m
+JOIN users u ON u.id = m.user_id
+WHERE u.is_superuser = false
+GROUP BY m.month, m.category_id
+"""
+
+POSTGRES_CREATE_STATEMENTS = [
+    "CREATE MATERIALIZED VIEW IF NOT EXISTS admin_spend_snapshot AS " + ADMIN_SNAPSHOT_SELECT,
+    # REFRESH ... CONCURRENTLY에 필요한 고유 인덱스
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_admin_spend_snapshot "
+    "ON admin_spend_snapshot (month, category_id)",
+]
+
+TABLE_CREATE_STATEMENTS = [
+    "CREATE TABLE IF NOT EXISTS admin_spend_snapshot ("
+    "month DATE NOT NULL, category_id BIGINT NOT NULL, "
+    "total NUMERIC(16, 2) NOT NULL, count INTEGER NOT NULL, "
+    "PRIMARY KEY (month, category_id))",
+]
+
+SNAPSHOT_ROWS_SQL = text("""
+SELECT s.month, s.category_id, c.name, s.total, s.count
+FROM admin_spend_snapshot s
+LEFT JOIN categories c ON c.id = s.category_id
+""").columns(month=Date, category_id=BigInteger, total=Numeric(16, 2), count=Integer)
+
+
+# ============================================================
+# 생성 / 갱신
+# ============================================================
+
+async def create_admin_snapshot(conn: AsyncConnection) -> None:
+    """스냅샷 relation 생성 (create_all 이후, spend_monthly가 있어야 함)"""
+    statements = POSTGRES_CREATE_STATEMENTS if conn.dialect.name == "postgresql" else TABLE_CREATE_STATEMENTS
+    for statement in statements:
+        await conn.execute(text(statement))
+
+
+async def refresh_admin_snapshot(db: AsyncSession) -> datetime:
+    """
+    스냅샷 재계산 + 갱신 시각 기록 (커밋은 호출자 책임)
+
+    Returns:
+        갱신 시각
+    """
+    started = time.perf_counter()
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY admin_spend_snapshot"))
+    else:
+        await db.execute(text("DELETE FROM admin_spend_snapshot"))
+        await db.execute(text(
+            "INSERT INTO admin_spend_snapshot (month, category_id, total, count) " + ADMIN_SNAPSHOT_SELECT
+        ))
+
+    refreshed_at = datetime.now()
+    duration_ms = int((time.perf_counter() - started) * 1000)
+    state = await db.get(SnapshotRefresh, SNAPSHOT_NAME)
+    if state is None:
+        db.add(SnapshotRefresh(name=SNAPSHOT_NAME, refreshed_at=refreshed_at, duration_ms=duration_ms))
+    else:
+        state.refreshed_at = refreshed_at
+        state.duration_ms = duration_ms
+    await db.flush()
+    logger.info(f"Admin analytics snapshot refreshed ({duration_ms} ms)")
+    return refreshed_at
+
+
+# ============================================================
+# 조회
+# ============================================================
+
+async def read_admin_snapshot(
+    db: AsyncSession
+) -> Optional[Tuple[datetime, List[Tuple[date, Optional[str], Decimal, int]]]]:
+    """
+    스냅샷 전체 행 + 기준 시각
+
+    Returns:
+        (data_as_of, [(월 1일, 카테고리 이름 또는 None, 금액, 건수), ...])
+        한 번도 갱신되지 않았으면 None (호출자가 실시간 집계로 대체)
+    """
+    refreshed_at = await db.scalar(
+        select(SnapshotRefresh.refreshed_at).where(SnapshotRefresh.name == SNAPSHOT_NAME)
+    )
+    if refreshed_at is None:
+        return None
+    rows = (await db.execute(SNAPSHOT_ROWS_SQL)).all()
+    return refreshed_at, [(month, name, total, count) for month, _, name, total, count in rows]
@@ -7,13 +7,15 @@ Admin Transactions Service Layer
 """
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, text
+from sqlalchemy import select, func, and_, or_, text, bindparam, DateTime
 from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta
 from typing import Optional, List
 import logging
 
 from app.db.model.transaction import Transaction, Category
+from app.services.pagination import decode_cursor, encode_cursor, estimate_table_rows, cached_count
+from app.services.transaction_search import get_search_backend, search_sql
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
@@ -38,11 +40,15 @@ class AdminTransactionBase(BaseModel):
 
 class AdminTransactionList(BaseModel):
     """관리자용 거래 목록 응답 스키마"""
-    total: int
+    total: Optional[int] = None  # count=none이면 None
     page: int
     page_size: int
     transactions: List[AdminTransactionBase]
     data_source: str = "DB (Admin)"
+    next_cursor: Optional[str] = None  # 다음 페이지 커서 (없으면 마지막 페이지)
+    has_more: bool = False
+    total_is_estimate: bool = False  # count=approximate로 추정/캐시된 값을 돌려준 경우
+    sort: str = "recent"  # 실제 적용된 정렬 (pg_trgm이 없으면 relevance 요청도 recent)
 
 
 # ============================================================
@@ -58,29 +64,28 @@ async def get_all_transactions(
     max_amount: Optional[float] = None,
     search: Optional[str] = None,
     page: int = 1,
-    page_size: int = 20
+    page_size: int = 20,
+    cursor: Optional[str] = None,
+    count: Optional[str] = None,
+    sort: str = "recent"
 ) -> AdminTransactionList:
     """
     관리자용 전체 거래 조회 (superuser 제외한 모든 사용자 거래)
+
+    Args:
+        cursor: 이전 응답의 next_cursor (주면 OFFSET 대신 (transaction_time, id) 키셋 조회)
+        count: exact | approximate | none (기본: page 조회 exact, 커서 조회 none)
+            approximate는 필터가 없으면 pg_class 통계, 있으면 최근 COUNT 결과를 재사용
+        sort: recent | relevance (검색 유사도 순, pg_trgm이 있고 cursor가 없을 때만 적용)
+
+    Raises:
+        InvalidCursorError: 잘못된 커서 토큰
     """
+    position = decode_cursor(cursor) if cursor else None
+
+    count_mode = count or ("none" if cursor else "exact")
+
     try:
-        # 기본 쿼리 - superuser가 아닌 사용자의 거래만 조회
-        base_query = text("""
-            SELECT t.id, t.user_id, t.merchant_name, t.amount, c.name as category_name,
-                   t.transaction_time, t.description, t.status, t.currency
-            FROM transactions t
-            JOIN users u ON t.user_id = u.id
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE u.is_superuser = false
-        """)
-        
-        count_query = text("""
-            SELECT COUNT(t.id)
-            FROM transactions t
-            JOIN users u ON t.user_id = u.id
-            WHERE u.is_superuser = false
-        """)
-        
         # 동적 조건 구축
         conditions = []
         params = {}
@@ -101,9 +106,12 @@ async def get_all_transactions(
             conditions.append("t.amount <= :max_amount")
             params["max_amount"] = max_amount
         
+        rank_sql = None
         if search:
-            conditions.append("(t.merchant_name ILIKE :search OR t.description ILIKE :search)")
-            params["search"] = f"%{search}%"
+            search_clause, rank_sql, search_params = search_sql(await get_search_backend(db), search)
+            conditions.append(search_clause)
+            params.update(search_params)
+        applied_sort = "relevance" if sort == "relevance" and rank_sql and not position else "recent"
         
         if category:
             conditions.append("c.name = :category")
@@ -122,26 +130,55 @@ async def get_all_transactions(
             LEFT JOIN categories c ON t.category_id = c.id
             WHERE u.is_superuser = false {where_clause}
         """
-        count_result = await db.execute(text(count_sql), params)
-        total = count_result.scalar() or 0
+        count_params = dict(params)
+
+        async def exact_count() -> int:
+            count_result = await db.execute(text(count_sql), count_params)
+            return count_result.scalar() or 0
+
+        total = None
+        if count_mode == "exact":
+            total = await exact_count()
+        elif count_mode == "approximate":
+            # 필터가 없으면 테이블 통계 (superuser 거래도 포함된 근사값)
+            total = await estimate_table_rows(db, "transactions") if not conditions else None
+            if total is None:
+                count_key = ("admin_transactions", category, start_date, end_date, min_amount, max_amount, search)
+                total = await cached_count(count_key, exact_count)
         
-        # 데이터 조회 (페이징)
-        offset = (page - 1) * page_size
+        # 데이터 조회 (최신순, 같은 시각은 id 역순)
+        if position:
+            # 키셋: 마지막으로 본 (transaction_time, id) 다음부터
+            page_clause = "AND (t.transaction_time, t.id) < (:cursor_time, :cursor_id)"
+            params["cursor_time"], params["cursor_id"] = position
+            offset_clause = ""
+        else:
+            page_clause = ""
+            offset_clause = "OFFSET :offset"
+            params["offset"] = (page - 1) * page_size
+        order_clause = "t.transaction_time DESC, t.id DESC"
+        if applied_sort == "relevance":
+            order_clause = f"{rank_sql} DESC, {order_clause}"
+
         data_sql = f"""
             SELECT t.id, t.user_id, t.merchant_name, t.amount, c.name as category_name,
                    t.transaction_time, t.description, t.status, t.currency
             FROM transactions t
             JOIN users u ON t.user_id = u.id
             LEFT JOIN categories c ON t.category_id = c.id
-            WHERE u.is_superuser = false {where_clause}
-            ORDER BY t.transaction_time DESC
-            OFFSET :offset LIMIT :limit
+            WHERE u.is_superuser = false {where_clause} {page_clause}
+            ORDER BY {order_clause}
+            LIMIT :limit {offset_clause}
         """
-        params["offset"] = offset
-        params["limit"] = page_size
+        params["limit"] = page_size + 1  # 다음 페이지 존재 여부 확인용 1건 추가
         
-        result = await db.execute(text(data_sql), params)
+        data_query = text(data_sql).columns(transaction_time=DateTime(timezone=True))
+        if position:
+            data_query = data_query.bindparams(bindparam("cursor_time", type_=DateTime(timezone=True)))
+        result = await db.execute(data_query, params)
         rows = result.fetchall()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
         
         # 응답 변환
         transactions = [
@@ -164,7 +201,11 @@ async def get_all_transactions(
             page=page,
             page_size=page_size,
             transactions=transactions,
-            data_source="DB (Admin - All Users)"
+            data_source="DB (Admin - All Users)",
+            next_cursor=encode_cursor(rows[-1][5], rows[-1][0]) if has_more and applied_sort == "recent" else None,
+            has_more=has_more,
+            total_is_estimate=count_mode == "approximate",
+            sort=applied_sort
         )
         
     except Exception as e:
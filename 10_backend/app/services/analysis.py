@@ -3,15 +3,17 @@ Analysis Service Layer
 비즈니스 로직과 DB 쿼리 분리
 
 분석 관련 모든 데이터 처리 로직을 담당
+합계/카테고리/월별 추이는 거래 원본 대신 소비 집계(spend_daily / spend_monthly)를 읽음
 """
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text
-from datetime import datetime, timedelta
-from typing import Optional, List
+from sqlalchemy import text, bindparam, Date
+from datetime import datetime, timedelta, date
+from typing import Optional, List, Tuple
 import logging
 
-from app.db.model.transaction import Transaction, Category
+from app.services.spend_rollup import spend_totals, spend_by_category, monthly_trend
+from app.services.admin_snapshot import ADMIN_SNAPSHOT_ENABLED, read_admin_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +62,7 @@ class AnalysisResponse(BaseModel):
     monthly_trend: List[MonthlyTrend]
     insights: List[SpendingInsight]
     data_source: str = "DB"
+    data_as_of: Optional[datetime] = None  # 스냅샷 기준 시각 (실시간 집계면 None)
 
 
 # ============================================================
@@ -99,6 +102,163 @@ def get_mock_insights() -> List[SpendingInsight]:
     ]
 
 
+# ============================================================
+# 사용자 대시보드 단일 쿼리
+# ============================================================
+
+# 이번 달/전월 합계 (조건부 집계), 카테고리 순위 (CTE), 월별 추이 (선택, UNION ALL)를 한 번에 조회
+# - kind = 'category': 카테고리별 기간 합계 + 이번 달 순위, 모든 행에 이번 달/전월 합계 포함
+#   (거래가 없으면 합계만 있는 행 1개)
+# - kind = 'trend': 최근 월별 합계
+USER_DASHBOARD_SQL = """
+    WITH days AS (
+        SELECT category_id, day, total, count
+        FROM spend_daily
+        WHERE user_id = :user_id AND day >= :window_start
+    ),
+    totals AS (
+        SELECT
+            SUM(total) FILTER (WHERE day >= :this_start) AS this_total,
+            SUM(count) FILTER (WHERE day >= :this_start) AS this_count,
+            SUM(total) FILTER (WHERE day >= :prev_start AND day < :this_start) AS prev_total,
+            SUM(count) FILTER (WHERE day >= :prev_start AND day < :this_start) AS prev_count
+        FROM days
+    ),
+    category_totals AS (
+        SELECT c.name AS name,
+               SUM(d.total) FILTER (WHERE d.day >= :this_start) AS month_total,
+               SUM(d.total) FILTER (WHERE d.day >= :category_start) AS window_total,
+               SUM(d.count) FILTER (WHERE d.day >= :category_start) AS window_count
+        FROM days d
+        LEFT JOIN categories c ON c.id = d.category_id
+        GROUP BY c.name
+    ),
+    ranked AS (
+        SELECT name, window_total, window_count,
+               CASE WHEN month_total IS NULL THEN NULL
+                    ELSE ROW_NUMBER() OVER (ORDER BY month_total DESC NULLS LAST) END AS month_rank
+        FROM category_totals
+    )
+    SELECT 'category' AS kind, r.name AS name, NULL AS month,
+           r.window_total AS total, r.window_count AS count, r.month_rank AS month_rank,
+           t.this_total, t.this_count, t.prev_total, t.prev_count
+    FROM totals t
+    LEFT JOIN ranked r ON 1 = 1
+"""
+
+USER_TREND_SQL = """
+    UNION ALL
+    SELECT 'trend', NULL, m.month, m.total, m.count, NULL, NULL, NULL, NULL, NULL
+    FROM (
+        SELECT month, SUM(total) AS total, SUM(count) AS count
+        FROM spend_monthly
+        WHERE user_id = :user_id
+        GROUP BY month
+        ORDER BY month DESC
+        LIMIT :trend_months
+    ) m
+"""
+
+_DATE_PARAMS = ("window_start", "this_start", "prev_start", "category_start")
+
+
+def _month_start(year: Optional[int], month: Optional[int]) -> datetime:
+    """조회 월 1일 (없으면 이번 달)"""
+    if year and month:
+        return datetime(year, month, 1, 0, 0, 0)
+    return datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _category_start(months: int, year: Optional[int], month: Optional[int]) -> datetime:
+    """카테고리 분석 시작 시각 (조회 월 말 또는 현재로부터 30 * months일 전)"""
+    if year and month:
+        end_date = datetime(year, month, 1, 0, 0, 0)
+        if end_date.month == 12:
+            end_date = end_date.replace(year=end_date.year + 1, month=1)
+        else:
+            end_date = end_date.replace(month=end_date.month + 1)
+    else:
+        end_date = datetime.now()
+    return end_date - timedelta(days=30 * months)
+
+
+def _change_rate(current: float, previous: float) -> float:
+    """전월 대비 증감률 (%)"""
+    return ((current - previous) / previous * 100) if previous > 0 else (0.0 if current == 0 else 100.0)
+
+
+async def _query_user_dashboard(
+    db: AsyncSession,
+    user_id: int,
+    this_month_start: date,
+    category_start: date,
+    trend_months: int = 0
+) -> Tuple[DashboardSummary, List[CategoryBreakdown], List[MonthlyTrend]]:
+    """
+    요약/카테고리/월별 추이를 한 번의 쿼리로 조회 (trend_months=0이면 추이 제외)
+
+    Returns:
+        (요약, 카테고리 목록 (없으면 빈 목록), 월별 추이 (오래된 순))
+    """
+    prev_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
+    sql = USER_DASHBOARD_SQL + (USER_TREND_SQL if trend_months else "")
+    query = text(sql).bindparams(*(bindparam(name, type_=Date) for name in _DATE_PARAMS))
+    query = query.columns(month=Date)
+
+    params = {
+        "user_id": user_id,
+        "window_start": min(prev_month_start, category_start),
+        "this_start": this_month_start,
+        "prev_start": prev_month_start,
+        "category_start": category_start,
+    }
+    if trend_months:
+        params["trend_months"] = trend_months
+    rows = (await db.execute(query, params)).mappings().all()
+
+    category_rows = [row for row in rows if row["kind"] == "category"]
+    totals = category_rows[0]
+    total = float(totals["this_total"] or 0)
+    count = int(totals["this_count"] or 0)
+    prev_total = float(totals["prev_total"] or 0)
+    prev_count = int(totals["prev_count"] or 0)
+    top = next((row for row in category_rows if row["month_rank"] == 1), None)
+
+    summary = DashboardSummary(
+        total_spending=total,
+        average_transaction=total / count if count else 0,
+        transaction_count=count,
+        top_category=(top["name"] if top else None) or "없음",
+        month_over_month_change=round(_change_rate(total, prev_total), 1),
+        transaction_count_mom_change=round(_change_rate(count, prev_count), 1),
+        data_source="DB (AWS RDS)"
+    )
+
+    breakdown = sorted(
+        (row for row in category_rows if row["count"]),
+        key=lambda row: float(row["total"]), reverse=True
+    )
+    grand_total = sum(float(row["total"]) for row in breakdown) or 1
+    categories = [
+        CategoryBreakdown(
+            category=row["name"] or "기타",
+            total_amount=float(row["total"]),
+            transaction_count=int(row["count"]),
+            percentage=round((float(row["total"]) / grand_total) * 100, 1)
+        )
+        for row in breakdown
+    ]
+
+    trends = sorted(
+        (
+            MonthlyTrend(month=row["month"].strftime("%Y-%m"), total_amount=float(row["total"]), transaction_count=int(row["count"]))
+            for row in rows if row["kind"] == "trend"
+        ),
+        key=lambda trend: trend.month
+    )
+    return summary, categories, trends
+
+
 # ============================================================
 # 서비스 함수들 (비즈니스 로직)
 # ============================================================
@@ -109,80 +269,11 @@ async def get_user_summary(
     year: Optional[int] = None,
     month: Optional[int] = None
 ) -> DashboardSummary:
-    """특정 사용자의 대시보드 요약 통계"""
+    """특정 사용자의 대시보드 요약 통계 (이번 달/전월 합계와 최다 카테고리를 한 번의 쿼리로)"""
     try:
-        now = datetime.now()
-        
-        if year and month:
-            this_month_start = datetime(year, month, 1, 0, 0, 0)
-        else:
-            this_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # 이번 달 통계 (이상거래 제외)
-        query = select(
-            func.coalesce(func.sum(Transaction.amount), 0).label('total'),
-            func.coalesce(func.avg(Transaction.amount), 0).label('avg'),
-            func.count(Transaction.id).label('count')
-        ).where(
-            Transaction.transaction_time >= this_month_start,
-            Transaction.user_id == user_id,
-            Transaction.is_fraudulent == False  # 이상거래 제외
-        )
-        
-        result = await db.execute(query)
-        row = result.fetchone()
-        
-        total = float(row.total) if row.total else 0
-        avg = float(row.avg) if row.avg else 0
-        count = row.count or 0
-        
-        # 최다 카테고리
-        cat_query = text("""
-            SELECT c.name, SUM(t.amount) as cat_total
-            FROM transactions t
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE t.transaction_time >= :start_date 
-              AND t.user_id = :user_id
-              AND t.is_fraudulent = false
-            GROUP BY c.name
-            ORDER BY cat_total DESC
-            LIMIT 1
-        """)
-        cat_result = await db.execute(cat_query, {"start_date": this_month_start, "user_id": user_id})
-        cat_row = cat_result.fetchone()
-        top_category = cat_row[0] if cat_row else "없음"
-        
-        # 전월 대비 증감률
-        last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
-        last_month_end = this_month_start - timedelta(seconds=1)
-        
-        prev_query = select(
-            func.coalesce(func.sum(Transaction.amount), 0).label('prev_total'),
-            func.count(Transaction.id).label('prev_count')
-        ).where(
-            Transaction.transaction_time >= last_month_start,
-            Transaction.transaction_time <= last_month_end,
-            Transaction.user_id == user_id,
-            Transaction.is_fraudulent == False  # 이상거래 제외
-        )
-        
-        prev_result = await db.execute(prev_query)
-        prev_row = prev_result.fetchone()
-        prev_total = float(prev_row.prev_total) if prev_row.prev_total else 0
-        prev_count = prev_row.prev_count if prev_row.prev_count else 0
-        
-        mom_change = ((total - prev_total) / prev_total * 100) if prev_total > 0 else (0.0 if total == 0 else 100.0)
-        count_mom_change = ((count - prev_count) / prev_count * 100) if prev_count > 0 else (0.0 if count == 0 else 100.0)
-        
-        return DashboardSummary(
-            total_spending=total,
-            average_transaction=avg,
-            transaction_count=count,
-            top_category=top_category or "없음",
-            month_over_month_change=round(mom_change, 1),
-            transaction_count_mom_change=round(count_mom_change, 1),
-            data_source="DB (AWS RDS)"
-        )
+        this_month_start = _month_start(year, month).date()
+        summary, _, _ = await _query_user_dashboard(db, user_id, this_month_start, this_month_start)
+        return summary
         
     except Exception as e:
         logger.warning(f"get_user_summary 실패: {e}")
@@ -196,41 +287,20 @@ async def get_user_categories(
     year: Optional[int] = None,
     month: Optional[int] = None
 ) -> List[CategoryBreakdown]:
-    """특정 사용자의 카테고리별 소비 분석"""
+    """특정 사용자의 카테고리별 소비 분석 (시작일 포함, 일 단위)"""
     try:
-        if year and month:
-            end_date = datetime(year, month, 1, 0, 0, 0)
-            if end_date.month == 12:
-                end_date = end_date.replace(year=end_date.year + 1, month=1)
-            else:
-                end_date = end_date.replace(month=end_date.month + 1)
-        else:
-            end_date = datetime.now()
-        
-        start_date = end_date - timedelta(days=30 * months)
-        
-        query = text("""
-            SELECT c.name as category, SUM(t.amount) as total, COUNT(t.id) as count
-            FROM transactions t
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE t.transaction_time >= :start_date 
-              AND t.user_id = :user_id
-              AND t.is_fraudulent = false
-            GROUP BY c.name
-            ORDER BY total DESC
-        """)
+        start_date = _category_start(months, year, month)
         
-        result = await db.execute(query, {"start_date": start_date, "user_id": user_id})
-        rows = result.fetchall()
+        rows = await spend_by_category(db, start=start_date.date(), user_id=user_id)
         
-        grand_total = sum(float(row[1]) for row in rows) if rows else 1
+        grand_total = sum(row[1] for row in rows) if rows else 1
         
         categories = [
             CategoryBreakdown(
                 category=row[0] or "기타",
-                total_amount=float(row[1]),
+                total_amount=row[1],
                 transaction_count=row[2],
-                percentage=round((float(row[1]) / grand_total) * 100, 1)
+                percentage=round((row[1] / grand_total) * 100, 1)
             )
             for row in rows
         ]
@@ -249,23 +319,10 @@ async def get_user_trends(
 ) -> List[MonthlyTrend]:
     """특정 사용자의 월별 지출 추이"""
     try:
-        query = text("""
-            SELECT TO_CHAR(transaction_time, 'YYYY-MM') as month,
-                   SUM(amount) as total,
-                   COUNT(id) as count
-            FROM transactions
-            WHERE user_id = :user_id
-              AND is_fraudulent = false
-            GROUP BY TO_CHAR(transaction_time, 'YYYY-MM')
-            ORDER BY month DESC
-            LIMIT :limit
-        """)
-        
-        result = await db.execute(query, {"limit": months, "user_id": user_id})
-        rows = result.fetchall()
+        rows = await monthly_trend(db, months, user_id=user_id)
         
         trends = [
-            MonthlyTrend(month=row[0], total_amount=float(row[1]), transaction_count=row[2])
+            MonthlyTrend(month=row[0], total_amount=row[1], transaction_count=row[2])
             for row in rows
         ]
         
@@ -280,16 +337,19 @@ async def get_user_full_analysis(
     db: AsyncSession,
     user_id: int
 ) -> AnalysisResponse:
-    """특정 사용자의 전체 분석 데이터"""
+    """특정 사용자의 전체 분석 데이터 (요약/카테고리/월별 추이를 한 번의 쿼리로)"""
     try:
-        summary = await get_user_summary(db, user_id)
-        categories = await get_user_categories(db, user_id)
-        trends = await get_user_trends(db, user_id)
+        summary, categories, trends = await _query_user_dashboard(
+            db, user_id,
+            this_month_start=_month_start(None, None).date(),
+            category_start=_category_start(1, None, None).date(),
+            trend_months=6
+        )
         
         return AnalysisResponse(
             summary=summary,
-            category_breakdown=categories,
-            monthly_trend=trends,
+            category_breakdown=categories or get_mock_category_breakdown(),
+            monthly_trend=trends or get_mock_monthly_trend(),
             insights=get_mock_insights(),
             data_source="DB (AWS RDS)"
         )
@@ -322,58 +382,19 @@ async def get_admin_summary(
         else:
             this_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
-        summary_query = text("""
-            SELECT 
-                COALESCE(SUM(t.amount), 0) as total,
-                COALESCE(AVG(t.amount), 0) as avg,
-                COUNT(t.id) as count
-            FROM transactions t
-            JOIN users u ON t.user_id = u.id
-            WHERE u.is_superuser = false
-              AND t.transaction_time >= :start_date
-              AND t.is_fraudulent = false
-        """)
-        result = await db.execute(summary_query, {"start_date": this_month_start})
-        row = result.fetchone()
-        
-        total = float(row[0]) if row[0] else 0
-        avg = float(row[1]) if row[1] else 0
-        count = row[2] or 0
+        total, count = await spend_totals(db, start=this_month_start.date(), exclude_superusers=True)
+        avg = total / count if count else 0
         
         # 최다 카테고리
-        cat_query = text("""
-            SELECT c.name, SUM(t.amount) as cat_total
-            FROM transactions t
-            JOIN users u ON t.user_id = u.id
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE u.is_superuser = false
-              AND t.transaction_time >= :start_date
-              AND t.is_fraudulent = false
-            GROUP BY c.name
-            ORDER BY cat_total DESC
-            LIMIT 1
-        """)
-        cat_result = await db.execute(cat_query, {"start_date": this_month_start})
-        cat_row = cat_result.fetchone()
-        top_category = cat_row[0] if cat_row else "없음"
+        top = await spend_by_category(db, start=this_month_start.date(), exclude_superusers=True, limit=1)
+        top_category = top[0][0] if top else "없음"
         
         # 전월 대비 증감률
         last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
-        last_month_end = this_month_start - timedelta(seconds=1)
         
-        prev_query = text("""
-            SELECT COALESCE(SUM(t.amount), 0) as prev_total, COUNT(t.id) as prev_count
-            FROM transactions t
-            JOIN users u ON t.user_id = u.id
-            WHERE u.is_superuser = false
-              AND t.transaction_time >= :start_date
-              AND t.transaction_time <= :end_date
-              AND t.is_fraudulent = false
-        """)
-        prev_result = await db.execute(prev_query, {"start_date": last_month_start, "end_date": last_month_end})
-        prev_row = prev_result.fetchone()
-        prev_total = float(prev_row[0]) if prev_row[0] else 0
-        prev_count = prev_row[1] if prev_row[1] else 0
+        prev_total, prev_count = await spend_totals(
+            db, start=last_month_start.date(), end=this_month_start.date(), exclude_superusers=True
+        )
         
         mom_change = ((total - prev_total) / prev_total * 100) if prev_total > 0 else (0.0 if total == 0 else 100.0)
         count_mom_change = ((count - prev_count) / prev_count * 100) if prev_count > 0 else (0.0 if count == 0 else 100.0)
@@ -407,28 +428,16 @@ async def get_admin_categories(
         else:
             this_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
-        query = text("""
-            SELECT c.name as category, SUM(t.amount) as total, COUNT(t.id) as count
-            FROM transactions t
-            JOIN users u ON t.user_id = u.id
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE u.is_superuser = false
-              AND t.transaction_time >= :start_date
-              AND t.is_fraudulent = false
-            GROUP BY c.name
-            ORDER BY total DESC
-        """)
-        result = await db.execute(query, {"start_date": this_month_start})
-        rows = result.fetchall()
+        rows = await spend_by_category(db, start=this_month_start.date(), exclude_superusers=True)
         
-        grand_total = sum(float(r[1]) for r in rows) if rows else 1
+        grand_total = sum(r[1] for r in rows) if rows else 1
         
         return [
             CategoryBreakdown(
                 category=r[0] or "기타",
-                total_amount=float(r[1]),
+                total_amount=r[1],
                 transaction_count=r[2],
-                percentage=round((float(r[1]) / grand_total) * 100, 1)
+                percentage=round((r[1] / grand_total) * 100, 1)
             )
             for r in rows
         ] or get_mock_category_breakdown()
@@ -441,23 +450,10 @@ async def get_admin_categories(
 async def get_admin_trends(db: AsyncSession, months: int = 6) -> List[MonthlyTrend]:
     """관리자용: 전체 사용자(관리자 제외) 월별 추이"""
     try:
-        query = text("""
-            SELECT TO_CHAR(t.transaction_time, 'YYYY-MM') as month,
-                   SUM(t.amount) as total,
-                   COUNT(t.id) as count
-            FROM transactions t
-            JOIN users u ON t.user_id = u.id
-            WHERE u.is_superuser = false
-              AND t.is_fraudulent = false
-            GROUP BY TO_CHAR(t.transaction_time, 'YYYY-MM')
-            ORDER BY month DESC
-            LIMIT :limit
-        """)
-        result = await db.execute(query, {"limit": months})
-        rows = result.fetchall()
+        rows = await monthly_trend(db, months, exclude_superusers=True)
         
         return [
-            MonthlyTrend(month=r[0], total_amount=float(r[1]), transaction_count=r[2])
+            MonthlyTrend(month=r[0], total_amount=r[1], transaction_count=r[2])
             for r in reversed(rows)
         ] or get_mock_monthly_trend()
         
@@ -466,12 +462,95 @@ async def get_admin_trends(db: AsyncSession, months: int = 6) -> List[MonthlyTre
         return get_mock_monthly_trend()
 
 
+async def get_admin_snapshot_analysis(
+    db: AsyncSession,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    trend_months: int = 6
+) -> Optional[AnalysisResponse]:
+    """
+    관리자용 전체 분석 데이터 (admin_spend_snapshot 기준, 실시간 집계와 같은 계산)
+
+    스냅샷이 아직 없으면 None
+    """
+    snapshot = await read_admin_snapshot(db)
+    if snapshot is None:
+        return None
+    data_as_of, rows = snapshot
+
+    this_month_start = _month_start(year, month).date()
+    last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
+
+    total = count = prev_total = prev_count = 0
+    by_category = {}
+    by_month = {}
+    for row_month, name, amount, cnt in rows:
+        if row_month >= this_month_start:
+            total += amount
+            count += cnt
+            entry = by_category.setdefault(name, [0, 0])
+            entry[0] += amount
+            entry[1] += cnt
+        elif row_month >= last_month_start:
+            prev_total += amount
+            prev_count += cnt
+        entry = by_month.setdefault(row_month, [0, 0])
+        entry[0] += amount
+        entry[1] += cnt
+
+    total, prev_total = float(total), float(prev_total)
+    categories = sorted(
+        ((name, float(amount), cnt) for name, (amount, cnt) in by_category.items()),
+        key=lambda r: r[1], reverse=True
+    )
+    grand_total = sum(r[1] for r in categories) or 1
+
+    summary = DashboardSummary(
+        total_spending=total,
+        average_transaction=total / count if count else 0,
+        transaction_count=count,
+        top_category=(categories[0][0] if categories else None) or "없음",
+        month_over_month_change=round(_change_rate(total, prev_total), 1),
+        transaction_count_mom_change=round(_change_rate(count, prev_count), 1),
+        data_source="DB (Admin Snapshot)"
+    )
+    trends = [
+        MonthlyTrend(month=m.strftime("%Y-%m"), total_amount=float(amount), transaction_count=cnt)
+        for m, (amount, cnt) in sorted(by_month.items())[-trend_months:]
+    ]
+    return AnalysisResponse(
+        summary=summary,
+        category_breakdown=[
+            CategoryBreakdown(
+                category=name or "기타",
+                total_amount=amount,
+                transaction_count=cnt,
+                percentage=round((amount / grand_total) * 100, 1)
+            )
+            for name, amount, cnt in categories
+        ] or get_mock_category_breakdown(),
+        monthly_trend=trends or get_mock_monthly_trend(),
+        insights=get_mock_insights(),
+        data_source="DB (Admin Snapshot)",
+        data_as_of=data_as_of
+    )
+
+
 async def get_admin_full_analysis(
     db: AsyncSession,
     year: Optional[int] = None,
     month: Optional[int] = None
 ) -> AnalysisResponse:
-    """관리자용 전체 분석 데이터"""
+    """관리자용 전체 분석 데이터 (스냅샷 우선, 없으면 실시간 집계)"""
+    if ADMIN_SNAPSHOT_ENABLED:
+        try:
+            analysis = await get_admin_snapshot_analysis(db, year, month)
+            if analysis is not None:
+                return analysis
+        except Exception as e:
+            logger.warning(f"관리자 분석 스냅샷 조회 실패, 실시간 집계 사용: {e}")
+            await db.rollback()
+
     try:
         summary = await get_admin_summary(db, year, month)
         categories = await get_admin_categories(db, year, month)
@@ -12,6 +12,9 @@ import logging
 
 from app.db.model.transaction import Anomaly, Transaction
 from app.db.model.user import User
+from app.services.feature_store import invalidate_user_stats
+from app.services.spend_rollup import remove_transactions
+from app.services.dashboard_cache import invalidate_dashboard
 
 logger = logging.getLogger(__name__)
 
@@ -76,11 +79,18 @@ async def report_anomaly(
     transaction = tx_result.scalar_one_or_none()
     
     if transaction:
+        # 소비 집계에서 차감 (플래그 변경 전, 이미 표시된 거래는 무시됨)
+        await remove_transactions(db, [transaction.id])
         transaction.is_fraudulent = True
+        # 사용자 피처 저장소에서 제외되도록 통계 무효화 (다음 조회 시 재집계)
+        await invalidate_user_stats(db, transaction.user_id)
         logger.info(f"Transaction {transaction.id} marked as fraudulent (User Reported)")
     
     await db.commit()
     await db.refresh(anomaly)
+    if transaction:
+        # 분석 대시보드 캐시 무효화 (집계가 바뀜)
+        await invalidate_dashboard(anomaly.user_id)
     
     return {
         "status": "reported",
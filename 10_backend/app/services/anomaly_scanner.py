@@ -0,0 +1,715 @@
+"""
+Incremental Anomaly Scanner
+새로 들어온 거래만 점수화하여 anomalies 테이블에 저장합니다.
+
+- anomaly_scan_state.last_transaction_id (high-water mark) 이후의 거래만 검사
+- 실시간 점수화 등으로 이미 점수화된 거래(fraud_scored_at)와 이상거래로 저장된 거래는 건너뜀
+- HWM 아래에서 비어 있던 id(늦게 커밋되는 트랜잭션)는 pending_gaps에 두고 다음 배치마다 다시 확인
+- 통계 규칙(Heuristics) → ML 모델 순으로 판정 (기존 GET /anomalies 로직과 동일)
+- 스케줄러가 주기적으로 실행하며, GET /anomalies는 저장된 결과만 조회
+- 여러 워커가 동시에 실행해도 상태 행 잠금(FOR UPDATE SKIP LOCKED)으로 한 곳만 진행
+
+사용 예:
+    summary = await scan_new_transactions(db)
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Tuple
+import asyncio
+import json
+import os
+import logging
+
+from sqlalchemy import select, update, func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.db.model.transaction import Transaction, Anomaly, AnomalyScanState
+from app.services.fraud_preprocessing import FraudPreprocessor, RollingFraudState
+from app.services.fraud_state import load_fraud_states, advance_fraud_states, save_fraud_states
+from app.services.model_registry import FRAUD_MODEL, get_active_model
+from app.services.inference_executor import InferenceQueueFullError, run_inference
+
+logger = logging.getLogger(__name__)
+
+# 설정 (환경 변수로 변경 가능)
+SCAN_STATE_NAME = "transactions"
+SCAN_BATCH_SIZE = int(os.getenv("ANOMALY_SCAN_BATCH_SIZE", 500))
+SCAN_MAX_BATCHES = int(os.getenv("ANOMALY_SCAN_MAX_BATCHES", 20))      # 1회 실행당 최대 배치 수
+SCAN_LOOKBACK_DAYS = int(os.getenv("ANOMALY_SCAN_LOOKBACK_DAYS", 60))  # 이보다 오래된 거래는 점수화하지 않음
+# 커밋 순서가 id 순서와 다를 수 있으므로 생성 후 이 시간이 지난 거래만 검사 (HWM 누락 방지)
+SCAN_SETTLE_SECONDS = int(os.getenv("ANOMALY_SCAN_SETTLE_SECONDS", 5))
+# HWM 아래 빈 id 구간을 다시 확인하는 기간 (이후에는 롤백/시퀀스 건너뜀으로 보고 버림)
+SCAN_GAP_TIMEOUT_SECONDS = int(os.getenv("ANOMALY_SCAN_GAP_TIMEOUT_SECONDS", 3600))
+SCAN_MAX_GAPS = 1000  # 보관하는 빈 구간 최대 개수 (넘으면 오래된 구간부터 버림)
+
+CATEGORY_HISTORY_DEPTH = 31  # 카테고리 평균에 쓰는 최근 30건 + 자기 자신(Leave-One-Out)
+BURST_WINDOW = timedelta(minutes=10)  # 이 시간 이내(양방향)의 같은 사용자 거래 수 = burst_count
+
+fraud_preprocessor = FraudPreprocessor()
+
+# Category absolute cutoffs for cold start (KRW)
+CATEGORY_CUTOFFS = {
+    "식비": 5_000_000,
+    "쇼핑": 9_990_000,
+    "공과금": 5_000_000,
+    "여가": 9_990_000,
+    "문화": 9_990_000,
+    "교통": 1_000_000,
+    "의료": 9_990_000,
+    "교육": 5_000_000,
+    "기타": 9_990_000,
+}
+
+# Default cutoff if category not matched
+DEFAULT_CUTOFF = 9_990_000
+
+# 같은 프로세스 안에서 스캔 중복 실행 방지 (스케줄러 + 관리자 수동 실행)
+_scan_lock = asyncio.Lock()
+
+
+# ============================================================
+# Feature Calculation & Heuristics
+# ============================================================
+
+def calculate_features(tx: Transaction, avg_amt: float, burst_count: int) -> dict:
+    """
+    ML 모델 및 히리스틱에 사용할 피쳐 계산
+
+    burst_count는 compute_burst_counts로 배치 전체에 대해 미리 계산한 값
+    """
+    features = {}
+
+    # 1. Amount Z-Score-like (Simple Ratio)
+    # Fix TypeError: Decimal vs Float
+    amt_val = float(tx.amount)
+    # If avg_amt is 0 (first time in category), ratio is 1.0 (Normal)
+    features['amt_ratio'] = (amt_val / avg_amt) if avg_amt > 0 else 1.0
+
+    # 2. Time Features
+    hour = tx.transaction_time.hour
+    features['is_night'] = 1 if 0 <= hour < 5 else 0
+
+    # 3. Burst Detection (Same user in short time)
+    features['burst_count'] = burst_count
+
+    # 4. Keyword Checks
+    merchant = tx.merchant_name or ""
+    features['is_gangnam'] = 1 if "강남" in merchant else 0
+    features['is_foreign'] = 1 if tx.currency != 'KRW' else 0
+
+    return features
+
+
+def _time_key(dt: datetime) -> int:
+    """정렬/비교용 정수 시각 (마이크로초, 부동소수 오차 없음)"""
+    epoch = datetime(1970, 1, 1, tzinfo=dt.tzinfo and timezone.utc)
+    return (dt - epoch) // timedelta(microseconds=1)
+
+
+def compute_burst_counts(txs: List[Transaction], recent_by_user: Dict[int, list]) -> Dict[int, int]:
+    """
+    거래별 burst_count (같은 사용자의 다른 거래 중 시각 차이가 BURST_WINDOW 미만인 건수)
+
+    사용자별 거래 시각을 한 번 정렬한 뒤 이분 탐색으로 구간 개수를 세므로
+    O((n + m) log n) (n: 이력 거래 수, m: 대상 거래 수)
+    """
+    window = BURST_WINDOW // timedelta(microseconds=1)
+    timelines: Dict[int, Tuple[List[int], set]] = {}
+    counts: Dict[int, int] = {}
+
+    for tx in txs:
+        timeline = timelines.get(tx.user_id)
+        if timeline is None:
+            history = recent_by_user.get(tx.user_id, [])
+            timeline = (sorted(_time_key(t.transaction_time) for t in history), {t.id for t in history})
+            timelines[tx.user_id] = timeline
+        times, ids = timeline
+
+        t = _time_key(tx.transaction_time)
+        # 열린 구간 (t - window, t + window) 안의 거래 수, 자기 자신은 제외
+        count = bisect_left(times, t + window) - bisect_right(times, t - window)
+        if tx.id in ids:
+            count -= 1
+        counts[tx.id] = count
+    return counts
+
+
+def apply_heuristics(tx: Transaction, features: dict) -> tuple[Optional[str], Optional[str]]:
+    """
+    Apply statistical rules.
+    Only one rule: Average Amount Deviation (Ratio)
+    """
+    reasons = []
+
+    # Single Rule: Ratio Check (Leave-One-Out Average)
+    # Threshold: 100x (User requested refinement)
+    if features['amt_ratio'] >= 100.0:
+        return ("위험", f"평균액의 {features['amt_ratio']:.1f}배")
+
+    # Cold-start absolute cutoff by category
+    cat_name = (tx.category.name if tx.category else tx.merchant_name) or ""
+    cutoff = DEFAULT_CUTOFF
+    for key, val in CATEGORY_CUTOFFS.items():
+        if key in cat_name:
+            cutoff = val
+            break
+    if float(tx.amount) >= cutoff:
+        return ("위험", f"카테고리 컷오프 초과 ({cutoff:,.0f}원)")
+
+    return None, None
+
+
+def detect_fraud_with_model(tx: Transaction, history: List[Transaction]) -> tuple[str, str]:
+    """
+    ML 모델 기반 이상 탐지
+    Returns: (risk_level, reason)
+    """
+    # 요청 시점의 활성 버전을 끝까지 사용 (도중 교체되어도 안전)
+    fraud_model = get_active_model(FRAUD_MODEL)
+    if fraud_model is None:
+        return ("정상", "정상")
+
+    try:
+        # Preprocess (fast path: float32 vector in booster feature order, no DataFrame)
+        if fraud_model.fast is not None:
+            df_features = fraud_preprocessor.transaction_vector(tx, history, fraud_model.fast.feature_names)
+        else:
+            df_features = fraud_preprocessor.preprocess_transaction(tx, history)
+
+        # Ensure columns match model expectation (simple check/padding if needed)
+        # XGBoost handles missing columns often, but order matters if no feature names.
+        # Our preprocessor ensures names match metadata.
+
+        # Predict Probability
+        # Assuming model supports predict_proba
+        if hasattr(fraud_model.model, "predict_proba"):
+            probs = fraud_model.predict_proba(df_features)
+            # Binary classification: [prob_normal, prob_fraud]
+            return _risk_from_probability(probs[0][1])
+
+        else:
+            # Fallback to hard prediction
+            pred = fraud_model.predict(df_features)
+            if pred[0] == 1:
+                return ("위험", "AI 모델 탐지")
+
+    except Exception as e:
+        logger.error(f"Error in AI fraud detection: {e}")
+        # Fail safe
+        return ("정상", "정상")
+
+    return ("정상", "정상")
+
+
+def detect_fraud_batch(
+    txs: List[Transaction],
+    history_by_user: Dict[int, list],
+    fraud_states: Optional[Dict[int, RollingFraudState]] = None
+) -> List[tuple[str, str]]:
+    """
+    ML 모델 기반 이상 탐지 (배치)
+    피처 행렬 하나를 만들어 predict_proba를 한 번만 호출합니다.
+
+    fraud_states: {거래 id: 직전 윈도 상태} (없으면 history_by_user에서 계산)
+
+    Returns: 거래 순서대로 [(risk_level, reason), ...]
+    """
+    normal = [("정상", "정상")] * len(txs)
+    fraud_model = get_active_model(FRAUD_MODEL)
+    if fraud_model is None or not txs:
+        return normal
+
+    try:
+        df_features = fraud_preprocessor.preprocess_batch(txs, history_by_user, fraud_states)
+
+        if hasattr(fraud_model.model, "predict_proba"):
+            probs = fraud_model.predict_proba(df_features)
+            return [_risk_from_probability(prob) for prob in probs[:, 1]]
+
+        preds = fraud_model.predict(df_features)
+        return [("위험", "AI 모델 탐지") if pred == 1 else ("정상", "정상") for pred in preds]
+
+    except Exception as e:
+        logger.error(f"Error in AI fraud detection (batch of {len(txs)}): {e}")
+        # Fail safe
+        return normal
+
+
+def _risk_from_probability(fraud_prob: float) -> tuple[str, str]:
+    """이상거래 확률 → (risk_level, reason)"""
+    # Threshold from metadata is 0.955, but that might be conservative/aggressive.
+    # strict (high precision) vs loose (high recall).
+    # Metadata says best_threshold 0.955 for F1 0.753.
+    threshold = 0.955
+
+    if fraud_prob >= threshold:
+        return ("위험", f"AI 모델 탐지 (확률 {(fraud_prob*100):.1f}%)")
+    elif fraud_prob >= 0.8: # Lower threshold for warning
+        return ("주의", f"AI 모델 의심 (확률 {(fraud_prob*100):.1f}%)")
+    return ("정상", "정상")
+
+
+def _category_average(tx: Transaction, history_list: List[Tuple[float, int]]) -> float:
+    """같은 카테고리 최근 30건 평균 (Leave-One-Out, 기록이 없으면 자기 자신 금액)"""
+    # Filter out the current transaction (Leave-One-Out)
+    valid_history = [amt for amt, tid in history_list if tid != tx.id]
+
+    # Take top 30 (Most recent)
+    recent_30_amts = valid_history[:30]
+
+    if not recent_30_amts:
+        # No history other than self -> Cold Start
+        # Average is self amount (Ratio 1.0)
+        avg_amt = float(tx.amount) if tx.amount else 1.0
+    else:
+        avg_amt = sum(recent_30_amts) / len(recent_30_amts)
+
+    # Avoid division by zero
+    if avg_amt == 0: avg_amt = 1.0
+    return avg_amt
+
+
+def score_transactions(
+    txs: List[Transaction],
+    user_cat_history: Dict[int, Dict[int, List[Tuple[float, int]]]],
+    recent_by_user: Dict[int, list],
+    fraud_states: Optional[Dict[int, RollingFraudState]] = None
+) -> List[Tuple[Transaction, str, str]]:
+    """
+    거래 목록 점수화 (워커 스레드에서 실행되는 동기 함수)
+
+    Returns:
+        [(거래, 위험도, 사유)] - 이상으로 판정된 거래만
+    """
+    verdicts = {}
+    burst_counts = compute_burst_counts(txs, recent_by_user)
+    for tx in txs:
+        # 1. Heuristic Calculation (Recent 30 Avg, Leave-One-Out)
+        history_list = user_cat_history.get(tx.user_id, {}).get(tx.category_id, [])
+        avg_amt = _category_average(tx, history_list)
+
+        features = calculate_features(tx, avg_amt, burst_counts[tx.id])
+        verdicts[tx.id] = apply_heuristics(tx, features)
+
+    # 2. AI Model Calculation (heuristic이 잡지 못한 거래만, 한 번의 모델 호출)
+    model_candidates = [tx for tx in txs if verdicts[tx.id][0] in (None, "정상")]
+    for tx, verdict in zip(model_candidates, detect_fraud_batch(model_candidates, recent_by_user, fraud_states)):
+        verdicts[tx.id] = verdict
+
+    flagged = []
+    for tx in txs:
+        risk, reason = verdicts[tx.id]
+        if risk != "정상" and risk is not None:
+            flagged.append((tx, risk, reason))
+    return flagged
+
+
+# ============================================================
+# 스캔 대상 / 이력 조회
+# ============================================================
+
+def _scan_rows_query(*conditions):
+    """스캔 대상 (id, transaction_time, user_id, amount) 조회 (생성 후 SCAN_SETTLE_SECONDS가 지난 거래, id 순)"""
+    query = (
+        select(Transaction.id, Transaction.transaction_time, Transaction.user_id, Transaction.amount)
+        .where(*conditions)
+        .order_by(Transaction.id)
+    )
+    if SCAN_SETTLE_SECONDS > 0:
+        settled_before = datetime.now(timezone.utc) - timedelta(seconds=SCAN_SETTLE_SECONDS)
+        query = query.where(Transaction.created_at <= settled_before)
+    return query
+
+
+async def _fetch_new_rows(db: AsyncSession, after_id: int, limit: int) -> List[tuple]:
+    """high-water mark 이후 거래 목록 (id 순)"""
+    result = await db.execute(_scan_rows_query(Transaction.id > after_id).limit(limit))
+    return result.all()
+
+
+async def _fetch_gap_rows(db: AsyncSession, gaps: List[list], limit: int) -> List[tuple]:
+    """HWM 아래 빈 구간에 뒤늦게 커밋된 거래 목록 (id 순)"""
+    if not gaps:
+        return []
+    in_gaps = or_(*[Transaction.id.between(lo, hi) for lo, hi, _ in gaps])
+    result = await db.execute(_scan_rows_query(in_gaps).limit(limit))
+    return result.all()
+
+
+# ============================================================
+# HWM 아래 빈 id 구간 (늦게 커밋되는 트랜잭션)
+# ============================================================
+
+def _load_gaps(state: AnomalyScanState, now: float) -> List[list]:
+    """저장된 빈 구간 [[시작 id, 끝 id, 발견 시각], ...] 중 만료되지 않은 것"""
+    gaps = json.loads(state.pending_gaps) if state.pending_gaps else []
+    return [gap for gap in gaps if now - gap[2] < SCAN_GAP_TIMEOUT_SECONDS]
+
+
+def _dump_gaps(gaps: List[list]) -> Optional[str]:
+    return json.dumps(gaps[-SCAN_MAX_GAPS:]) if gaps else None
+
+
+def _remove_found_ids(gaps: List[list], found_ids: List[int]) -> List[list]:
+    """찾은 id를 빈 구간에서 제외 (구간을 나눔)"""
+    found = sorted(found_ids)
+    remaining = []
+    for lo, hi, seen in gaps:
+        start = lo
+        for tx_id in found[bisect_left(found, lo):bisect_right(found, hi)]:
+            if tx_id > start:
+                remaining.append([start, tx_id - 1, seen])
+            start = tx_id + 1
+        if start <= hi:
+            remaining.append([start, hi, seen])
+    return remaining
+
+
+def _new_gaps(after_id: int, rows: List[tuple], now: float) -> List[list]:
+    """(after_id, 마지막 행 id] 사이에서 조회되지 않은 id 구간"""
+    gaps = []
+    prev = after_id
+    for row in rows:
+        if row.id > prev + 1:
+            gaps.append([prev + 1, row.id - 1, now])
+        prev = row.id
+    return gaps
+
+
+def _supports_window_query(db: AsyncSession) -> bool:
+    """카테고리 이력을 DB 윈도 함수로 잘라 가져올지 여부 (PostgreSQL만, SQLite 테스트는 Python 경로)"""
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def _load_category_history(
+    db: AsyncSession,
+    user_ids: List[int],
+    category_ids: Optional[List[int]] = None
+) -> Dict[int, Dict[int, List[Tuple[float, int]]]]:
+    """
+    사용자별·카테고리별 최근 거래 금액 {user_id: {category_id: [(amount, id), ...]}} (최신순)
+
+    그룹별 최근 CATEGORY_HISTORY_DEPTH건만 사용하므로, PostgreSQL에서는
+    ROW_NUMBER() OVER (PARTITION BY user_id, category_id ...)로 DB에서 잘라서 가져옴
+    (ix_transactions_user_category_time 인덱스 사용)
+
+    Args:
+        category_ids: 주어지면 해당 카테고리 이력만 조회 (실시간 점수화처럼 대상이 적을 때)
+    """
+    user_cat_history: Dict[int, Dict[int, List[Tuple[float, int]]]] = {}
+    conditions = [Transaction.user_id.in_(user_ids)]
+    if category_ids is not None:
+        conditions.append(Transaction.category_id.in_(category_ids))
+
+    if _supports_window_query(db):
+        ranked = (
+            select(
+                Transaction.user_id,
+                Transaction.category_id,
+                Transaction.amount,
+                Transaction.id,
+                func.row_number().over(
+                    partition_by=(Transaction.user_id, Transaction.category_id),
+                    order_by=(Transaction.transaction_time.desc(), Transaction.id.desc())
+                ).label("rn")
+            )
+            .where(*conditions)
+            .subquery()
+        )
+        result = await db.execute(
+            select(ranked.c.user_id, ranked.c.category_id, ranked.c.amount, ranked.c.id)
+            .where(ranked.c.rn <= CATEGORY_HISTORY_DEPTH)
+            .order_by(ranked.c.user_id, ranked.c.category_id, ranked.c.rn)
+        )
+        for uid, cat_id, amt, tx_id in result.all():
+            user_cat_history.setdefault(uid, {}).setdefault(cat_id, []).append((float(amt), int(tx_id)))
+        return user_cat_history
+
+    # Python fallback: 전체 이력을 최신순으로 읽어 그룹별 상위 N건만 보관
+    history_query = (
+        select(
+            Transaction.user_id,
+            Transaction.category_id,
+            Transaction.amount,
+            Transaction.id,
+            Transaction.transaction_time
+        )
+        .where(*conditions)
+        .order_by(Transaction.transaction_time.desc(), Transaction.id.desc())
+    )
+
+    history_res = await db.execute(history_query)
+    rows = history_res.fetchall()
+
+    for uid, cat_id, amt, tx_id, tx_time in rows:
+        if uid not in user_cat_history:
+            user_cat_history[uid] = {}
+        if cat_id not in user_cat_history[uid]:
+            user_cat_history[uid][cat_id] = []
+
+        if len(user_cat_history[uid][cat_id]) < CATEGORY_HISTORY_DEPTH:
+            user_cat_history[uid][cat_id].append((float(amt), int(tx_id)))
+    return user_cat_history
+
+
+async def _load_recent_history(db: AsyncSession, user_ids: List[int], since: datetime) -> Dict[int, list]:
+    """사용자별 조회 기간 내 거래 (버스트 탐지 / 모델 입력용, 최신순)"""
+    result = await db.execute(
+        select(Transaction.id, Transaction.user_id, Transaction.amount, Transaction.transaction_time)
+        .where(Transaction.user_id.in_(user_ids))
+        .where(Transaction.transaction_time >= since)
+        .order_by(Transaction.transaction_time.desc())
+    )
+    recent_by_user: Dict[int, list] = defaultdict(list)
+    for row in result.all():
+        recent_by_user[row.user_id].append(row)
+    return recent_by_user
+
+
+async def exclude_scored(db: AsyncSession, tx_ids: List[int]) -> List[int]:
+    """이미 점수화된 거래(fraud_scored_at)와 anomalies 테이블에 있는 거래를 뺀 id 목록 (순서 유지)"""
+    if not tx_ids:
+        return []
+    existing = await db.execute(
+        select(Transaction.id).where(
+            Transaction.id.in_(tx_ids),
+            or_(
+                Transaction.fraud_scored_at.isnot(None),
+                Transaction.id.in_(select(Anomaly.transaction_id).where(Anomaly.transaction_id.in_(tx_ids)))
+            )
+        )
+    )
+    already_scored = set(existing.scalars().all())
+    return [tx_id for tx_id in tx_ids if tx_id not in already_scored]
+
+
+async def mark_scored(db: AsyncSession, tx_ids: List[int]) -> None:
+    """점수화한 거래 표시 (다른 경로가 다시 점수화하지 않도록, 커밋은 호출자 책임)"""
+    if not tx_ids:
+        return
+    await db.execute(
+        update(Transaction)
+        .where(Transaction.id.in_(tx_ids))
+        .values(fraud_scored_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def load_transactions(db: AsyncSession, tx_ids: List[int]) -> List[Transaction]:
+    """점수화 대상 거래 (카테고리 포함, id 순)"""
+    result = await db.execute(
+        select(Transaction)
+        .where(Transaction.id.in_(tx_ids))
+        .options(selectinload(Transaction.category))
+        .order_by(Transaction.id)
+    )
+    return result.scalars().all()
+
+
+# ============================================================
+# 점수화 결과 기록 (스캐너 / 실시간 점수화 공용)
+# ============================================================
+
+def build_anomaly(tx, risk: str, reason: Optional[str]) -> Anomaly:
+    """판정 결과 → Anomaly 행 (사유는 컬럼 길이에 맞춰 자름)"""
+    return Anomaly(
+        user_id=tx.user_id,
+        transaction_id=tx.id,
+        reason=reason[:255] if reason else "System Detected",
+        severity=risk, # Use risk as severity
+        is_resolved=False, # New detections are pending
+        created_at=datetime.utcnow()
+    )
+
+
+async def score_and_record(
+    db: AsyncSession,
+    txs: List[Transaction],
+    since: datetime,
+    snapshots: Optional[Dict[int, RollingFraudState]] = None
+) -> List[Tuple[Transaction, str, str]]:
+    """
+    거래 목록을 점수화하고 이상 판정 건을 세션에 추가 (커밋은 호출자 책임)
+
+    Raises:
+        InferenceQueueFullError: 추론 대기열 포화
+    """
+    if not txs:
+        return []
+    user_ids = list({tx.user_id for tx in txs})
+    user_cat_history = await _load_category_history(db, user_ids)
+    recent_by_user = await _load_recent_history(db, user_ids, since)
+    flagged = await run_inference(score_transactions, txs, user_cat_history, recent_by_user, snapshots)
+
+    for tx, risk, reason in flagged:
+        db.add(build_anomaly(tx, risk, reason))
+    return flagged
+
+
+# ============================================================
+# 스캔 상태 (high-water mark)
+# ============================================================
+
+async def _lock_scan_state(db: AsyncSession) -> Optional[AnomalyScanState]:
+    """
+    스캔 상태 행을 잠그고 반환 (다른 워커가 스캔 중이면 None)
+    """
+    result = await db.execute(
+        select(AnomalyScanState)
+        .where(AnomalyScanState.name == SCAN_STATE_NAME)
+        .with_for_update(skip_locked=True)
+        .execution_options(populate_existing=True)
+    )
+    state = result.scalar_one_or_none()
+    if state is not None:
+        return state
+
+    exists = await db.scalar(select(AnomalyScanState.name).where(AnomalyScanState.name == SCAN_STATE_NAME))
+    if exists:
+        return None
+
+    state = AnomalyScanState(name=SCAN_STATE_NAME, last_transaction_id=0, scanned_count=0, flagged_count=0)
+    db.add(state)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # 다른 워커가 먼저 생성
+        await db.rollback()
+        return None
+    return state
+
+
+async def get_scan_status(db: AsyncSession) -> Dict[str, Any]:
+    """스캔 진행 상태와 아직 검사하지 않은 거래 수"""
+    state = await db.scalar(select(AnomalyScanState).where(AnomalyScanState.name == SCAN_STATE_NAME))
+    last_id = state.last_transaction_id if state else 0
+    pending = await db.scalar(select(func.count(Transaction.id)).where(Transaction.id > last_id))
+    gaps = _load_gaps(state, datetime.now(timezone.utc).timestamp()) if state else []
+    return {
+        "last_transaction_id": last_id,
+        "scanned_count": state.scanned_count if state else 0,
+        "flagged_count": state.flagged_count if state else 0,
+        "updated_at": state.updated_at.isoformat() if state and state.updated_at else None,
+        "pending_transactions": pending or 0,
+        "pending_gap_ids": sum(hi - lo + 1 for lo, hi, _ in gaps),
+        "running": _scan_lock.locked(),
+    }
+
+
+# ============================================================
+# 스캐너
+# ============================================================
+
+async def _scan_batch(db: AsyncSession, state: AnomalyScanState, batch_size: int) -> Dict[str, int]:
+    """
+    high-water mark 이후 거래 한 배치 + HWM 아래 빈 구간에 뒤늦게 커밋된 거래를 점수화하고
+    상태를 전진 (커밋은 호출자가 수행)
+
+    id는 커밋 순서와 다를 수 있어, HWM을 넘길 때 조회되지 않은 id(아직 커밋 전이거나 settle 전)는
+    pending_gaps에 기록해 두고 SCAN_GAP_TIMEOUT_SECONDS 동안 다시 확인합니다.
+
+    Raises:
+        InferenceQueueFullError: 추론 대기열 포화 (상태를 전진하지 않음)
+    """
+    now = datetime.now(timezone.utc).timestamp()
+    gaps = _load_gaps(state, now)
+    late_rows = await _fetch_gap_rows(db, gaps, batch_size)
+    new_rows = await _fetch_new_rows(db, state.last_transaction_id, batch_size)
+    if not new_rows and not late_rows:
+        state.pending_gaps = _dump_gaps(gaps)  # 만료된 구간 정리
+        return {"fetched": 0, "scanned": 0, "flagged": 0}
+
+    since = datetime.now() - timedelta(days=SCAN_LOOKBACK_DAYS)
+    candidate_ids = [
+        tx_id for tx_id, tx_time, _, _ in [*late_rows, *new_rows]
+        if tx_time is not None and tx_time.replace(tzinfo=None) >= since
+    ]
+
+    # 실시간 점수화/대기열이 이미 점수화한 거래와 이상거래로 저장된 거래(사용자 신고 등)는 다시 판정하지 않음
+    candidate_ids = await exclude_scored(db, candidate_ids)
+
+    # 이상거래 모델 윈도 상태: 배치의 모든 거래를 id 순으로 반영하고, 점수화 대상은 직전 상태를 보관
+    # (늦게 커밋된 거래는 윈도가 이미 지나갔으므로 반영하지 않고, 점수화 시 이력으로 계산)
+    fraud_states = {}
+    snapshots = {}
+    if new_rows:
+        fraud_states = await load_fraud_states(
+            db, [row.user_id for row in new_rows], up_to_id=state.last_transaction_id
+        )
+        snapshots = advance_fraud_states(fraud_states, new_rows, set(candidate_ids))
+
+    flagged = []
+    if candidate_ids:
+        txs = await load_transactions(db, candidate_ids)
+        flagged = await score_and_record(db, txs, since, snapshots)
+        await mark_scored(db, candidate_ids)
+
+    if fraud_states:
+        await save_fraud_states(db, fraud_states)
+    gaps = _remove_found_ids(gaps, [row.id for row in late_rows])
+    if new_rows:
+        gaps += _new_gaps(state.last_transaction_id, new_rows, now)
+        state.last_transaction_id = new_rows[-1].id
+    state.pending_gaps = _dump_gaps(gaps)
+    state.scanned_count = (state.scanned_count or 0) + len(candidate_ids)
+    state.flagged_count = (state.flagged_count or 0) + len(flagged)
+    state.updated_at = datetime.now(timezone.utc)
+    return {"fetched": len(new_rows) + len(late_rows), "scanned": len(candidate_ids), "flagged": len(flagged)}
+
+
+async def scan_new_transactions(
+    db: AsyncSession,
+    batch_size: int = SCAN_BATCH_SIZE,
+    max_batches: int = SCAN_MAX_BATCHES
+) -> Dict[str, Any]:
+    """
+    아직 검사하지 않은 거래를 배치 단위로 점수화 (배치마다 커밋)
+
+    Returns:
+        {"status": "ok" | "busy" | "deferred", "batches", "scanned", "flagged", "last_transaction_id"}
+    """
+    summary = {"status": "ok", "batches": 0, "scanned": 0, "flagged": 0, "last_transaction_id": None}
+    if _scan_lock.locked():
+        summary["status"] = "busy"
+        return summary
+
+    async with _scan_lock:
+        for _ in range(max_batches):
+            state = await _lock_scan_state(db)
+            if state is None:
+                summary["status"] = "busy"
+                break
+
+            try:
+                result = await _scan_batch(db, state, batch_size)
+            except InferenceQueueFullError:
+                # 추론 대기열 포화: 상태를 전진하지 않고 다음 실행에서 재시도
+                await db.rollback()
+                summary["status"] = "deferred"
+                break
+            except Exception:
+                await db.rollback()
+                raise
+
+            last_id = state.last_transaction_id
+            await db.commit()
+
+            if result["fetched"] == 0:
+                break
+            summary["batches"] += 1
+            summary["scanned"] += result["scanned"]
+            summary["flagged"] += result["flagged"]
+            summary["last_transaction_id"] = last_id
+            if result["fetched"] < batch_size:
+                break
+
+    if summary["scanned"]:
+        logger.info(
+            f"Anomaly scan: {summary['scanned']} transactions scored, "
+            f"{summary['flagged']} flagged (last id {summary['last_transaction_id']})"
+        )
+    return summary
@@ -0,0 +1,51 @@
+"""
+Category Lookup Cache
+카테고리 이름 → id 조회 캐시
+
+categories 테이블은 거의 바뀌지 않으므로 프로세스 내에 TTL 동안 보관하고,
+거래 목록의 카테고리 필터나 일괄 생성의 카테고리 매핑이 매 요청 테이블을 읽지 않도록 합니다.
+
+사용 예:
+    category_ids = await get_category_ids(db)
+    ids = category_ids.get("식비", [])
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Dict, List, Optional
+import time
+import logging
+
+from app.db.model.transaction import Category
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SECONDS = 300  # 관리자가 카테고리를 추가/변경하면 최대 이 시간 뒤 반영
+
+# (만료 시각, {이름: [id, ...]})
+_cache: Optional[tuple] = None
+
+
+async def get_category_ids(db: AsyncSession) -> Dict[str, List[int]]:
+    """
+    카테고리 이름별 id 목록 (이름은 유니크가 아니므로 목록, id 오름차순)
+
+    반환값은 캐시와 공유되므로 변경하지 마세요.
+    """
+    global _cache
+    if _cache is not None and _cache[0] >= time.monotonic():
+        return _cache[1]
+
+    result = await db.execute(select(Category.id, Category.name).order_by(Category.id))
+    category_ids: Dict[str, List[int]] = {}
+    for cat_id, name in result.all():
+        category_ids.setdefault(name, []).append(cat_id)
+
+    _cache = (time.monotonic() + CACHE_TTL_SECONDS, category_ids)
+    return category_ids
+
+
+def invalidate_category_cache() -> None:
+    """카테고리 변경 시 캐시 삭제"""
+    global _cache
+    _cache = None
@@ -0,0 +1,261 @@
+"""
+Dashboard Response Cache
+사용자 분석 대시보드 응답 캐시 (/analysis/summary, /categories, /monthly-trend, /full)
+
+사용자 데이터는 거래 추가/삭제/이상거래 신고 때만 바뀌므로 (user_id, 엔드포인트, 파라미터) 단위로
+응답을 보관하고, 쓰기 경로에서 해당 사용자의 캐시를 무효화합니다.
+
+- 1단계: 프로세스 내 LRU (TTL, 최대 항목 수)
+- 2단계(선택): 공유 백엔드 (DASHBOARD_CACHE_REDIS_URL 설정 시 Redis, 또는 set_shared_backend로 주입)
+  여러 워커/인스턴스가 같은 결과를 재사용하고 무효화도 공유
+- 무효화: 사용자별 세대(generation) 값을 바꿈 → 이전 세대 항목은 더 이상 읽히지 않음
+  계산 도중 무효화된 결과는 저장하지 않음
+
+사용 예:
+    return await get_or_compute(user_id, "summary", (year, month), DashboardSummary,
+                                lambda: get_user_summary(db, user_id, year, month))
+    await invalidate_dashboard(user_id)  # 커밋 후
+"""
+
+from collections import OrderedDict
+from typing import Optional, Any, Dict, Hashable, Callable, Awaitable, Set
+import os
+import time
+import uuid
+import logging
+
+from pydantic import TypeAdapter
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_CACHE_ENABLED = os.getenv("DASHBOARD_CACHE", "1") == "1"
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", 300))
+DASHBOARD_CACHE_MAX_ENTRIES = int(os.getenv("DASHBOARD_CACHE_MAX_ENTRIES", 10000))
+DASHBOARD_CACHE_REDIS_URL = os.getenv("DASHBOARD_CACHE_REDIS_URL")  # 없으면 프로세스 내 캐시만 사용
+
+SHARED_KEY_PREFIX = "dashboard"
+GENERATION_TTL_SECONDS = 7 * 24 * 3600  # 세대 값 보관 (응답 TTL보다 충분히 길게)
+
+
+# ============================================================
+# 공유 백엔드 (선택)
+# ============================================================
+
+class DashboardCacheBackend:
+    """
+    공유 캐시 백엔드 인터페이스
+
+    문자열 키/값 저장소면 충분합니다 (Redis, Memcached 등).
+    """
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        raise NotImplementedError
+
+
+class RedisDashboardCacheBackend(DashboardCacheBackend):
+    """Redis 백엔드 (redis 패키지 필요)"""
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self._client = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        await self._client.set(key, value, ex=ttl_seconds)
+
+
+def _create_shared_backend() -> Optional[DashboardCacheBackend]:
+    if not DASHBOARD_CACHE_REDIS_URL:
+        return None
+    try:
+        backend = RedisDashboardCacheBackend(DASHBOARD_CACHE_REDIS_URL)
+        logger.info("Dashboard cache: Redis shared backend enabled")
+        return backend
+    except ImportError:
+        logger.warning("redis package not installed, dashboard cache is process-local only")
+    except Exception as e:
+        logger.error(f"Dashboard cache Redis backend initialization failed: {e}")
+    return None
+
+
+_shared: Optional[DashboardCacheBackend] = _create_shared_backend()
+
+
+def set_shared_backend(backend: Optional[DashboardCacheBackend]) -> None:
+    """공유 백엔드 교체 (None이면 프로세스 내 캐시만 사용)"""
+    global _shared
+    _shared = backend
+    clear_dashboard_cache()
+
+
+# ============================================================
+# 프로세스 내 LRU
+# ============================================================
+
+# (user_id, endpoint, params) → (만료 시각, 세대, 응답)
+_entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+# user_id → 캐시 키 집합 (사용자 단위 무효화)
+_user_keys: Dict[int, Set[tuple]] = {}
+# user_id → 프로세스 내 세대 (공유 백엔드가 없을 때)
+_local_generations: Dict[int, int] = {}
+
+_stats = {
+    "hits": 0,           # 프로세스 내 캐시 적중
+    "shared_hits": 0,    # 공유 백엔드 적중
+    "misses": 0,         # DB에서 다시 계산
+    "invalidations": 0,
+    "evictions": 0,      # 최대 항목 수 초과로 제거
+    "stale_skips": 0,    # 계산 도중 무효화되어 저장하지 않은 결과
+    "backend_errors": 0,
+}
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _adapter(response_type: Any) -> TypeAdapter:
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    return adapter
+
+
+def _local_remove(key: tuple) -> None:
+    _entries.pop(key, None)
+    keys = _user_keys.get(key[0])
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            _user_keys.pop(key[0], None)
+
+
+def _local_put(key: tuple, generation: str, value: Any) -> None:
+    _entries[key] = (time.monotonic() + DASHBOARD_CACHE_TTL_SECONDS, generation, value)
+    _entries.move_to_end(key)
+    _user_keys.setdefault(key[0], set()).add(key)
+    while len(_entries) > DASHBOARD_CACHE_MAX_ENTRIES:
+        oldest = next(iter(_entries))
+        _local_remove(oldest)
+        _stats["evictions"] += 1
+
+
+async def _generation(user_id: int) -> Optional[str]:
+    """사용자의 현재 캐시 세대 (공유 백엔드가 있으면 백엔드 값, 조회 실패 시 None → 캐시 사용 안 함)"""
+    if _shared is None:
+        return str(_local_generations.get(user_id, 0))
+    try:
+        return await _shared.get(f"{SHARED_KEY_PREFIX}:gen:{user_id}") or "0"
+    except Exception as e:
+        _stats["backend_errors"] += 1
+        logger.warning(f"Dashboard cache generation lookup failed: {e}")
+        return None
+
+
+def _shared_key(user_id: int, generation: str, endpoint: str, params: Hashable) -> str:
+    return f"{SHARED_KEY_PREFIX}:{user_id}:{generation}:{endpoint}:{params!r}"
+
+
+# ============================================================
+# 조회 / 무효화
+# ============================================================
+
+async def get_or_compute(
+    user_id: int,
+    endpoint: str,
+    params: Hashable,
+    response_type: Any,
+    compute: Callable[[], Awaitable[Any]],
+    cacheable: Callable[[Any], bool] = lambda value: True
+) -> Any:
+    """
+    캐시된 응답 반환, 없으면 compute()로 계산해 저장
+
+    Args:
+        response_type: 응답 타입 (공유 백엔드 직렬화용, 예: DashboardSummary, List[CategoryBreakdown])
+        cacheable: False를 돌려주는 결과(오류 시 대체 데이터 등)는 저장하지 않음
+    """
+    if not DASHBOARD_CACHE_ENABLED:
+        return await compute()
+
+    key = (user_id, endpoint, params)
+    generation = await _generation(user_id)
+
+    entry = _entries.get(key)
+    if entry is not None:
+        expires_at, entry_generation, value = entry
+        if expires_at >= time.monotonic() and entry_generation == generation:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            return value
+        _local_remove(key)
+
+    if _shared is not None and generation is not None:
+        try:
+            payload = await _shared.get(_shared_key(user_id, generation, endpoint, params))
+            if payload is not None:
+                value = _adapter(response_type).validate_json(payload)
+                _local_put(key, generation, value)
+                _stats["shared_hits"] += 1
+                return value
+        except Exception as e:
+            _stats["backend_errors"] += 1
+            logger.warning(f"Dashboard cache shared lookup failed: {e}")
+
+    _stats["misses"] += 1
+    value = await compute()
+    if generation is None or not cacheable(value):
+        return value
+
+    # 계산 도중 쓰기가 있었으면 (세대 변경) 저장하지 않음
+    if await _generation(user_id) != generation:
+        _stats["stale_skips"] += 1
+        return value
+
+    _local_put(key, generation, value)
+    if _shared is not None:
+        try:
+            payload = _adapter(response_type).dump_json(value).decode()
+            await _shared.set(_shared_key(user_id, generation, endpoint, params), payload, DASHBOARD_CACHE_TTL_SECONDS)
+        except Exception as e:
+            _stats["backend_errors"] += 1
+            logger.warning(f"Dashboard cache shared store failed: {e}")
+    return value
+
+
+async def invalidate_dashboard(user_id: int) -> None:
+    """사용자 대시보드 캐시 무효화 (거래 추가/삭제/이상거래 신고 커밋 후 호출)"""
+    _stats["invalidations"] += 1
+    _local_generations[user_id] = _local_generations.get(user_id, 0) + 1
+    for key in list(_user_keys.get(user_id, ())):
+        _local_remove(key)
+
+    if _shared is not None:
+        try:
+            await _shared.set(f"{SHARED_KEY_PREFIX}:gen:{user_id}", uuid.uuid4().hex, GENERATION_TTL_SECONDS)
+        except Exception as e:
+            _stats["backend_errors"] += 1
+            logger.warning(f"Dashboard cache shared invalidation failed: {e}")
+
+
+def clear_dashboard_cache() -> None:
+    """프로세스 내 캐시 전체 삭제"""
+    _entries.clear()
+    _user_keys.clear()
+
+
+def get_dashboard_cache_stats() -> Dict[str, Any]:
+    """적중/미스 카운터와 현재 상태"""
+    lookups = _stats["hits"] + _stats["shared_hits"] + _stats["misses"]
+    return {
+        "enabled": DASHBOARD_CACHE_ENABLED,
+        "backend": "local+shared" if _shared is not None else "local",
+        "ttl_seconds": DASHBOARD_CACHE_TTL_SECONDS,
+        "max_entries": DASHBOARD_CACHE_MAX_ENTRIES,
+        "entries": len(_entries),
+        **_stats,
+        "hit_rate": round((_stats["hits"] + _stats["shared_hits"]) / lookups, 4) if lookups else 0.0,
+    }
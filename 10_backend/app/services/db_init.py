@@ -3,14 +3,51 @@
 # - 테이블 자동 생성 (CREATE TABLE IF NOT EXISTS)
 
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from app.core.settings import settings
 from app.db.database import Base
 
 # 모델들을 명시적으로 import (Base.metadata에 등록하기 위해 필수)
 from app.db.model.user import User, LoginHistory
 from app.db.model.group import UserGroup
-from app.db.model.transaction import Transaction, Category, CouponTemplate, UserCoupon, Anomaly
+from app.db.model.transaction import Transaction, Category, CouponTemplate, UserCoupon, Anomaly, AnomalyScanState, MerchantName
+from app.db.model.prediction import NextCategoryPrediction, UserFeatureStats, UserFraudState
+from app.db.model.rollup import SpendDaily, SpendMonthly, SnapshotRefresh
+from app.db.model.cohort import UserActivityDaily
+from app.services.spend_rollup import ensure_rollups
+from app.services.admin_snapshot import create_admin_snapshot, refresh_admin_snapshot
+
+# 기존 테이블에 추가된 컬럼 (create_all은 이미 있는 테이블을 변경하지 않음)
+EXTRA_COLUMN_STATEMENTS = [
+    "ALTER TABLE transactions ADD COLUMN IF NOT EXISTS dedupe_key VARCHAR(100)",
+    "ALTER TABLE transactions ADD COLUMN IF NOT EXISTS fraud_scored_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE anomaly_scan_state ADD COLUMN IF NOT EXISTS pending_gaps TEXT",
+]
+
+# 기존 테이블에 추가된 인덱스 (create_all은 이미 있는 테이블의 인덱스를 만들지 않음)
+EXTRA_INDEX_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS ix_anomalies_transaction_id ON anomalies (transaction_id)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_user_category_time "
+    "ON transactions (user_id, category_id, transaction_time DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_user_fraud_time "
+    "ON transactions (user_id, is_fraudulent, transaction_time DESC, id DESC)",
+    # ix_transactions_user_fraud_time으로 대체됨
+    "DROP INDEX IF EXISTS ix_transactions_user_time_id",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_created_at ON transactions (created_at)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_transactions_user_dedupe_key "
+    "ON transactions (user_id, dedupe_key) WHERE dedupe_key IS NOT NULL",
+]
+
+# 거래 검색용 pg_trgm 확장/인덱스 (선택: 권한이 없거나 PostgreSQL이 아니면 ILIKE 검색으로 동작)
+SEARCH_INDEX_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_merchant_trgm "
+    "ON transactions USING gin (merchant_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_description_trgm "
+    "ON transactions USING gin (description gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_merchant_names_normalized_trgm "
+    "ON merchant_names USING gin (normalized_name gin_trgm_ops)",
+]
 
 async def ensure_database_and_tables():
     """
@@ -21,6 +58,28 @@ async def ensure_database_and_tables():
         full_engine = create_async_engine(settings.database_url, echo=False)
         async with full_engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            for statement in EXTRA_COLUMN_STATEMENTS + EXTRA_INDEX_STATEMENTS:
+                await conn.execute(text(statement))
+            # 관리자 분석 스냅샷 (PostgreSQL: materialized view)
+            await create_admin_snapshot(conn)
+
+        # 검색 인덱스는 실패해도 계속 (문장마다 별도 트랜잭션)
+        if full_engine.dialect.name == "postgresql":
+            for statement in SEARCH_INDEX_STATEMENTS:
+                try:
+                    async with full_engine.begin() as conn:
+                        await conn.execute(text(statement))
+                except Exception as e:
+                    print(f"Search index skipped ({statement.split(' ON ')[0]}): {e}")
+
+        # 소비 집계 테이블 최초 채우기 (이후에는 거래 저장 시 증분 갱신)
+        async with AsyncSession(full_engine) as session:
+            if await ensure_rollups(session):
+                await session.commit()
+                print("Spending rollups built from existing transactions")
+            # 관리자 분석 스냅샷 기준 시각 기록 (이후 스케줄러가 주기적으로 갱신)
+            await refresh_admin_snapshot(session)
+            await session.commit()
         await full_engine.dispose()
         print("RDS table verification/creation completed")
     except Exception as e:
@@ -0,0 +1,126 @@
+"""
+Fast Tree Inference
+XGBoost sklearn 래퍼(XGBClassifier)를 거치지 않고 부스터의 inplace_predict를
+연속된 float32 NumPy 배열로 직접 호출하는 추론 경로입니다.
+
+- DataFrame 검증/DMatrix 생성 등 단건 요청마다 드는 고정 비용 제거
+- 결과는 래퍼의 predict / predict_proba와 동일 (로드 시 자체 검증)
+- FAST_INFERENCE=0 으로 끌 수 있음
+
+사용 예:
+    fast = build_fast_predictor(model)
+    if fast is not None:
+        proba = fast.predict_proba(np.asarray(rows, dtype=np.float32))
+"""
+
+from typing import Any, List, Optional
+import json
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+FAST_INFERENCE_ENABLED = os.getenv("FAST_INFERENCE", "1") == "1"
+
+# 지원하는 학습 목적 함수 (sklearn XGBClassifier 기본값)
+SUPPORTED_OBJECTIVES = ("binary:logistic", "multi:softprob")
+
+SELF_CHECK_ROWS = 32     # 로드 시 래퍼와 결과를 비교할 샘플 행 수
+SELF_CHECK_ATOL = 1e-6
+
+
+class FastTreePredictor:
+    """XGBClassifier와 같은 결과를 내는 inplace_predict 기반 예측기"""
+
+    def __init__(self, model: Any):
+        """
+        Raises:
+            ValueError: 지원하지 않는 모델/목적 함수
+        """
+        if not hasattr(model, "get_booster"):
+            raise ValueError("Not an XGBoost sklearn model")
+
+        self.booster = model.get_booster()
+        config = json.loads(self.booster.save_config())
+        self.objective = config["learner"]["objective"]["name"]
+        if self.objective not in SUPPORTED_OBJECTIVES:
+            raise ValueError(f"Unsupported objective: {self.objective}")
+
+        self.feature_names: Optional[List[str]] = list(self.booster.feature_names) if self.booster.feature_names else None
+        self.n_features = self.booster.num_features()
+        self.classes_ = np.asarray(model.classes_) if hasattr(model, "classes_") else None
+
+        # 래퍼와 같은 트리 범위 사용 (early stopping 시 best_iteration까지)
+        try:
+            self.iteration_range = (0, int(model.best_iteration) + 1)
+        except (AttributeError, TypeError):
+            self.iteration_range = (0, 0)
+
+    def to_array(self, X) -> np.ndarray:
+        """입력(DataFrame / 배열 / 리스트)을 모델 피처 순서의 C-연속 float32 2차원 배열로 변환"""
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names is not None:
+                X = X[self.feature_names]
+            X = X.to_numpy(dtype=np.float32)
+        arr = np.ascontiguousarray(X, dtype=np.float32)
+        if arr.ndim == 1:
+            arr = arr.reshape(1, -1)
+        if arr.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {arr.shape[1]}")
+        return arr
+
+    def predict_proba(self, X) -> np.ndarray:
+        """클래스별 확률 (n_rows x n_classes)"""
+        raw = self.booster.inplace_predict(
+            self.to_array(X),
+            iteration_range=self.iteration_range,
+            predict_type="value",
+            validate_features=False
+        )
+        if self.objective == "binary:logistic":
+            raw = np.asarray(raw).reshape(-1)
+            return np.column_stack([1.0 - raw, raw])
+        return np.asarray(raw).reshape(raw.shape[0], -1)
+
+    def predict(self, X) -> np.ndarray:
+        """예측 클래스 (래퍼와 동일: 이진은 0.5 초과, 다중은 argmax)"""
+        proba = self.predict_proba(X)
+        if self.objective == "binary:logistic":
+            indexes = (proba[:, 1] > 0.5).astype(np.int64)
+        else:
+            indexes = proba.argmax(axis=1)
+        if self.classes_ is not None and len(self.classes_) == proba.shape[1]:
+            return self.classes_[indexes]
+        return indexes
+
+
+def _self_check(model: Any, fast: FastTreePredictor) -> bool:
+    """임의 입력에 대해 래퍼와 빠른 경로의 확률이 같은지 확인"""
+    rng = np.random.default_rng(0)
+    sample = rng.normal(0, 3, size=(SELF_CHECK_ROWS, fast.n_features)).astype(np.float32)
+    sample[0] = 0
+    X = pd.DataFrame(sample, columns=fast.feature_names) if fast.feature_names else sample
+
+    expected = np.asarray(model.predict_proba(X))
+    actual = fast.predict_proba(sample)
+    return expected.shape == actual.shape and np.allclose(expected, actual, atol=SELF_CHECK_ATOL)
+
+
+def build_fast_predictor(model: Any) -> Optional[FastTreePredictor]:
+    """
+    모델에 맞는 빠른 예측기 생성 (비활성화 / 미지원 / 검증 실패 시 None)
+    """
+    if not FAST_INFERENCE_ENABLED or not hasattr(model, "get_booster"):
+        return None
+    try:
+        fast = FastTreePredictor(model)
+        if not _self_check(model, fast):
+            logger.warning(f"Fast inference disabled for {type(model).__name__}: self-check mismatch")
+            return None
+        return fast
+    except Exception as e:
+        logger.warning(f"Fast inference unavailable for {type(model).__name__}: {e}")
+        return None
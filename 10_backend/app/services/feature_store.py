@@ -0,0 +1,328 @@
+"""
+User Feature Store Service Layer
+사용자별 누적 거래 통계 (피처 저장소)
+
+user_feature_stats 테이블에 거래 건수/합계/제곱합/카테고리별 건수/마지막 거래를
+증분 저장하고, 프로세스 내 캐시(TTL)로 반복 조회를 줄입니다.
+예측 경로는 거래 이력 전체를 다시 읽지 않고 이 통계로 피처를 계산합니다.
+
+- 거래 추가: apply_new_transactions (거래와 같은 트랜잭션에서 증분 UPDATE, 행이 없으면 전체 재집계)
+- 거래 삭제 / 이상거래 표시: invalidate_user_stats (다음 조회 시 재집계)
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, update, func, case, or_
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Iterable
+import time
+import logging
+
+import pandas as pd
+
+from app.db.model.transaction import Transaction, Category
+from app.db.model.prediction import UserFeatureStats
+from app.services.preprocessing import NEXT_CATEGORY_MAP, USER_STATS_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SECONDS = 300     # 캐시 유효 시간 (다른 워커의 갱신 반영 주기)
+CACHE_MAX_USERS = 10000     # 캐시에 보관할 최대 사용자 수 (LRU)
+
+# user_id → (만료 시각, 통계 딕셔너리)
+_stats_cache: "OrderedDict[int, tuple]" = OrderedDict()
+
+
+# ============================================================
+# 캐시 헬퍼
+# ============================================================
+
+def _cache_get(user_id: int) -> Optional[Dict[str, Any]]:
+    entry = _stats_cache.get(user_id)
+    if entry is None:
+        return None
+    expires_at, stats = entry
+    if expires_at < time.monotonic():
+        _stats_cache.pop(user_id, None)
+        return None
+    _stats_cache.move_to_end(user_id)
+    return stats
+
+
+def _cache_put(user_id: int, stats: Dict[str, Any]) -> None:
+    _stats_cache[user_id] = (time.monotonic() + CACHE_TTL_SECONDS, stats)
+    _stats_cache.move_to_end(user_id)
+    while len(_stats_cache) > CACHE_MAX_USERS:
+        _stats_cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    """프로세스 내 캐시 전체 삭제"""
+    _stats_cache.clear()
+
+
+def _category_code(category_name: Optional[str]) -> int:
+    """카테고리명 → 다음 카테고리 모델 코드 (매핑 없으면 6: 기타)"""
+    return NEXT_CATEGORY_MAP.get(category_name, 6)
+
+
+def _row_to_stats(row: UserFeatureStats) -> Dict[str, Any]:
+    return {col: getattr(row, col) for col in USER_STATS_COLUMNS}
+
+
+def _upsert(db: AsyncSession):
+    """방언별 INSERT ... ON CONFLICT 구문 (PostgreSQL / SQLite)"""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    return dialect_insert(UserFeatureStats)
+
+
+# ============================================================
+# 재집계 (행이 없거나 무효화된 사용자)
+# ============================================================
+
+async def _aggregate_from_transactions(db: AsyncSession, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    거래 테이블에서 사용자별 누적 통계를 집계 (쿼리 2회)
+
+    Returns:
+        {user_id: 통계 딕셔너리} (거래가 없는 사용자는 제외)
+    """
+    totals_query = (
+        select(
+            Transaction.user_id,
+            Category.name,
+            func.count(Transaction.id),
+            func.sum(Transaction.amount),
+            func.sum(Transaction.amount * Transaction.amount)
+        )
+        .outerjoin(Category, Transaction.category_id == Category.id)
+        .where(
+            Transaction.user_id.in_(user_ids),
+            Transaction.is_fraudulent == False
+        )
+        .group_by(Transaction.user_id, Category.name)
+    )
+    result = await db.execute(totals_query)
+
+    stats: Dict[int, Dict[str, Any]] = {}
+    for user_id, category_name, count, amount_sum, amount_sq_sum in result.fetchall():
+        entry = stats.setdefault(user_id, {
+            'tx_count': 0, 'amount_sum': 0.0, 'amount_sq_sum': 0.0,
+            **{f'cat{code}_count': 0 for code in range(7)},
+            'last_transaction_at': None, 'last_category_code': None,
+        })
+        entry['tx_count'] += int(count)
+        entry['amount_sum'] += float(amount_sum or 0)
+        entry['amount_sq_sum'] += float(amount_sq_sum or 0)
+        entry[f'cat{_category_code(category_name)}_count'] += int(count)
+
+    if not stats:
+        return stats
+
+    # 사용자별 마지막 거래 (시간 역순 1위)
+    ranked = (
+        select(
+            Transaction.user_id.label('user_id'),
+            Transaction.transaction_time.label('transaction_time'),
+            Category.name.label('category_name'),
+            func.row_number().over(
+                partition_by=Transaction.user_id,
+                order_by=(Transaction.transaction_time.desc(), Transaction.id.desc())
+            ).label('rn')
+        )
+        .outerjoin(Category, Transaction.category_id == Category.id)
+        .where(
+            Transaction.user_id.in_(list(stats.keys())),
+            Transaction.is_fraudulent == False
+        )
+        .subquery()
+    )
+    last_query = select(ranked.c.user_id, ranked.c.transaction_time, ranked.c.category_name).where(ranked.c.rn == 1)
+    result = await db.execute(last_query)
+    for user_id, tx_time, category_name in result.fetchall():
+        stats[user_id]['last_transaction_at'] = tx_time
+        stats[user_id]['last_category_code'] = _category_code(category_name)
+
+    return stats
+
+
+async def rebuild_user_stats(db: AsyncSession, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    사용자들의 통계를 거래 이력으로 다시 계산해 저장 (커밋은 호출자 책임)
+
+    통계 행을 (없으면 만들어) 잠근 뒤(FOR UPDATE) 집계하고 INSERT ... ON CONFLICT DO UPDATE로 씁니다.
+    거래 생성 트랜잭션의 증분 UPDATE와 같은 행 잠금으로 순서가 정해지므로 같은 거래를 두 번 세지 않습니다.
+    (재집계가 먼저 잠그면 증분이 그 결과 위에 더해지고, 증분이 먼저면 커밋 후 집계가 그 거래를 포함)
+
+    Returns:
+        {user_id: 통계 딕셔너리}
+    """
+    if not user_ids:
+        return {}
+    user_ids = sorted(set(user_ids))
+
+    await db.execute(
+        _upsert(db).on_conflict_do_nothing(index_elements=[UserFeatureStats.user_id]),
+        [{'user_id': user_id} for user_id in user_ids]
+    )
+    await db.execute(
+        select(UserFeatureStats.user_id)
+        .where(UserFeatureStats.user_id.in_(user_ids))
+        .order_by(UserFeatureStats.user_id)
+        .with_for_update()
+    )
+
+    stats = await _aggregate_from_transactions(db, user_ids)
+
+    if stats:
+        stmt = _upsert(db)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserFeatureStats.user_id],
+            set_={**{col: stmt.excluded[col] for col in USER_STATS_COLUMNS}, 'updated_at': func.now()}
+        )
+        await db.execute(stmt, [{'user_id': user_id, **values} for user_id, values in stats.items()])
+
+    # 거래가 없는 사용자는 행을 두지 않음 (조회 시 통계 없음)
+    empty_ids = [user_id for user_id in user_ids if user_id not in stats]
+    if empty_ids:
+        await db.execute(delete(UserFeatureStats).where(UserFeatureStats.user_id.in_(empty_ids)))
+
+    for user_id in user_ids:
+        _stats_cache.pop(user_id, None)
+    return stats
+
+
+# ============================================================
+# 증분 갱신 / 무효화
+# ============================================================
+
+async def record_transactions(db: AsyncSession, user_id: int, transactions: Iterable[Dict[str, Any]]) -> None:
+    """
+    새로 추가된 거래를 사용자 통계에 반영 (UPDATE 1회, 커밋은 호출자 책임)
+
+    통계 행이 아직 없는 사용자는 거래 테이블에서 전체 재집계합니다.
+    따라서 새 거래가 이미 flush 된 뒤, 거래와 같은 트랜잭션에서 호출해야 합니다.
+
+    Args:
+        transactions: amount, category_name, transaction_time 키를 가진 딕셔너리들
+    """
+    count = 0
+    amount_sum = 0.0
+    amount_sq_sum = 0.0
+    cat_counts = [0] * 7
+    last_time = None
+    last_code = None
+
+    for tx in transactions:
+        amount = float(tx['amount'])
+        code = _category_code(tx.get('category_name'))
+        count += 1
+        amount_sum += amount
+        amount_sq_sum += amount * amount
+        cat_counts[code] += 1
+        if last_time is None or tx['transaction_time'] >= last_time:
+            last_time = tx['transaction_time']
+            last_code = code
+
+    if count == 0:
+        return
+
+    is_latest = or_(
+        UserFeatureStats.last_transaction_at.is_(None),
+        UserFeatureStats.last_transaction_at <= last_time
+    )
+    values = {
+        'tx_count': UserFeatureStats.tx_count + count,
+        'amount_sum': UserFeatureStats.amount_sum + amount_sum,
+        'amount_sq_sum': UserFeatureStats.amount_sq_sum + amount_sq_sum,
+        'last_transaction_at': case((is_latest, last_time), else_=UserFeatureStats.last_transaction_at),
+        'last_category_code': case((is_latest, last_code), else_=UserFeatureStats.last_category_code),
+        'updated_at': func.now(),
+    }
+    for code, added in enumerate(cat_counts):
+        if added:
+            column = getattr(UserFeatureStats, f'cat{code}_count')
+            values[f'cat{code}_count'] = column + added
+
+    result = await db.execute(
+        update(UserFeatureStats)
+        .where(UserFeatureStats.user_id == user_id)
+        .values(**values)
+    )
+    _stats_cache.pop(user_id, None)
+
+    if result.rowcount == 0:
+        await rebuild_user_stats(db, [user_id])
+
+
+async def apply_new_transactions(db: AsyncSession, user_id: int, transactions: Iterable[Dict[str, Any]]) -> None:
+    """
+    새로 저장한 거래를 통계에 반영 (flush 후, 커밋 전 같은 트랜잭션에서 호출, 커밋은 호출자 책임)
+
+    거래 생성 API에서 호출합니다. 증분이 거래와 함께 커밋되므로 동시에 실행된 재집계와 겹쳐도
+    같은 거래를 두 번 세지 않습니다. 통계 갱신 실패가 거래 생성 실패로 이어지지 않도록
+    SAVEPOINT 안에서 실행하고, 실패하면 해당 사용자 통계를 무효화합니다.
+    """
+    try:
+        async with db.begin_nested():
+            await record_transactions(db, user_id, transactions)
+    except Exception as e:
+        logger.warning(f"Feature store update failed for user {user_id}: {e}")
+        await invalidate_user_stats(db, user_id)
+
+
+async def invalidate_user_stats(db: AsyncSession, user_id: int) -> None:
+    """
+    사용자 통계 삭제 (다음 조회 시 재집계, 커밋은 호출자 책임)
+
+    거래 삭제나 이상거래 표시처럼 증분으로 되돌리기 어려운 변경에 사용합니다.
+    """
+    await db.execute(delete(UserFeatureStats).where(UserFeatureStats.user_id == user_id))
+    _stats_cache.pop(user_id, None)
+
+
+# ============================================================
+# 조회
+# ============================================================
+
+async def get_user_stats(db: AsyncSession, user_ids: List[int]) -> pd.DataFrame:
+    """
+    사용자별 누적 통계 조회 (캐시 → 통계 테이블 → 재집계 순)
+
+    Returns:
+        user_id 인덱스, USER_STATS_COLUMNS 컬럼의 DataFrame
+        (거래가 없는 사용자는 포함되지 않음)
+    """
+    found: Dict[int, Dict[str, Any]] = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        cached = _cache_get(user_id)
+        if cached is not None:
+            found[user_id] = cached
+        else:
+            missing.append(user_id)
+
+    if missing:
+        result = await db.execute(
+            select(UserFeatureStats).where(UserFeatureStats.user_id.in_(missing))
+        )
+        for row in result.scalars().all():
+            found[row.user_id] = _row_to_stats(row)
+
+        not_stored = [user_id for user_id in missing if user_id not in found]
+        if not_stored:
+            found.update(await rebuild_user_stats(db, not_stored))
+            await db.commit()
+
+        for user_id in missing:
+            if user_id in found:
+                _cache_put(user_id, found[user_id])
+
+    stats = pd.DataFrame.from_dict(found, orient='index', columns=USER_STATS_COLUMNS)
+    stats.index.name = 'user_id'
+    if not stats.empty:
+        # prediction_time(naive)과 비교하기 위해 타임존 정보 제거
+        stats['last_transaction_at'] = pd.to_datetime(stats['last_transaction_at'], utc=True).dt.tz_localize(None)
+    return stats.sort_index()
@@ -1,10 +1,133 @@
 import pandas as pd
 import numpy as np
 import math
+from bisect import bisect_left
+from collections import deque
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Dict, Tuple, Iterable
 from app.db.model.transaction import Transaction
 
+# Rolling window sizes (PaySim per-account features)
+ROLLING_WINDOW = 10               # ring buffer size (largest window below)
+Z_WINDOWS = (3, 5, 10)            # amount_log_z{k}
+TYPE_CHANGE_WINDOWS = (2, 3, 5, 10)  # type_change_rate{k}
+IQR_MIN_SAMPLES = 4               # fewer previous amounts -> amount_log_iqr_z = 0
+SCALE_FLOOR = 1e-3                # lower bound for std / IQR (constant amounts)
+Z_CLIP = 10.0                     # clip z-scores to [-Z_CLIP, Z_CLIP]
+
+
+def _clip(value: float) -> float:
+    return max(-Z_CLIP, min(Z_CLIP, value))
+
+
+class RollingFraudState:
+    """
+    Per-user rolling state for the fraud features.
+
+    Fixed-size ring buffers of the last ROLLING_WINDOW log-amounts and transaction types
+    (in arrival order, i.e. transaction id order). Every feature is computed from the
+    buffers in O(window), so scoring never rescans the user's history.
+    """
+
+    __slots__ = ("log_amounts", "types", "last_transaction_id")
+
+    def __init__(
+        self,
+        log_amounts: Iterable[float] = (),
+        types: Iterable[str] = (),
+        last_transaction_id: int = 0
+    ):
+        self.log_amounts = deque(log_amounts, maxlen=ROLLING_WINDOW)
+        self.types = deque(types, maxlen=ROLLING_WINDOW)
+        self.last_transaction_id = last_transaction_id
+
+    @classmethod
+    def from_history(cls, history: Iterable[Transaction]) -> "RollingFraudState":
+        """Build the state from previous transactions (any order; the last ROLLING_WINDOW by id are kept)."""
+        ordered = sorted(history, key=lambda t: getattr(t, "id", None) or 0)[-ROLLING_WINDOW:]
+        state = cls()
+        for t in ordered:
+            state.push(getattr(t, "id", None), float(t.amount), transaction_type(t))
+        return state
+
+    def copy(self) -> "RollingFraudState":
+        return RollingFraudState(self.log_amounts, self.types, self.last_transaction_id)
+
+    def push(self, tx_id: Optional[int], amount: float, tx_type: str) -> bool:
+        """
+        Append a transaction. Ids at or below last_transaction_id are ignored,
+        so replaying the same transaction (rescan, retry) is a no-op.
+        """
+        if tx_id is not None:
+            if tx_id <= self.last_transaction_id:
+                return False
+            self.last_transaction_id = tx_id
+        self.log_amounts.append(float(np.log1p(abs(amount))))
+        self.types.append(tx_type)
+        return True
+
+    def features(self, amount_log: float, tx_type: str) -> dict:
+        """Rolling features of a new transaction against the buffered previous ones."""
+        previous = list(self.log_amounts)
+        features = {}
+
+        # Window z-scores: (x - mean(prev k)) / std(prev k)
+        for k in Z_WINDOWS:
+            window = previous[-k:]
+            if len(window) < 2:
+                features[f'amount_log_z{k}'] = 0.0
+                continue
+            mean = sum(window) / len(window)
+            std = math.sqrt(sum((v - mean) ** 2 for v in window) / len(window))
+            features[f'amount_log_z{k}'] = _clip((amount_log - mean) / max(std, SCALE_FLOOR))
+
+        # Robust z-score: (x - median) / IQR over the whole buffer
+        if len(previous) >= IQR_MIN_SAMPLES:
+            q1, median, q3 = np.percentile(previous, [25, 50, 75])
+            features['amount_log_iqr_z'] = _clip(float((amount_log - median) / max(q3 - q1, SCALE_FLOOR)))
+        else:
+            features['amount_log_iqr_z'] = 0.0
+
+        # Percentile rank of x within buffer + x (pandas rank(pct=True), average ties)
+        less = sum(1 for v in previous if v < amount_log)
+        equal = sum(1 for v in previous if v == amount_log) + 1
+        features['amount_rank_pct'] = (less + (equal + 1) / 2) / (len(previous) + 1)
+
+        # Share of consecutive type changes among the last k types (including x)
+        # (always 0 while transaction_type maps everything to PAYMENT)
+        types = list(self.types) + [tx_type]
+        for k in TYPE_CHANGE_WINDOWS:
+            seq = types[-k:]
+            changes = sum(1 for a, b in zip(seq, seq[1:]) if a != b)
+            features[f'type_change_rate{k}'] = changes / (len(seq) - 1) if len(seq) > 1 else 0.0
+
+        return features
+
+    def to_dict(self) -> dict:
+        return {
+            "log_amounts": list(self.log_amounts),
+            "types": list(self.types),
+            "last_transaction_id": self.last_transaction_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RollingFraudState":
+        return cls(data.get("log_amounts", ()), data.get("types", ()), data.get("last_transaction_id") or 0)
+
+
+def transaction_type(tx: Transaction) -> str:
+    """
+    Map our transactions to PaySim types: PAYMENT, TRANSFER, CASH_OUT, DEBIT, CASH_IN
+
+    Transactions carry no field that distinguishes these types yet (card type is not
+    stored, and there are no transfer / refund markers), so every transaction is a card
+    PAYMENT. Until a mapping exists the type ring buffer holds a single value and
+    type_change_rate2/3/5/10 are always 0. When a mapping is added here, the stored
+    user_fraud_state rows must be invalidated so the buffers are rebuilt with real types.
+    """
+    return 'PAYMENT'
+
+
 class FraudPreprocessor:
     """
     Fraud Detection Model (XGBoost) Preprocessor
@@ -23,11 +146,90 @@ class FraudPreprocessor:
         
         Args:
             tx: Current transaction to predict
-            history: List of recent transactions (for z-score, etc.)
+            history: List of recent transactions of the user (for rolling features).
+                Only transactions with a smaller id than tx are used.
             
         Returns:
             DataFrame with 1 row and all required features.
         """
+        # Convert to DataFrame
+        # Ensure all columns from metadata exist (we'll implement robustness in loader)
+        return pd.DataFrame([self._transaction_features(tx, self._previous_state(tx, history))])
+
+    def transaction_vector(
+        self,
+        tx: Transaction,
+        history: List[Transaction],
+        feature_names: Optional[List[str]] = None,
+        state: Optional[RollingFraudState] = None
+    ) -> np.ndarray:
+        """
+        Same features as preprocess_transaction, as a (1, n_features) float32 array.
+
+        Skips DataFrame construction for the fast inference path.
+
+        Args:
+            feature_names: Column order expected by the model (default: feature dict order,
+                which is the DataFrame column order of preprocess_transaction)
+            state: Rolling state just before tx (skips the history lookup)
+        """
+        if state is None:
+            state = self._previous_state(tx, history)
+        features = self._transaction_features(tx, state)
+        names = feature_names or list(features)
+        return np.array([[features.get(name, 0) for name in names]], dtype=np.float32)
+
+    def preprocess_batch(
+        self,
+        txs: List[Transaction],
+        history_by_user: Dict[int, List[Transaction]],
+        states: Optional[Dict[int, RollingFraudState]] = None
+    ) -> pd.DataFrame:
+        """
+        Batch preprocessing: one feature row per transaction, same values as preprocess_transaction.
+
+        Each user's history is sorted once and the previous window of every
+        transaction is found by binary search instead of rescanning history.
+
+        Args:
+            txs: Transactions to score
+            history_by_user: {user_id: recent transactions} (same history preprocess_transaction would get)
+            states: {transaction_id: rolling state just before that transaction} (e.g. from the
+                persisted fraud state store); transactions listed here skip the history lookup
+
+        Returns:
+            DataFrame with len(txs) rows in input order.
+        """
+        states = states or {}
+        sorted_history: Dict[int, Tuple[List[int], list]] = {}
+        rows = []
+        for tx in txs:
+            state = states.get(tx.id)
+            if state is None:
+                if tx.user_id not in sorted_history:
+                    ordered = sorted(history_by_user.get(tx.user_id, []), key=lambda t: t.id)
+                    sorted_history[tx.user_id] = ([t.id for t in ordered], ordered)
+                ids, ordered = sorted_history[tx.user_id]
+                end = bisect_left(ids, tx.id)
+                state = RollingFraudState.from_history(ordered[max(0, end - ROLLING_WINDOW):end])
+            rows.append(self._transaction_features(tx, state))
+        return pd.DataFrame(rows, columns=list(rows[0]) if rows else self.get_feature_names())
+
+    @staticmethod
+    def _previous_state(tx: Transaction, history: List[Transaction]) -> RollingFraudState:
+        """Rolling state from the history transactions that arrived before tx."""
+        tx_id = getattr(tx, "id", None)
+        if tx_id is not None:
+            history = [t for t in history if getattr(t, "id", None) is not None and t.id < tx_id]
+        return RollingFraudState.from_history(history)
+
+    def _transaction_features(self, tx: Transaction, state: RollingFraudState) -> dict:
+        """
+        Build the feature dict for a single transaction.
+
+        Args:
+            state: Rolling state of the user just before tx
+        """
         features = {}
         
         # 1. Time Features
@@ -52,67 +254,34 @@ class FraudPreprocessor:
         amount_log = np.log1p(abs(amount))
         features['amount_log'] = amount_log
         
-        # Z-scores (requires history)
-        # We need history of amounts to calculate mean/std
-        if not history:
-            amounts = [amount]
-        else:
-            amounts = [float(t.amount) for t in history]
-            # Ensure current tx amount is comprised if not in history
-            # But history usually implies 'past'. preprocessing should consider 'context'.
-            # If 'history' excludes 'tx', we append it for stats? 
-            # Usually Z-score is (Current - Mean_Past) / Std_Past
-            pass
-            
-        # Filter history to recent N
-        # This is a simplified calculation. Real-time system might need Redis.
-        past_amounts = np.array(amounts)
+        # Rolling-window features (per-user ring buffer, previous ROLLING_WINDOW transactions)
+        tx_type = transaction_type(tx)
+        rolling = state.features(amount_log, tx_type)
         
-        # Rolling stats (approximate with entire history provided)
-        mean = np.mean(past_amounts)
-        std = np.std(past_amounts) + 1e-9
-        
-        features['amount_log_z3'] = (amount_log - np.log1p(mean)) / (np.log1p(std) + 1e-9) # Approximation
-        features['amount_log_z5'] = features['amount_log_z3'] # Placeholder if distinct windows not avail
-        features['amount_log_z10'] = features['amount_log_z3']
-        features['amount_log_iqr_z'] = 0 # Complex to calc on fly without robust history
+        features['amount_log_z3'] = rolling['amount_log_z3']
+        features['amount_log_z5'] = rolling['amount_log_z5']
+        features['amount_log_z10'] = rolling['amount_log_z10']
+        features['amount_log_iqr_z'] = rolling['amount_log_iqr_z']
         
         features['amount_bin'] = int(amount / 10000) # Arbitrary binning
-        features['amount_rank_pct'] = 0.5 # Placeholder
-        
-        # 3. Type Features
-        # Map our categories/types to PaySim types: PAYMENT, TRANSFER, CASH_OUT, DEBIT, CASH_IN
-        # Our types: '체크', '신용' -> maybe mapped to PAYMENT?
-        # Or category based? 
-        # PaySim is mobile money. 
-        # Let's map: 
-        #   Transfer/Send -> TRANSFER
-        #   Payment -> PAYMENT
-        #   Cash -> CASH_OUT
-        
-        # For now, default to PAYMENT as it's most common for card txs
-        tx_type = 'PAYMENT'
+        features['amount_rank_pct'] = rolling['amount_rank_pct']
         
+        # 3. Type Features (see transaction_type)
         features['type_PAYMENT'] = 1 if tx_type == 'PAYMENT' else 0
-        features['type_CASH_IN'] = 0
-        features['type_TRANSFER'] = 0
-        features['type_CASH_OUT'] = 0
-        features['type_DEBIT'] = 0
+        features['type_CASH_IN'] = 1 if tx_type == 'CASH_IN' else 0
+        features['type_TRANSFER'] = 1 if tx_type == 'TRANSFER' else 0
+        features['type_CASH_OUT'] = 1 if tx_type == 'CASH_OUT' else 0
+        features['type_DEBIT'] = 1 if tx_type == 'DEBIT' else 0
         
-        # Change rates (requires history of types)
-        features['type_change_rate2'] = 0
-        features['type_change_rate3'] = 0
-        features['type_change_rate5'] = 0
-        features['type_change_rate10'] = 0
+        # Change rates (history of types; 0 until transaction_type has a real mapping)
+        features['type_change_rate2'] = rolling['type_change_rate2']
+        features['type_change_rate3'] = rolling['type_change_rate3']
+        features['type_change_rate5'] = rolling['type_change_rate5']
+        features['type_change_rate10'] = rolling['type_change_rate10']
 
         # Fill missing columns expected by model with 0
         # This corresponds to "one_hot_expanded_count" in metadata
-        
-        # Convert to DataFrame
-        df = pd.DataFrame([features])
-        
-        # Ensure all columns from metadata exist (we'll implement robustness in loader)
-        return df
+        return features
 
     def get_feature_names(self):
         # Based on metadata
@@ -0,0 +1,256 @@
+"""
+Fraud Rolling State Store
+이상거래 모델용 사용자별 최근 거래 윈도 (링 버퍼) 저장소
+
+user_fraud_state 테이블에 사용자별 최근 ROLLING_WINDOW건의 로그 금액/거래 유형을
+도착 순서(거래 id 순)로 저장하고, 프로세스 내 캐시(TTL)로 반복 조회를 줄입니다.
+이상 탐지 경로는 거래 이력을 다시 읽지 않고 이 상태로 윈도 피처를 계산합니다.
+
+- 조회: load_fraud_states (캐시 → 상태 테이블 → 거래 테이블에서 재구성)
+- 진행: advance_fraud_states (새 거래를 id 순으로 반영, 거래별 직전 상태 스냅샷)
+- 저장: save_fraud_states (행 잠금, 조회 이후 다른 경로가 저장했으면 거래 테이블에서 재구성, 커밋은 호출자 책임)
+- 거래 삭제: invalidate_fraud_state (다음 조회 시 재구성)
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, event, func
+from collections import OrderedDict
+from typing import Optional, List, Dict, Iterable, Set
+import json
+import time
+import logging
+
+from app.db.model.transaction import Transaction
+from app.db.model.prediction import UserFraudState
+from app.services.fraud_preprocessing import RollingFraudState, ROLLING_WINDOW, transaction_type
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SECONDS = 300     # 캐시 유효 시간 (다른 워커의 갱신 반영 주기)
+CACHE_MAX_USERS = 10000     # 캐시에 보관할 최대 사용자 수 (LRU)
+
+# user_id → (만료 시각, RollingFraudState)
+_state_cache: "OrderedDict[int, tuple]" = OrderedDict()
+_PENDING_CACHE_KEY = "fraud_state_pending_cache"  # 커밋되면 캐시에 넣을 상태 (session.info)
+_LOADED_IDS_KEY = "fraud_state_loaded_ids"  # 조회 시점의 last_transaction_id (session.info, 저장 시 충돌 판단)
+
+
+# ============================================================
+# 캐시 헬퍼
+# ============================================================
+
+def _cache_get(user_id: int) -> Optional[RollingFraudState]:
+    entry = _state_cache.get(user_id)
+    if entry is None:
+        return None
+    expires_at, state = entry
+    if expires_at < time.monotonic():
+        _state_cache.pop(user_id, None)
+        return None
+    _state_cache.move_to_end(user_id)
+    return state.copy()
+
+
+def _cache_put(user_id: int, state: RollingFraudState) -> None:
+    _state_cache[user_id] = (time.monotonic() + CACHE_TTL_SECONDS, state.copy())
+    _state_cache.move_to_end(user_id)
+    while len(_state_cache) > CACHE_MAX_USERS:
+        _state_cache.popitem(last=False)
+
+
+def clear_cache() -> None:
+    """프로세스 내 캐시 전체 삭제"""
+    _state_cache.clear()
+
+
+def _cache_after_commit(session) -> None:
+    """커밋된 상태를 캐시에 반영 (다음 거래가 상태 테이블을 다시 읽지 않도록)"""
+    if session.in_nested_transaction():
+        return  # SAVEPOINT 해제는 커밋이 아님
+    for user_id, state in session.info.pop(_PENDING_CACHE_KEY, {}).items():
+        _cache_put(user_id, state)
+
+
+def _discard_after_rollback(session) -> None:
+    session.info.pop(_PENDING_CACHE_KEY, None)
+
+
+def _cache_on_commit(db: AsyncSession, user_id: int, state: RollingFraudState) -> None:
+    session = db.sync_session
+    if not event.contains(session, "after_commit", _cache_after_commit):
+        event.listen(session, "after_commit", _cache_after_commit)
+        event.listen(session, "after_rollback", _discard_after_rollback)
+    session.info.setdefault(_PENDING_CACHE_KEY, {})[user_id] = state.copy()
+
+
+def _row_to_state(row: UserFraudState) -> RollingFraudState:
+    return RollingFraudState(json.loads(row.log_amounts or "[]"), json.loads(row.types or "[]"), row.last_transaction_id or 0)
+
+
+# ============================================================
+# 재구성 (행이 없거나 무효화된 사용자)
+# ============================================================
+
+async def _build_from_transactions(
+    db: AsyncSession,
+    user_ids: List[int],
+    up_to_id: Optional[int] = None
+) -> Dict[int, RollingFraudState]:
+    """
+    거래 테이블에서 사용자별 최근 ROLLING_WINDOW건(id 역순)으로 상태 구성 (쿼리 1회)
+
+    Args:
+        up_to_id: 이 id 이하의 거래만 반영 (스캐너의 high-water mark)
+    """
+    conditions = [Transaction.user_id.in_(user_ids)]
+    if up_to_id is not None:
+        conditions.append(Transaction.id <= up_to_id)
+
+    ranked = (
+        select(
+            Transaction.id.label('id'),
+            Transaction.user_id.label('user_id'),
+            Transaction.amount.label('amount'),
+            func.row_number().over(
+                partition_by=Transaction.user_id,
+                order_by=Transaction.id.desc()
+            ).label('rn')
+        )
+        .where(*conditions)
+        .subquery()
+    )
+    result = await db.execute(
+        select(ranked.c.id, ranked.c.user_id, ranked.c.amount)
+        .where(ranked.c.rn <= ROLLING_WINDOW)
+        .order_by(ranked.c.user_id, ranked.c.id)
+    )
+
+    states = {user_id: RollingFraudState() for user_id in user_ids}
+    for row in result.all():
+        states[row.user_id].push(row.id, float(row.amount), transaction_type(row))
+    return states
+
+
+# ============================================================
+# 조회 / 진행 / 저장
+# ============================================================
+
+async def load_fraud_states(
+    db: AsyncSession,
+    user_ids: Iterable[int],
+    up_to_id: Optional[int] = None
+) -> Dict[int, RollingFraudState]:
+    """
+    사용자별 윈도 상태 조회 (캐시 → 상태 테이블 → 거래 테이블 재구성 순)
+
+    반환된 상태는 복사본이므로 호출자가 변경해도 캐시에 영향이 없습니다.
+
+    Args:
+        up_to_id: 재구성 시 이 id 이하의 거래만 반영
+    """
+    found: Dict[int, RollingFraudState] = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        cached = _cache_get(user_id)
+        if cached is not None:
+            found[user_id] = cached
+        else:
+            missing.append(user_id)
+
+    if missing:
+        result = await db.execute(
+            select(UserFraudState).where(UserFraudState.user_id.in_(missing))
+        )
+        for row in result.scalars().all():
+            found[row.user_id] = _row_to_state(row)
+
+        not_stored = [user_id for user_id in missing if user_id not in found]
+        if not_stored:
+            found.update(await _build_from_transactions(db, not_stored, up_to_id))
+
+        for user_id in missing:
+            _cache_put(user_id, found[user_id])
+
+    loaded_ids = db.sync_session.info.setdefault(_LOADED_IDS_KEY, {})
+    for user_id, state in found.items():
+        loaded_ids[user_id] = state.last_transaction_id
+    return found
+
+
+def advance_fraud_states(
+    states: Dict[int, RollingFraudState],
+    rows: Iterable,
+    snapshot_ids: Set[int] = frozenset()
+) -> Dict[int, RollingFraudState]:
+    """
+    새 거래를 id 순으로 상태에 반영
+
+    Args:
+        states: load_fraud_states 결과 (제자리 갱신)
+        rows: id, user_id, amount 속성을 가진 거래 행 (id 오름차순)
+        snapshot_ids: 직전 상태를 스냅샷으로 남길 거래 id (점수화 대상)
+
+    Returns:
+        {거래 id: 해당 거래 직전의 상태}
+        (이미 상태에 반영된 거래는 정확한 직전 상태를 알 수 없으므로 제외)
+    """
+    snapshots: Dict[int, RollingFraudState] = {}
+    for row in rows:
+        state = states.setdefault(row.user_id, RollingFraudState())
+        if row.id in snapshot_ids and row.id > state.last_transaction_id:
+            snapshots[row.id] = state.copy()
+        state.push(row.id, float(row.amount), transaction_type(row))
+    return snapshots
+
+
+async def save_fraud_states(db: AsyncSession, states: Dict[int, RollingFraudState]) -> None:
+    """
+    상태 저장 (커밋은 호출자 책임)
+
+    커밋 전에 실패할 수 있으므로 해당 사용자 캐시를 비우고, 커밋된 뒤에 캐시에 넣습니다.
+
+    상태 행을 잠그고(FOR UPDATE), load_fraud_states 이후 다른 경로(실시간 점수화 / 스캐너)가
+    저장해 두었으면 어느 쪽도 상대가 반영한 거래를 모르므로 거래 테이블에서 윈도를 재구성해 저장합니다.
+    (윈도는 id 순이라 한쪽을 버리거나 덮어쓰면 빠진 거래가 영구히 반영되지 않음)
+    """
+    if not states:
+        return
+
+    result = await db.execute(
+        select(UserFraudState)
+        .where(UserFraudState.user_id.in_(list(states)))
+        .with_for_update()
+    )
+    rows = {row.user_id: row for row in result.scalars().all()}
+
+    loaded_ids = db.sync_session.info.get(_LOADED_IDS_KEY, {})
+    conflicted = [
+        user_id for user_id, state in states.items()
+        if user_id in rows
+        and (rows[user_id].last_transaction_id or 0) != loaded_ids.get(user_id, 0)
+    ]
+    if conflicted:
+        logger.info(f"Fraud state changed concurrently, rebuilding from transactions: {len(conflicted)} users")
+        states = {**states, **(await _build_from_transactions(db, conflicted))}
+
+    for user_id, state in states.items():
+        data = state.to_dict()
+        row = rows.get(user_id)
+        if row is None:
+            row = UserFraudState(user_id=user_id)
+            db.add(row)
+        row.log_amounts = json.dumps(data['log_amounts'])
+        row.types = json.dumps(data['types'])
+        row.last_transaction_id = data['last_transaction_id']
+        _state_cache.pop(user_id, None)
+        _cache_on_commit(db, user_id, state)
+
+
+async def invalidate_fraud_state(db: AsyncSession, user_id: int) -> None:
+    """
+    사용자 윈도 상태 삭제 (다음 조회 시 재구성, 커밋은 호출자 책임)
+
+    거래 삭제처럼 윈도에서 되돌리기 어려운 변경에 사용합니다.
+    """
+    await db.execute(delete(UserFraudState).where(UserFraudState.user_id == user_id))
+    _state_cache.pop(user_id, None)
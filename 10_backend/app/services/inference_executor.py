@@ -0,0 +1,193 @@
+"""
+Inference Executor
+CPU 연산(pandas 전처리 + XGBoost 추론)을 이벤트 루프 밖 워커 스레드에서 실행합니다.
+
+- 대용량 업로드 처리 중에도 다른 API 요청이 멈추지 않도록 전용 스레드풀 사용
+  (XGBoost 추론은 GIL을 해제하므로 스레드풀로 병렬 처리 가능)
+- 동시 실행 수 제한 (INFERENCE_MAX_CONCURRENCY)과 대기열 상한 (INFERENCE_MAX_QUEUE)
+- 대기열 깊이 / 실행 중 작업 수 / 대기·실행 시간 메트릭 제공
+
+사용 예:
+    result = await run_inference(model.predict, df)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import os
+import threading
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_CPU_COUNT = os.cpu_count() or 1
+
+# 설정 (환경 변수로 변경 가능)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", min(4, _CPU_COUNT)))
+INFERENCE_MAX_CONCURRENCY = int(os.getenv("INFERENCE_MAX_CONCURRENCY", INFERENCE_WORKERS))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", 100))
+# 워커당 XGBoost 스레드 수 (워커 수 x nthread가 코어 수를 넘지 않도록)
+INFERENCE_NTHREAD = int(os.getenv("INFERENCE_NTHREAD", max(1, _CPU_COUNT // max(1, INFERENCE_MAX_CONCURRENCY))))
+
+TIMING_WINDOW = 1000  # 백분위 계산에 쓰는 최근 작업 수
+
+
+class InferenceQueueFullError(Exception):
+    """대기열이 가득 차 추론 요청을 받을 수 없음"""
+    pass
+
+
+class InferenceExecutor:
+    """동시 실행 수가 제한된 추론 전용 스레드풀"""
+
+    def __init__(
+        self,
+        max_workers: int = INFERENCE_WORKERS,
+        max_concurrency: int = INFERENCE_MAX_CONCURRENCY,
+        max_queue: int = INFERENCE_MAX_QUEUE
+    ):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._max_queued = 0
+        self._wait_times = deque(maxlen=TIMING_WINDOW)
+        self._run_times = deque(maxlen=TIMING_WINDOW)
+
+    def _ensure_started(self) -> asyncio.Semaphore:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        # 세마포어는 이벤트 루프에 묶이므로 루프가 바뀌면 다시 생성
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        func(*args, **kwargs)를 워커 스레드에서 실행하고 결과 반환
+
+        Raises:
+            InferenceQueueFullError: 대기 중인 작업이 max_queue 이상일 때
+        """
+        semaphore = self._ensure_started()
+
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise InferenceQueueFullError(f"Inference queue is full ({self._queued} waiting)")
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        enqueued_at = time.perf_counter()
+        try:
+            await semaphore.acquire()
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+            raise
+
+        started_at = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_times.append(started_at - enqueued_at)
+
+        failed = False
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, partial(func, *args, **kwargs))
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            semaphore.release()
+            with self._lock:
+                self._running -= 1
+                self._run_times.append(time.perf_counter() - started_at)
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """대기열 깊이, 실행 중 작업 수, 대기/실행 시간 백분위 (ms)"""
+        with self._lock:
+            wait_times = np.fromiter(self._wait_times, dtype=float)
+            run_times = np.fromiter(self._run_times, dtype=float)
+            counters = {
+                "queue_depth": self._queued,
+                "max_queue_depth": self._max_queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+        def percentiles(values):
+            if not values.size:
+                return {"p50_ms": None, "p99_ms": None}
+            p50, p99 = np.percentile(values, [50, 99]) * 1000
+            return {"p50_ms": round(float(p50), 3), "p99_ms": round(float(p99), 3)}
+
+        return {
+            "workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "xgboost_nthread": INFERENCE_NTHREAD,
+            **counters,
+            "wait": percentiles(wait_times),
+            "run": percentiles(run_times),
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+# ============================================================
+# 싱글톤
+# ============================================================
+
+_executor = InferenceExecutor()
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """전역 추론 실행기 반환"""
+    return _executor
+
+
+async def run_inference(func: Callable, *args, **kwargs) -> Any:
+    """전역 추론 실행기에서 func 실행"""
+    return await _executor.run(func, *args, **kwargs)
+
+
+def configure_model_threads(model: Any) -> None:
+    """XGBoost 모델의 내부 스레드 수를 워커 수에 맞게 조정 (과다 구독 방지)"""
+    try:
+        if hasattr(model, "get_booster"):
+            model.set_params(n_jobs=INFERENCE_NTHREAD)
+            model.get_booster().set_param({"nthread": INFERENCE_NTHREAD})
+    except Exception as e:
+        logger.warning(f"Failed to configure model threads: {e}")
+
+
+def shutdown_inference_executor() -> None:
+    """앱 종료 시 스레드풀 정리"""
+    _executor.shutdown()
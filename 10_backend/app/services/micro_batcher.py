@@ -0,0 +1,145 @@
+"""
+Micro Batcher
+동시에 들어오는 단건 추론 요청을 짧은 시간 동안 모아 한 번에 처리합니다.
+
+- 첫 요청 도착 후 max_wait_ms가 지나거나 max_batch_size개가 모이면 배치 실행
+- 배치 처리 함수는 추론 실행기(워커 스레드)에서 실행되며 동시 실행 제한을 따름
+- 결과는 요청 순서대로 각 대기 요청에 되돌려줌
+  (처리 함수가 특정 항목에 대해 Exception 객체를 반환하면 그 요청만 실패)
+
+사용 예:
+    batcher = MicroBatcher(process_batch, max_batch_size=64, max_wait_ms=5)
+    result = await batcher.submit(item)
+"""
+
+from collections import deque
+from typing import Any, Callable, List, Optional, Dict, Set
+import asyncio
+import time
+import logging
+
+import numpy as np
+
+from app.services.inference_executor import run_inference
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_WINDOW = 1000  # 배치 크기 통계에 쓰는 최근 배치 수
+
+
+class MicroBatcher:
+    """단건 요청을 모아 배치 처리 함수 한 번으로 실행하는 비동기 배처"""
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 5.0,
+        name: str = "batcher"
+    ):
+        """
+        Args:
+            process_batch: 항목 리스트 → 같은 길이의 결과 리스트 (동기 함수, 워커 스레드에서 실행)
+            max_batch_size: 배치당 최대 항목 수
+            max_wait_ms: 첫 항목 도착 후 배치 실행까지 최대 대기 시간 (밀리초)
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self.name = name
+
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop = None
+        self._tasks: Set[asyncio.Task] = set()  # 실행 중인 배치 태스크 (완료 전 GC 방지)
+
+        self._batches = 0
+        self._items = 0
+        self._failed_batches = 0
+        self._batch_sizes = deque(maxlen=BATCH_SIZE_WINDOW)
+        self._batch_seconds = deque(maxlen=BATCH_SIZE_WINDOW)
+
+    async def submit(self, item: Any) -> Any:
+        """항목 하나를 배치에 넣고 결과를 기다림"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 이벤트 루프가 바뀌면 이전 루프의 대기 항목은 버림
+            self._pending = []
+            self._timer = None
+            self._tasks = set()
+            self._loop = loop
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """대기 중인 항목을 배치로 떼어내 실행 태스크 생성"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple]) -> None:
+        items = [item for item, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = await run_inference(self.process_batch, items)
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name}: expected {len(batch)} results, got {len(results)}")
+        except Exception as e:
+            self._failed_batches += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._batches += 1
+            self._items += len(batch)
+            self._batch_sizes.append(len(batch))
+            self._batch_seconds.append(time.perf_counter() - start)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                # 클라이언트 연결 종료 등으로 취소된 요청
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """배치 수, 평균/최대 배치 크기, 배치 처리 시간 p50/p99 (ms)"""
+        sizes = np.fromiter(self._batch_sizes, dtype=float)
+        seconds = np.fromiter(self._batch_seconds, dtype=float)
+
+        batch_ms = {"p50_ms": None, "p99_ms": None}
+        if seconds.size:
+            p50, p99 = np.percentile(seconds, [50, 99]) * 1000
+            batch_ms = {"p50_ms": round(float(p50), 3), "p99_ms": round(float(p99), 3)}
+
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "pending": len(self._pending),
+            "running_batches": len(self._tasks),
+            "batches": self._batches,
+            "items": self._items,
+            "failed_batches": self._failed_batches,
+            "avg_batch_size": round(float(sizes.mean()), 2) if sizes.size else None,
+            "max_batch_size_seen": int(sizes.max()) if sizes.size else None,
+            "batch_time": batch_ms,
+        }
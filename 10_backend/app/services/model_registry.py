@@ -0,0 +1,343 @@
+"""
+ML Model Registry
+카테고리 분류 / 이상거래 탐지 모델을 한 곳에서 관리합니다.
+
+- 앱 시작 시 모델을 미리 로드 (첫 요청이 joblib 로드 비용을 부담하지 않음)
+- 모델별로 여러 버전을 동시에 보관하고, 활성 버전을 원자적으로 교체
+  (요청 처리 중인 코드는 자신이 받은 ModelVersion 객체를 끝까지 사용)
+- 버전별 로드 시간, 메모리 사용량(추정), 추론 지연 시간 통계 제공
+
+사용 예:
+    registry = get_registry()
+    category_model = registry.get(CATEGORY_MODEL)
+    if category_model is not None:
+        category_model.predict(df)
+"""
+
+from collections import deque
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Callable
+import hashlib
+import os
+import threading
+import time
+import logging
+
+import joblib
+import numpy as np
+
+from app.services.inference_executor import configure_model_threads
+from app.services.fast_inference import build_fast_predictor
+
+logger = logging.getLogger(__name__)
+
+# 모델 이름
+CATEGORY_MODEL = "category"
+FRAUD_MODEL = "fraud"
+
+# 기본 모델 경로 (환경 변수로 변경 가능)
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODEL_PATHS = {
+    CATEGORY_MODEL: os.getenv(
+        "CATEGORY_MODEL_PATH",
+        os.path.join(_APP_DIR, "model_xgboost_acc_73.47.joblib")
+    ),
+    FRAUD_MODEL: os.getenv(
+        "FRAUD_MODEL_PATH",
+        os.path.join(_APP_DIR, "models", "paysim_generic_no_flag_featplus.joblib")
+    ),
+}
+
+MAX_VERSIONS_PER_MODEL = 3   # 모델별 보관할 최대 버전 수 (활성 버전 제외 오래된 것부터 해제)
+LATENCY_WINDOW = 1000        # 지연 시간 백분위 계산에 쓰는 최근 호출 수
+
+
+# ============================================================
+# 모델 버전
+# ============================================================
+
+class ModelVersion:
+    """
+    로드된 모델 한 버전
+
+    predict / predict_proba 호출 시 지연 시간을 기록하며,
+    그 외 속성(classes_ 등)은 원본 모델로 위임합니다.
+    XGBoost 모델은 가능하면 inplace_predict 기반 빠른 경로(fast)로 예측합니다.
+    """
+
+    def __init__(self, name: str, version: str, model: Any, path: Optional[str], load_seconds: float):
+        self.name = name
+        self.version = version
+        self.model = model
+        self.path = path
+        self.load_seconds = load_seconds
+        self.loaded_at = datetime.now()
+        self.memory_bytes = _estimate_model_bytes(model, path)
+        self.fast = build_fast_predictor(model)
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._calls = 0
+        self._rows = 0
+        self._total_seconds = 0.0
+
+    def __getattr__(self, attr):
+        # __init__에서 설정하지 않은 속성은 원본 모델로 위임
+        model = self.__dict__.get("model")
+        if model is None:
+            raise AttributeError(attr)
+        return getattr(model, attr)
+
+    def _record(self, elapsed: float, rows: int) -> None:
+        with self._lock:
+            self._latencies.append(elapsed)
+            self._calls += 1
+            self._rows += rows
+            self._total_seconds += elapsed
+
+    def _timed(self, method: Callable, X, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(X, *args, **kwargs)
+        finally:
+            self._record(time.perf_counter() - start, len(X) if hasattr(X, "__len__") else 1)
+
+    def predict(self, X, *args, **kwargs):
+        if self.fast is not None and not args and not kwargs:
+            return self._timed(self.fast.predict, X)
+        return self._timed(self.model.predict, X, *args, **kwargs)
+
+    def predict_proba(self, X, *args, **kwargs):
+        if self.fast is not None and not args and not kwargs:
+            return self._timed(self.fast.predict_proba, X)
+        return self._timed(self.model.predict_proba, X, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """버전 메타데이터 + 지연 시간 통계 (ms)"""
+        with self._lock:
+            latencies = np.fromiter(self._latencies, dtype=float)
+            calls, rows, total = self._calls, self._rows, self._total_seconds
+
+        latency = {"p50_ms": None, "p99_ms": None, "max_ms": None, "avg_ms": None}
+        if latencies.size:
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            latency = {
+                "p50_ms": round(float(p50), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(latencies.max()) * 1000, 3),
+                "avg_ms": round(total / calls * 1000, 3),
+            }
+
+        return {
+            "version": self.version,
+            "path": self.path,
+            "model_class": type(self.model).__name__,
+            "loaded_at": self.loaded_at.isoformat(),
+            "load_seconds": round(self.load_seconds, 4),
+            "memory_bytes": self.memory_bytes,
+            "fast_inference": self.fast is not None,
+            "calls": calls,
+            "rows": rows,
+            "latency": latency,
+        }
+
+
+def _estimate_model_bytes(model: Any, path: Optional[str]) -> Optional[int]:
+    """모델 메모리 사용량 추정 (XGBoost는 부스터 직렬화 크기, 그 외 파일 크기)"""
+    try:
+        if hasattr(model, "get_booster"):
+            return len(model.get_booster().save_raw())
+    except Exception:
+        pass
+    if path and os.path.exists(path):
+        return os.path.getsize(path)
+    return None
+
+
+def resolve_model_path(filename: str) -> str:
+    """
+    관리자 API로 받은 모델 파일명을 app 디렉토리 내부 경로로 변환
+
+    joblib 파일은 로드 시 임의 코드를 실행할 수 있으므로 app/ 및 app/models/ 밖의 파일은 거부합니다.
+
+    Raises:
+        ValueError: 허용 디렉토리 밖의 경로
+        FileNotFoundError: 파일이 없을 때
+    """
+    allowed_dirs = [os.path.realpath(_APP_DIR), os.path.realpath(os.path.join(_APP_DIR, "models"))]
+    for base in reversed(allowed_dirs):
+        candidate = os.path.realpath(os.path.join(base, filename))
+        if os.path.dirname(candidate) not in allowed_dirs:
+            raise ValueError(f"Model path outside allowed directories: {filename}")
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(f"Model file not found: {filename}")
+
+
+def _file_version(path: str) -> str:
+    """파일 내용 해시 앞 12자리를 버전으로 사용"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+# ============================================================
+# 레지스트리
+# ============================================================
+
+class ModelRegistry:
+    """모델 이름별 버전 목록과 활성 버전을 관리하는 레지스트리"""
+
+    def __init__(self, max_versions: int = MAX_VERSIONS_PER_MODEL):
+        self.max_versions = max_versions
+        self._lock = threading.RLock()
+        self._versions: Dict[str, Dict[str, ModelVersion]] = {}
+        self._active: Dict[str, str] = {}
+
+    def get(self, name: str, version: Optional[str] = None) -> Optional[ModelVersion]:
+        """활성(또는 지정) 버전 반환, 없으면 None"""
+        with self._lock:
+            versions = self._versions.get(name, {})
+            if version is None:
+                version = self._active.get(name)
+            return versions.get(version) if version else None
+
+    def load(
+        self,
+        name: str,
+        path: Optional[str] = None,
+        version: Optional[str] = None,
+        activate: bool = True
+    ) -> ModelVersion:
+        """
+        joblib 모델 파일을 로드해 새 버전으로 등록
+
+        파일 로드는 잠금 밖에서 수행하므로 기존 버전 서빙을 막지 않습니다.
+
+        Raises:
+            FileNotFoundError: 모델 파일이 없을 때
+        """
+        path = path or DEFAULT_MODEL_PATHS.get(name)
+        if not path or not os.path.exists(path):
+            raise FileNotFoundError(f"Model file not found: {path}")
+
+        version = version or _file_version(path)
+        existing = self.get(name, version)
+        if existing is not None:
+            if activate:
+                self.activate(name, version)
+            return existing
+
+        start = time.perf_counter()
+        model = joblib.load(path)
+        load_seconds = time.perf_counter() - start
+        configure_model_threads(model)
+
+        model_version = ModelVersion(name, version, model, path, load_seconds)
+        self.register(model_version, activate=activate)
+        logger.info(f"Model '{name}' version {version} loaded in {load_seconds:.2f}s ({os.path.basename(path)})")
+        return model_version
+
+    def register(self, model_version: ModelVersion, activate: bool = True) -> None:
+        """이미 로드된 모델 버전 등록 (테스트/외부 로더용)"""
+        with self._lock:
+            versions = self._versions.setdefault(model_version.name, {})
+            versions[model_version.version] = model_version
+            if activate or model_version.name not in self._active:
+                self._active[model_version.name] = model_version.version
+            self._evict(model_version.name)
+
+    def activate(self, name: str, version: str) -> ModelVersion:
+        """
+        활성 버전 교체 (원자적)
+
+        Raises:
+            KeyError: 등록되지 않은 버전
+        """
+        with self._lock:
+            model_version = self._versions.get(name, {}).get(version)
+            if model_version is None:
+                raise KeyError(f"Model '{name}' version '{version}' is not loaded")
+            previous = self._active.get(name)
+            self._active[name] = version
+        logger.info(f"Model '{name}' active version: {previous} -> {version}")
+        return model_version
+
+    def unload(self, name: str, version: str) -> None:
+        """
+        비활성 버전 해제
+
+        Raises:
+            KeyError: 등록되지 않은 버전
+            ValueError: 활성 버전을 해제하려 할 때
+        """
+        with self._lock:
+            if version not in self._versions.get(name, {}):
+                raise KeyError(f"Model '{name}' version '{version}' is not loaded")
+            if self._active.get(name) == version:
+                raise ValueError("Cannot unload the active version")
+            del self._versions[name][version]
+
+    def _evict(self, name: str) -> None:
+        """보관 한도를 넘으면 활성 버전을 제외한 가장 오래된 버전부터 해제"""
+        versions = self._versions[name]
+        while len(versions) > self.max_versions:
+            candidates = [v for v in versions.values() if v.version != self._active.get(name)]
+            oldest = min(candidates, key=lambda v: v.loaded_at)
+            del versions[oldest.version]
+            logger.info(f"Model '{name}' version {oldest.version} evicted")
+
+    def status(self) -> Dict[str, Any]:
+        """모델별 활성 버전 및 버전별 통계"""
+        with self._lock:
+            snapshot = {
+                name: (self._active.get(name), list(versions.values()))
+                for name, versions in self._versions.items()
+            }
+        return {
+            name: {
+                "active_version": active,
+                "versions": [v.stats() for v in versions],
+            }
+            for name, (active, versions) in snapshot.items()
+        }
+
+
+# ============================================================
+# 싱글톤 / 시작 시 로드
+# ============================================================
+
+_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    """전역 모델 레지스트리 반환"""
+    return _registry
+
+
+def get_active_model(name: str) -> Optional[ModelVersion]:
+    """활성 모델 버전 반환 (로드되지 않았으면 None, 요청 중 로드하지 않음)"""
+    return _registry.get(name)
+
+
+def load_default_models(names: Optional[List[str]] = None) -> Dict[str, bool]:
+    """
+    기본 경로의 모델들을 로드 (앱 시작 시 호출)
+
+    Returns:
+        {모델 이름: 로드 성공 여부}
+    """
+    loaded = {}
+    for name in names or list(DEFAULT_MODEL_PATHS):
+        try:
+            _registry.load(name)
+            loaded[name] = True
+        except FileNotFoundError as e:
+            logger.warning(f"Model '{name}' not loaded: {e}")
+            loaded[name] = False
+        except Exception as e:
+            logger.error(f"Failed to load model '{name}': {e}")
+            loaded[name] = False
+    return loaded
@@ -0,0 +1,217 @@
+"""
+Next Category Prediction Service Layer
+다중 사용자 "다음 소비 카테고리" 배치 예측
+
+사용자 피처 저장소(user_feature_stats)의 누적 통계로 사용자별 피처를 만들고
+predict_proba 한 번으로 채점합니다. 거래 이력 전체를 다시 읽지 않습니다.
+결과는 next_category_predictions 테이블에 캐시됩니다.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, insert
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+from app.db.model.transaction import Transaction
+from app.db.model.user import User
+from app.db.model.prediction import NextCategoryPrediction
+from app.services.preprocessing import get_preprocessor
+from app.services.feature_store import get_user_stats
+from app.services.inference_executor import run_inference
+
+logger = logging.getLogger(__name__)
+
+# 모델 클래스 코드 → 카테고리명
+CATEGORY_NAMES = {
+    0: '교통', 1: '생활', 2: '쇼핑',
+    3: '식료품', 4: '외식', 5: '주유'
+}
+
+DEFAULT_BATCH_USERS = 500   # 한 번에 조회/채점할 사용자 수
+ACTIVE_DAYS = 90            # 최근 N일 내 거래가 있으면 활성 사용자
+
+
+# ============================================================
+# 스키마 (Pydantic Models)
+# ============================================================
+
+class NextCategoryResult(BaseModel):
+    user_id: int
+    predicted_category: str
+    predicted_category_code: int
+    confidence: float
+    probabilities: Dict[str, float]
+    transaction_count: int
+    last_transaction_at: Optional[datetime] = None
+    computed_at: Optional[datetime] = None
+
+
+# ============================================================
+# 서비스 함수들 (비즈니스 로직)
+# ============================================================
+
+async def list_active_user_ids(db: AsyncSession, days: int = ACTIVE_DAYS) -> List[int]:
+    """최근 N일 내 거래가 있는 일반 사용자 ID 목록"""
+    cutoff = datetime.now() - timedelta(days=days)
+    query = (
+        select(Transaction.user_id)
+        .join(User, Transaction.user_id == User.id)
+        .where(
+            Transaction.transaction_time >= cutoff,
+            User.is_superuser == False,
+            User.is_active == True
+        )
+        .distinct()
+        .order_by(Transaction.user_id)
+    )
+    result = await db.execute(query)
+    return [row[0] for row in result.fetchall()]
+
+
+def score_next_categories(
+    model,
+    stats: pd.DataFrame,
+    prediction_time: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    사용자별 다음 카테고리 예측 (predict_proba 1회 호출)
+
+    거래가 1건뿐인 사용자는 /ml/predict-next와 동일하게 균등 확률로 처리합니다.
+
+    Args:
+        model: predict_proba를 지원하는 카테고리 모델
+        stats: 사용자 누적 통계 (feature_store.get_user_stats 결과)
+        prediction_time: 예측 시점 (기본값: 현재 시간)
+
+    Returns:
+        사용자별 예측 결과 딕셔너리 리스트
+    """
+    if stats.empty:
+        return []
+
+    preprocessor = get_preprocessor()
+    features = preprocessor.preprocess_for_next_prediction_from_stats(stats, prediction_time)
+
+    proba = np.asarray(model.predict_proba(features), dtype=float)
+    classes = np.asarray(getattr(model, 'classes_', np.arange(proba.shape[1]))).astype(int)
+
+    # 단일 거래 사용자는 예측 신뢰도가 낮으므로 균등 확률 (외식)
+    tx_count = stats['tx_count'].reindex(features.index).to_numpy()
+    single = tx_count < 2
+    proba[single] = 1.0 / proba.shape[1]
+
+    codes = classes[proba.argmax(axis=1)]
+    codes[single] = 4
+    confidence = proba.max(axis=1)
+
+    last_tx = stats['last_transaction_at'].reindex(features.index)
+    category_names = [CATEGORY_NAMES.get(int(c), '기타') for c in classes]
+
+    return [
+        {
+            "user_id": int(user_id),
+            "predicted_category": CATEGORY_NAMES.get(int(code), '기타'),
+            "predicted_category_code": int(code),
+            "confidence": float(conf),
+            "probabilities": dict(zip(category_names, row.tolist())),
+            "transaction_count": int(count),
+            "last_transaction_at": last_time.to_pydatetime() if pd.notna(last_time) else None,
+        }
+        for user_id, code, conf, row, count, last_time
+        in zip(features.index, codes, confidence, proba, tx_count, last_tx)
+    ]
+
+
+async def save_predictions(db: AsyncSession, results: List[Dict[str, Any]]) -> None:
+    """예측 결과를 캐시 테이블에 저장 (사용자별 기존 행 교체)"""
+    if not results:
+        return
+
+    user_ids = [r["user_id"] for r in results]
+    await db.execute(delete(NextCategoryPrediction).where(NextCategoryPrediction.user_id.in_(user_ids)))
+
+    computed_at = datetime.now()
+    await db.execute(
+        insert(NextCategoryPrediction),
+        [
+            {
+                **r,
+                "probabilities": json.dumps(r["probabilities"], ensure_ascii=False),
+                "computed_at": computed_at,
+            }
+            for r in results
+        ]
+    )
+
+
+async def refresh_next_predictions(
+    db: AsyncSession,
+    model,
+    user_ids: Optional[List[int]] = None,
+    batch_size: int = DEFAULT_BATCH_USERS
+) -> List[Dict[str, Any]]:
+    """
+    사용자 목록(기본: 활성 사용자 전체)의 다음 카테고리 예측을 계산하고 캐시에 저장
+
+    batch_size 명씩 누적 통계 조회 → 벡터화 피처 생성 → predict_proba 1회 → 저장을 반복합니다.
+
+    Returns:
+        계산된 전체 예측 결과 리스트
+    """
+    if user_ids is None:
+        user_ids = await list_active_user_ids(db)
+
+    prediction_time = datetime.now()
+    all_results = []
+
+    for start in range(0, len(user_ids), batch_size):
+        batch_ids = user_ids[start:start + batch_size]
+        stats = await get_user_stats(db, batch_ids)
+        results = await run_inference(score_next_categories, model, stats, prediction_time)
+        await save_predictions(db, results)
+        await db.commit()
+        all_results.extend(results)
+
+    logger.info(f"Next category predictions refreshed: {len(all_results)} users")
+    return all_results
+
+
+async def predict_user_next_category(db: AsyncSession, model, user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    한 사용자의 다음 카테고리를 피처 저장소 통계로 즉시 예측 (캐시 테이블에 저장하지 않음)
+
+    Returns:
+        예측 결과 딕셔너리 (거래가 없는 사용자는 None)
+    """
+    stats = await get_user_stats(db, [user_id])
+    results = await run_inference(score_next_categories, model, stats)
+    if not results:
+        return None
+    return {**results[0], "computed_at": datetime.now()}
+
+
+async def get_cached_prediction(db: AsyncSession, user_id: int) -> Optional[NextCategoryResult]:
+    """캐시된 다음 카테고리 예측 조회 (없으면 None)"""
+    result = await db.execute(
+        select(NextCategoryPrediction).where(NextCategoryPrediction.user_id == user_id)
+    )
+    row = result.scalar_one_or_none()
+    if not row:
+        return None
+
+    return NextCategoryResult(
+        user_id=row.user_id,
+        predicted_category=row.predicted_category,
+        predicted_category_code=row.predicted_category_code,
+        confidence=row.confidence,
+        probabilities=json.loads(row.probabilities) if row.probabilities else {},
+        transaction_count=row.transaction_count,
+        last_transaction_at=row.last_transaction_at,
+        computed_at=row.computed_at
+    )
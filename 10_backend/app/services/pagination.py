@@ -0,0 +1,107 @@
+"""
+Keyset Pagination
+거래 목록 커서 페이지네이션 공용 헬퍼
+
+- 정렬 키 (transaction_time DESC, id DESC)의 마지막 행 위치를 불투명 커서 토큰으로 인코딩
+- 다음 페이지는 OFFSET 대신 (transaction_time, id) < (커서) 조건으로 조회 → 깊은 페이지도 일정한 비용
+- 총 개수는 선택: exact (COUNT), approximate (TTL 캐시 / pg_class.reltuples), none
+
+사용 예:
+    position = decode_cursor(cursor)
+    next_cursor = encode_cursor(rows[-1].transaction_time, rows[-1].id)
+"""
+
+from datetime import datetime
+from collections import OrderedDict
+from typing import Optional, Tuple, Hashable, Callable, Awaitable
+import base64
+import json
+import time
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 10000            # 사용자 앱은 전체 목록을 한 번에 불러옴 (page_size=10000)
+COUNT_MODES = ("exact", "approximate", "none")
+COUNT_CACHE_TTL_SECONDS = 60     # approximate 모드에서 같은 조건의 COUNT 결과 재사용 시간
+COUNT_CACHE_MAX_KEYS = 1000
+
+# 조건 키 → (만료 시각, 개수)
+_count_cache: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+
+class InvalidCursorError(ValueError):
+    """커서 토큰을 해석할 수 없음"""
+    pass
+
+
+# ============================================================
+# 커서 토큰
+# ============================================================
+
+def encode_cursor(transaction_time: datetime, transaction_id: int) -> str:
+    """마지막 행의 (transaction_time, id) → URL-safe 토큰"""
+    payload = json.dumps({"t": transaction_time.isoformat(), "id": int(transaction_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    토큰 → (transaction_time, id)
+
+    Raises:
+        InvalidCursorError: 형식이 잘못된 토큰
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), int(payload["id"])
+    except Exception as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+
+
+# ============================================================
+# 총 개수
+# ============================================================
+
+async def estimate_table_rows(db: AsyncSession, table_name: str) -> Optional[int]:
+    """통계 기반 테이블 행 수 추정 (PostgreSQL pg_class.reltuples, 그 외/통계 없음은 None)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    estimate = await db.scalar(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": table_name}
+    )
+    # ANALYZE 전에는 -1 (PostgreSQL 14+) 또는 0
+    if estimate is None or estimate <= 0:
+        return None
+    return int(estimate)
+
+
+async def cached_count(key: Hashable, count: Callable[[], Awaitable[int]]) -> int:
+    """
+    같은 조건의 COUNT 결과를 COUNT_CACHE_TTL_SECONDS 동안 재사용 (approximate 모드)
+
+    Args:
+        key: 필터 조건을 나타내는 해시 가능한 값
+        count: 캐시에 없을 때 실행할 COUNT 코루틴 함수
+    """
+    entry = _count_cache.get(key)
+    if entry is not None and entry[0] >= time.monotonic():
+        _count_cache.move_to_end(key)
+        return entry[1]
+
+    value = await count()
+    _count_cache[key] = (time.monotonic() + COUNT_CACHE_TTL_SECONDS, value)
+    _count_cache.move_to_end(key)
+    while len(_count_cache) > COUNT_CACHE_MAX_KEYS:
+        _count_cache.popitem(last=False)
+    return value
+
+
+def clear_count_cache() -> None:
+    """COUNT 캐시 전체 삭제"""
+    _count_cache.clear()
@@ -5,6 +5,20 @@ import os
 from datetime import datetime
 from typing import Dict, List, Any, Tuple
 
+# "다음 카테고리" 모델의 카테고리 코드 (매핑 없는 카테고리는 6: 기타)
+NEXT_CATEGORY_MAP = {
+    '교통': 0, '생활': 1, '쇼핑': 2, '식료품': 3, '외식': 4, '주유': 5,
+    '식비': 4, '카페': 4, '간식': 3, '마트': 3, '편의점': 3,
+    '카페/간식': 4
+}
+
+# 사용자 누적 통계 컬럼 (user_feature_stats 테이블과 동일)
+USER_STATS_COLUMNS = (
+    ['tx_count', 'amount_sum', 'amount_sq_sum']
+    + [f'cat{code}_count' for code in range(7)]
+    + ['last_transaction_at', 'last_category_code']
+)
+
 class DataPreprocessor:
     """
     LightGBM 모델(v1.0)을 위한 데이터 전처리 클래스
@@ -58,12 +72,15 @@ class DataPreprocessor:
         else:
             raise ValueError("지원하지 않는 메타데이터 형식입니다.")
         
-    def preprocess(self, df: pd.DataFrame) -> pd.DataFrame:
+    def preprocess(self, df: pd.DataFrame, independent_rows: bool = False) -> pd.DataFrame:
         """
         전체 전처리 파이프라인 실행
         
         Args:
             df: 원본 DataFrame (CSV 로드 결과)
+            independent_rows: True면 각 행을 서로 무관한 단건 거래로 취급
+                (단건 예측 요청을 한 DataFrame으로 묶어 처리할 때 사용,
+                 행별 결과가 한 행씩 따로 전처리한 것과 동일)
             
         Returns:
             모델 입력용 DataFrame (24개 feature for XGBoost)
@@ -72,7 +89,7 @@ class DataPreprocessor:
         df_clean = self._clean_data(df)
         
         # 2. Feature Engineering (파생변수 생성)
-        df_engineered = self._feature_engineering(df_clean)
+        df_engineered = self._feature_engineering(df_clean, independent_rows=independent_rows)
         
         # 3. Scaling (정규화) - XGBoost는 스케일링 불필요
         if self.feature_stats is not None:
@@ -282,6 +299,152 @@ class DataPreprocessor:
 
         return pd.DataFrame([features])
 
+    def preprocess_for_next_prediction_batch(self, history: pd.DataFrame, prediction_time: datetime = None) -> pd.DataFrame:
+        """
+        여러 사용자의 "다음 거래" 피처를 한 번에 생성 (배치 예측용)
+
+        preprocess_for_next_prediction과 동일한 피처를 사용자별 groupby 집계로
+        한 번에 계산합니다. 행 단위 반복 없이 사용자 수만큼의 행을 반환합니다.
+
+        Args:
+            history: 정제된 거래 이력 DataFrame
+                (user_id, CreateDate, Amount, 대분류 컬럼 필요)
+            prediction_time: 예측 시점 (기본값: 현재 시간)
+
+        Returns:
+            user_id 인덱스를 가진 DataFrame (사용자당 1행, 모델 입력 컬럼 순서)
+        """
+        stats = self.aggregate_user_stats(history)
+        return self.preprocess_for_next_prediction_from_stats(stats, prediction_time)
+
+    def aggregate_user_stats(self, history: pd.DataFrame) -> pd.DataFrame:
+        """
+        거래 이력을 사용자별 누적 통계로 집계
+
+        결과 형식은 사용자 피처 저장소(user_feature_stats)와 동일하므로
+        저장소 값을 그대로 preprocess_for_next_prediction_from_stats에 넘길 수 있습니다.
+
+        Args:
+            history: user_id, CreateDate, Amount, 대분류 컬럼의 DataFrame
+
+        Returns:
+            user_id 인덱스, USER_STATS_COLUMNS 컬럼의 DataFrame
+        """
+        df = history.sort_values(['user_id', 'CreateDate'], kind='stable').reset_index(drop=True)
+        category_encoded = df['대분류'].map(NEXT_CATEGORY_MAP).fillna(6).astype(int)
+        amount = df['Amount'].astype(float)
+
+        grouped = pd.DataFrame({
+            'user_id': df['user_id'],
+            'amount': amount,
+            'amount_sq': amount * amount,
+        }).groupby('user_id', sort=True)
+
+        stats = pd.DataFrame({
+            'tx_count': grouped['amount'].count(),
+            'amount_sum': grouped['amount'].sum(),
+            'amount_sq_sum': grouped['amount_sq'].sum(),
+        })
+
+        # 사용자 x 카테고리 코드(0~6) 건수
+        cat_counts = pd.crosstab(df['user_id'], category_encoded)
+        cat_counts = cat_counts.reindex(columns=range(7), fill_value=0).reindex(stats.index, fill_value=0)
+        for code in range(7):
+            stats[f'cat{code}_count'] = cat_counts[code].to_numpy()
+
+        last_idx = df.groupby('user_id', sort=True).tail(1).index
+        stats['last_transaction_at'] = df.loc[last_idx, 'CreateDate'].to_numpy()
+        stats['last_category_code'] = category_encoded.loc[last_idx].to_numpy()
+        return stats[USER_STATS_COLUMNS]
+
+    def preprocess_for_next_prediction_from_stats(self, stats: pd.DataFrame, prediction_time: datetime = None) -> pd.DataFrame:
+        """
+        사용자별 누적 통계에서 "다음 거래" 피처 생성 (O(사용자 수))
+
+        평균/표준편차는 합계·제곱합으로부터 계산하므로 거래 이력을 다시 읽지 않습니다.
+
+        Args:
+            stats: aggregate_user_stats 결과 또는 피처 저장소 값 (user_id 인덱스)
+            prediction_time: 예측 시점 (기본값: 현재 시간)
+
+        Returns:
+            user_id 인덱스를 가진 DataFrame (사용자당 1행, 모델 입력 컬럼 순서)
+        """
+        if prediction_time is None:
+            prediction_time = datetime.now()
+
+        # ---------------------------------------------------------
+        # 1. 사용자별 금액/거래 통계
+        # ---------------------------------------------------------
+        tx_count = stats['tx_count'].astype(np.int64)
+        n = tx_count.astype(float)
+        avg_amount = stats['amount_sum'] / n
+        # 표본 표준편차 (ddof=1), 거래 1건이면 0
+        variance = (stats['amount_sq_sum'] - stats['amount_sum'] ** 2 / n) / (n - 1).where(n > 1)
+        std_amount = np.sqrt(variance.clip(lower=0)).fillna(0)
+
+        last_time = pd.to_datetime(stats['last_transaction_at'])
+        # 마지막 거래의 카테고리 (매핑 없으면 외식)
+        last_code = stats['last_category_code']
+        prev_category = last_code.where(last_code.between(0, 5), 4).astype(float)
+
+        # ---------------------------------------------------------
+        # 2. 사용자별 카테고리 분포 (사용자 x 카테고리 코드)
+        # ---------------------------------------------------------
+        cat_counts = stats[[f'cat{code}_count' for code in range(7)]].copy()
+        cat_counts.columns = range(7)
+        # mode()[0]과 동일: 최빈값이 여러 개면 가장 작은 코드
+        fav_category = cat_counts.idxmax(axis=1).astype(float)
+        category_count = (cat_counts > 0).sum(axis=1)
+        ratios = cat_counts.div(n, axis=0)
+
+        # ---------------------------------------------------------
+        # 3. 피처 구성 (prediction_time 기준 시간 피처는 전체 공통)
+        # ---------------------------------------------------------
+        hour = prediction_time.hour
+        is_weekend = 1 if prediction_time.weekday() >= 5 else 0
+
+        features = pd.DataFrame(index=stats.index)
+        features['Hour'] = hour
+        features['DayOfWeek'] = prediction_time.weekday()
+        features['DayOfMonth'] = prediction_time.day
+        features['IsWeekend'] = is_weekend
+        features['IsLunchTime'] = 1 if 11 <= hour <= 13 else 0
+        features['IsEvening'] = 1 if 18 <= hour <= 20 else 0
+        features['IsMorningRush'] = 1 if 7 <= hour <= 9 else 0
+        features['IsNight'] = 1 if hour >= 22 or hour <= 4 else 0
+        features['IsBusinessHour'] = 1 if (9 <= hour <= 17) and is_weekend == 0 else 0
+
+        features['Amount'] = avg_amount
+        features['Amount_log'] = np.log1p(avg_amount.abs())
+        features['AmountBin_encoded'] = avg_amount.abs() // 5000
+
+        features['User_AvgAmount'] = avg_amount
+        features['User_StdAmount'] = std_amount
+        features['User_TxCount'] = tx_count
+
+        features['Time_Since_Last'] = (pd.Timestamp(prediction_time) - last_time).dt.total_seconds() / 60
+        features['Transaction_Sequence'] = 1.0
+
+        features['Previous_Category_encoded'] = prev_category
+        features['Current_Category_encoded'] = fav_category
+        features['User_FavCategory_encoded'] = fav_category
+        features['User_Category_Count'] = category_count
+
+        for code, name in enumerate(['교통', '생활', '쇼핑', '식료품', '외식', '주유']):
+            features[f'User_{name}_Ratio'] = ratios[code]
+
+        # XGBoost 피처명 호환을 위한 별칭
+        features['Amount_clean'] = features['Amount']
+        features['AmountBin'] = features['AmountBin_encoded']
+        features['Previous_Category'] = features['Previous_Category_encoded']
+
+        if self.feature_stats is not None:
+            features = self._apply_scaling(features)
+
+        available_features = [f for f in self.feature_names if f in features.columns]
+        return features[available_features]
+
     def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """데이터 정제"""
         df = df.copy()
@@ -293,7 +456,7 @@ class DataPreprocessor:
         df['CreateDate'] = pd.to_datetime(df['날짜'] + ' ' + df['시간'])
         
         # 금액 처리 (문자열 -> 숫자)
-        if df['금액'].dtype == object:
+        if not pd.api.types.is_numeric_dtype(df['금액']):
             df['Amount'] = pd.to_numeric(df['금액'].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
         else:
             df['Amount'] = df['금액'].fillna(0)
@@ -303,12 +466,13 @@ class DataPreprocessor:
         
         return df
         
-    def _feature_engineering(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _feature_engineering(self, df: pd.DataFrame, independent_rows: bool = False) -> pd.DataFrame:
         """
         27개 Feature 생성
         
         주의: 실제 사용자 전체 히스토리가 아닌 업로드된 CSV 내에서만 통계를 계산하므로
         일부 누적 통계(User_AvgAmount 등)는 정확하지 않을 수 있습니다.
+        independent_rows=True면 사용자/순서 피처를 행마다 단건 거래 기준으로 계산합니다.
         """
         df = df.copy()
         
@@ -322,23 +486,27 @@ class DataPreprocessor:
         # ---------------------------------------------------------
         # 2. Boolean Time Features (0 or 1)
         # ---------------------------------------------------------
+        # 행 단위 apply 대신 컬럼 전체 비교 연산으로 계산 (대용량 CSV 대응)
+        hour = df['Hour']
+        
         # 주말 여부 (토, 일)
-        df['IsWeekend'] = df['DayOfWeek'].apply(lambda x: 1 if x >= 5 else 0)
+        is_weekend = df['DayOfWeek'] >= 5
+        df['IsWeekend'] = is_weekend.astype(np.int64)
         
         # 점심 시간 (11:00 ~ 13:59)
-        df['IsLunchTime'] = df['Hour'].apply(lambda x: 1 if 11 <= x <= 13 else 0)
+        df['IsLunchTime'] = hour.between(11, 13).astype(np.int64)
         
         # 저녁 시간 (18:00 ~ 20:59)
-        df['IsEvening'] = df['Hour'].apply(lambda x: 1 if 18 <= x <= 20 else 0)
+        df['IsEvening'] = hour.between(18, 20).astype(np.int64)
         
         # 아침 출근 시간 (07:00 ~ 09:59)
-        df['IsMorningRush'] = df['Hour'].apply(lambda x: 1 if 7 <= x <= 9 else 0)
+        df['IsMorningRush'] = hour.between(7, 9).astype(np.int64)
         
         # 심야 시간 (22:00 ~ 04:59)
-        df['IsNight'] = df['Hour'].apply(lambda x: 1 if x >= 22 or x <= 4 else 0)
+        df['IsNight'] = ((hour >= 22) | (hour <= 4)).astype(np.int64)
         
         # 업무 시간 (09:00 ~ 17:59, 주말 제외)
-        df['IsBusinessHour'] = df.apply(lambda row: 1 if (9 <= row['Hour'] <= 17) and (row['IsWeekend'] == 0) else 0, axis=1)
+        df['IsBusinessHour'] = (hour.between(9, 17) & ~is_weekend).astype(np.int64)
         
         # ---------------------------------------------------------
         # 3. Amount Features
@@ -415,6 +583,23 @@ class DataPreprocessor:
         df['User_외식_Ratio'] = cat_counts.get(4, 0) / total_count
         df['User_주유_Ratio'] = cat_counts.get(5, 0) / total_count
         
+        # ---------------------------------------------------------
+        # 7-1. 독립 행 모드 (단건 예측 묶음 처리)
+        # ---------------------------------------------------------
+        # 거래 1건짜리 DataFrame을 전처리한 결과와 같도록 행 간 통계를 덮어씀
+        if independent_rows:
+            current_category = df['Current_Category_encoded']
+            df['User_AvgAmount'] = df['Amount']
+            df['User_StdAmount'] = 0
+            df['User_TxCount'] = 1
+            df['Time_Since_Last'] = 0.0
+            df['Transaction_Sequence'] = 0.0
+            df['Previous_Category_encoded'] = 6.0
+            df['User_FavCategory_encoded'] = current_category
+            df['User_Category_Count'] = 1
+            for code, name in enumerate(['교통', '생활', '쇼핑', '식료품', '외식', '주유']):
+                df[f'User_{name}_Ratio'] = (current_category == code).astype(float)
+        
         # ---------------------------------------------------------
         # 8. XGBoost 피처명 호환을 위한 별칭 컬럼
         # ---------------------------------------------------------
@@ -0,0 +1,337 @@
+"""
+Real-time Fraud Scoring
+거래 저장 시점에 바로 이상거래를 판정하는 인라인 점수화 훅
+
+- 거래 INSERT(flush) 직후, 커밋 전에 호출 → Anomaly 행, 윈도 상태, 점수화 표시(fraud_scored_at)가
+  거래와 같은 DB 트랜잭션에 저장 (인라인 판정이 최종 판정이며 스캐너는 표시된 거래를 다시 점수화하지 않음)
+- 통계 규칙(apply_heuristics) + 이상거래 모델을 REALTIME_FRAUD_TIMEOUT_MS 안에 실행
+  (카테고리 이력은 해당 카테고리만, 모델 윈도 피처는 user_fraud_state 캐시에서 계산)
+- 시간 초과 / 추론 대기열 포화 / 대량 배치는 커밋 후 제한된 크기의 비동기 대기열로 넘겨
+  백그라운드 워커가 점수화 (대기열도 가득 차면 주기적 증분 스캐너가 처리)
+- 점수화 실패가 거래 저장 실패로 이어지지 않도록 SAVEPOINT 안에서 실행하고 예외를 삼킴
+
+사용 예:
+    db.add(new_tx)
+    await db.flush()
+    await score_on_insert(db, [scoring_row(new_tx, category.name)])
+    await db.commit()
+"""
+
+from collections import deque
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Optional, List, Dict, Any
+import asyncio
+import os
+import time
+import logging
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.anomaly_scanner import (
+    SCAN_LOOKBACK_DAYS,
+    _load_category_history,
+    build_anomaly,
+    exclude_scored,
+    load_transactions,
+    mark_scored,
+    score_and_record,
+    score_transactions,
+)
+from app.services.fraud_state import load_fraud_states, advance_fraud_states, save_fraud_states
+from app.services.inference_executor import InferenceQueueFullError, run_inference
+
+logger = logging.getLogger(__name__)
+
+# 설정 (환경 변수로 변경 가능)
+REALTIME_FRAUD_ENABLED = os.getenv("REALTIME_FRAUD", "1") == "1"
+REALTIME_FRAUD_TIMEOUT_MS = float(os.getenv("REALTIME_FRAUD_TIMEOUT_MS", 5))      # 인라인 모델 판정 시간 상한
+REALTIME_FRAUD_MAX_INLINE = int(os.getenv("REALTIME_FRAUD_MAX_INLINE", 100))      # 이보다 큰 배치는 바로 대기열로
+FALLBACK_QUEUE_SIZE = int(os.getenv("REALTIME_FRAUD_QUEUE_SIZE", 10000))          # 대기열 상한 (거래 수)
+FALLBACK_BATCH_SIZE = int(os.getenv("REALTIME_FRAUD_QUEUE_BATCH", 200))           # 워커가 한 번에 점수화할 거래 수
+
+TIMING_WINDOW = 1000  # 백분위 계산에 쓰는 최근 호출 수
+_PENDING_KEY = "realtime_fraud_pending"  # session.info에 쌓아 두는 커밋 후 대기열 전송 대상
+
+_queue: Optional[asyncio.Queue] = None
+_worker_task: Optional[asyncio.Task] = None
+_inline_times = deque(maxlen=TIMING_WINDOW)
+_counters = {
+    "inline_scored": 0,
+    "inline_flagged": 0,
+    "deferred": 0,
+    "dropped": 0,
+    "fallback_scored": 0,
+    "fallback_flagged": 0,
+}
+
+
+def scoring_row(tx, category_name: Optional[str]) -> SimpleNamespace:
+    """
+    점수화용 거래 스냅샷
+
+    워커 스레드에서 관계 지연 로딩 없이 읽을 수 있도록 필요한 속성만 복사합니다.
+    """
+    return SimpleNamespace(
+        id=tx.id,
+        user_id=tx.user_id,
+        category_id=tx.category_id,
+        category=SimpleNamespace(name=category_name) if category_name else None,
+        amount=tx.amount,
+        currency=tx.currency,
+        merchant_name=tx.merchant_name,
+        transaction_time=tx.transaction_time,
+    )
+
+
+# ============================================================
+# 대기열 (커밋 후 전송)
+# ============================================================
+
+def _get_queue() -> asyncio.Queue:
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue(maxsize=FALLBACK_QUEUE_SIZE)
+    return _queue
+
+
+def _enqueue(tx_ids: List[int]) -> int:
+    """대기열에 추가 (가득 차면 나머지는 증분 스캐너에 맡김)"""
+    queue = _get_queue()
+    queued = 0
+    for tx_id in tx_ids:
+        try:
+            queue.put_nowait(tx_id)
+            queued += 1
+        except asyncio.QueueFull:
+            break
+    _counters["deferred"] += queued
+    if queued < len(tx_ids):
+        _counters["dropped"] += len(tx_ids) - queued
+        logger.warning(
+            f"Realtime fraud queue full: {len(tx_ids) - queued} transactions left to the periodic scanner"
+        )
+    return queued
+
+
+def _send_pending(session) -> None:
+    if session.in_nested_transaction():
+        return  # SAVEPOINT 해제는 커밋이 아님
+    tx_ids = session.info.pop(_PENDING_KEY, None)
+    if tx_ids:
+        _enqueue(tx_ids)
+
+
+def _discard_pending(session) -> None:
+    if session.in_nested_transaction():
+        return  # SAVEPOINT 롤백이면 거래는 바깥 트랜잭션에 그대로 남음
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _defer(db: AsyncSession, tx_ids: List[int]) -> None:
+    """
+    커밋되면 대기열로 보낼 거래 등록
+
+    커밋 전에 넣으면 워커가 아직 보이지 않는 거래를 읽을 수 있으므로 after_commit에서 전송하고,
+    롤백되면 버립니다.
+    """
+    session = db.sync_session
+    if not event.contains(session, "after_commit", _send_pending):
+        event.listen(session, "after_commit", _send_pending)
+        event.listen(session, "after_rollback", _discard_pending)
+    session.info.setdefault(_PENDING_KEY, []).extend(tx_ids)
+
+
+def _discard_result(task: asyncio.Future) -> None:
+    """시간 초과로 버린 추론 작업의 예외를 회수 (경고 로그 방지)"""
+    if not task.cancelled():
+        task.exception()
+
+
+# ============================================================
+# 인라인 점수화
+# ============================================================
+
+async def _score_inline(db: AsyncSession, rows: List[SimpleNamespace]) -> tuple:
+    """
+    거래 목록을 제한 시간 안에 점수화하고 결과를 세션에 추가
+
+    Returns:
+        (이상 판정 목록, 인라인으로 처리하지 못한 거래 id 목록)
+
+    Raises:
+        asyncio.TimeoutError: 모델 판정이 REALTIME_FRAUD_TIMEOUT_MS를 넘음
+        InferenceQueueFullError: 추론 대기열 포화
+    """
+    user_ids = list({row.user_id for row in rows})
+
+    # 새 거래는 이미 flush되어 보이므로 상태 재구성은 그 직전 id까지만
+    fraud_states = await load_fraud_states(db, user_ids, up_to_id=rows[0].id - 1)
+    snapshots = advance_fraud_states(fraud_states, rows, {row.id for row in rows})
+
+    # 다른 경로가 이미 더 최신 거래까지 상태에 반영한 경우 직전 상태를 알 수 없음 → 대기열로
+    scored = [row for row in rows if row.id in snapshots]
+    skipped = [row.id for row in rows if row.id not in snapshots]
+    if not scored:
+        return [], skipped
+
+    category_ids = list({row.category_id for row in scored if row.category_id is not None})
+    user_cat_history = await _load_category_history(db, user_ids, category_ids)
+
+    # burst_count는 판정 규칙에 쓰이지 않으므로 인라인 경로에서는 최근 이력 조회를 생략
+    task = asyncio.ensure_future(run_inference(score_transactions, scored, user_cat_history, {}, snapshots))
+    try:
+        flagged = await asyncio.wait_for(asyncio.shield(task), timeout=REALTIME_FRAUD_TIMEOUT_MS / 1000)
+    except asyncio.TimeoutError:
+        # 작업은 스레드에서 끝까지 실행되어 동시 실행 수가 정확히 유지됨 (결과만 버림)
+        task.add_done_callback(_discard_result)
+        raise
+
+    for tx, risk, reason in flagged:
+        db.add(build_anomaly(tx, risk, reason))
+    await mark_scored(db, [row.id for row in scored])
+    await save_fraud_states(db, fraud_states)
+    return flagged, skipped
+
+
+async def score_on_insert(db: AsyncSession, rows: List[SimpleNamespace]) -> Dict[str, int]:
+    """
+    새로 저장한 거래를 즉시 점수화 (flush 후, 커밋 전에 호출)
+
+    이상 판정 건은 같은 트랜잭션에 Anomaly 행으로 추가되고, 제한 시간 안에 끝내지 못한
+    거래는 커밋 후 대기열로 넘어갑니다. 예외를 던지지 않습니다.
+
+    Args:
+        rows: scoring_row로 만든 거래 스냅샷 (id가 할당된 상태)
+
+    Returns:
+        {"scored", "flagged", "deferred"}
+    """
+    summary = {"scored": 0, "flagged": 0, "deferred": 0}
+    if not REALTIME_FRAUD_ENABLED or not rows:
+        return summary
+
+    rows = sorted(rows, key=lambda row: row.id)
+    if len(rows) > REALTIME_FRAUD_MAX_INLINE:
+        _defer(db, [row.id for row in rows])
+        summary["deferred"] = len(rows)
+        return summary
+
+    started_at = time.perf_counter()
+    deferred = []
+    try:
+        async with db.begin_nested():
+            flagged, deferred = await _score_inline(db, rows)
+        summary["scored"] = len(rows) - len(deferred)
+        summary["flagged"] = len(flagged)
+    except (asyncio.TimeoutError, InferenceQueueFullError) as e:
+        logger.info(f"Realtime fraud scoring deferred for {len(rows)} transactions: {type(e).__name__}")
+        deferred = [row.id for row in rows]
+    except Exception as e:
+        logger.warning(f"Realtime fraud scoring failed, deferring {len(rows)} transactions: {e}")
+        deferred = [row.id for row in rows]
+    finally:
+        _inline_times.append(time.perf_counter() - started_at)
+
+    if deferred:
+        _defer(db, deferred)
+    summary["deferred"] = len(deferred)
+    _counters["inline_scored"] += summary["scored"]
+    _counters["inline_flagged"] += summary["flagged"]
+    return summary
+
+
+# ============================================================
+# 대기열 워커 (느린 경로)
+# ============================================================
+
+async def score_deferred(db: AsyncSession, tx_ids: List[int]) -> Dict[str, int]:
+    """
+    대기열에서 꺼낸 거래 점수화 (커밋은 호출자 책임)
+
+    롤백되어 없는 거래나 이미 점수화/이상거래로 저장된 거래는 건너뜁니다.
+    """
+    candidate_ids = await exclude_scored(db, sorted(set(tx_ids)))
+    txs = await load_transactions(db, candidate_ids) if candidate_ids else []
+    if not txs:
+        return {"scored": 0, "flagged": 0}
+
+    fraud_states = await load_fraud_states(db, [tx.user_id for tx in txs], up_to_id=txs[0].id - 1)
+    snapshots = advance_fraud_states(fraud_states, txs, {tx.id for tx in txs})
+
+    since = datetime.now() - timedelta(days=SCAN_LOOKBACK_DAYS)
+    flagged = await score_and_record(db, txs, since, snapshots)
+    await mark_scored(db, [tx.id for tx in txs])
+    await save_fraud_states(db, fraud_states)
+    return {"scored": len(txs), "flagged": len(flagged)}
+
+
+async def _drain(queue: asyncio.Queue) -> List[int]:
+    """하나가 들어올 때까지 기다린 뒤 FALLBACK_BATCH_SIZE까지 모아서 반환"""
+    tx_ids = [await queue.get()]
+    while len(tx_ids) < FALLBACK_BATCH_SIZE and not queue.empty():
+        tx_ids.append(queue.get_nowait())
+    return tx_ids
+
+
+async def _worker() -> None:
+    from app.services.scheduler import get_db_session
+
+    queue = _get_queue()
+    while True:
+        tx_ids = await _drain(queue)
+        db = await get_db_session()
+        try:
+            result = await score_deferred(db, tx_ids)
+            await db.commit()
+            _counters["fallback_scored"] += result["scored"]
+            _counters["fallback_flagged"] += result["flagged"]
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 처리하지 못한 거래는 증분 스캐너가 점수화
+            logger.warning(f"Realtime fraud fallback failed for {len(tx_ids)} transactions: {e}")
+            await db.rollback()
+        finally:
+            await db.close()
+            for _ in tx_ids:
+                queue.task_done()
+
+
+def start_fallback_worker() -> None:
+    """앱 시작 시 대기열 워커 시작"""
+    global _worker_task
+    if _worker_task is None or _worker_task.done():
+        _worker_task = asyncio.get_running_loop().create_task(_worker())
+        logger.info("Realtime fraud fallback worker started")
+
+
+async def stop_fallback_worker() -> None:
+    """앱 종료 시 대기열 워커 정리 (남은 거래는 증분 스캐너가 처리)"""
+    global _worker_task
+    if _worker_task is not None:
+        _worker_task.cancel()
+        try:
+            await _worker_task
+        except asyncio.CancelledError:
+            pass
+        _worker_task = None
+
+
+def get_realtime_stats() -> Dict[str, Any]:
+    """인라인 점수화 지연 시간 백분위 (ms)와 대기열 상태"""
+    times = np.fromiter(_inline_times, dtype=float)
+    p50 = p99 = None
+    if times.size:
+        p50, p99 = (round(float(v), 3) for v in np.percentile(times, [50, 99]) * 1000)
+    return {
+        "enabled": REALTIME_FRAUD_ENABLED,
+        "timeout_ms": REALTIME_FRAUD_TIMEOUT_MS,
+        "inline": {"p50_ms": p50, "p99_ms": p99},
+        "queue_depth": _queue.qsize() if _queue is not None else 0,
+        "queue_size": FALLBACK_QUEUE_SIZE,
+        "worker_running": _worker_task is not None and not _worker_task.done(),
+        **_counters,
+    }
@@ -12,6 +12,7 @@ from sqlalchemy import select, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.model.transaction import Transaction, Category
 from app.db.model.user import User
+from app.services.spend_rollup import spend_totals, spend_by_category
 
 logger = logging.getLogger(__name__)
 
@@ -715,20 +716,8 @@ async def generate_weekly_report(db: AsyncSession) -> Dict[str, Any]:
     last_week_start = start_of_week - timedelta(days=7)
     last_week_end = start_of_week
     
-    # 이번 주(실제로는 지난 주) 거래 데이터 (이상 거래 제외)
-    this_week_query = select(
-        func.count(Transaction.id).label("count"),
-        func.sum(Transaction.amount).label("total_amount")
-    ).where(
-        and_(
-            Transaction.transaction_time >= start_of_week,
-            Transaction.transaction_time < end_of_week,
-            Transaction.status == "completed",
-            Transaction.is_fraudulent == False
-        )
-    )
-    this_week_result = await db.execute(this_week_query)
-    this_week_data = this_week_result.first()
+    # 이번 주(실제로는 지난 주) 거래 데이터 (이상 거래 제외, 소비 집계)
+    this_week_total, this_week_count = await spend_totals(db, start_of_week.date(), end_of_week.date())
     
     # 최대 지출 거래 조회 (카테고리명 포함)
     max_tx_query = select(Transaction, Category.name).join(
@@ -758,43 +747,13 @@ async def generate_weekly_report(db: AsyncSession) -> Dict[str, Any]:
     fraud_tx_result = await db.execute(fraud_tx_query)
     fraud_transactions = fraud_tx_result.scalars().all()
 
-    # 지난 주(실제로는 지지난 주) 거래 데이터 (이상 거래 제외)
-    last_week_query = select(
-        func.sum(Transaction.amount).label("total_amount")
-    ).where(
-        and_(
-            Transaction.transaction_time >= last_week_start,
-            Transaction.transaction_time < last_week_end,
-            Transaction.status == "completed",
-            Transaction.is_fraudulent == False
-        )
-    )
-    last_week_result = await db.execute(last_week_query)
-    last_week_data = last_week_result.first()
-    
-    # 카테고리별 집계 (이상 거래 제외)
-    category_query = select(
-        Category.name,
-        func.sum(Transaction.amount).label("amount"),
-        func.count(Transaction.id).label("count")
-    ).join(
-        Transaction, Transaction.category_id == Category.id
-    ).where(
-        and_(
-            Transaction.transaction_time >= start_of_week,
-            Transaction.transaction_time < end_of_week,
-            Transaction.status == "completed",
-            Transaction.is_fraudulent == False
-        )
-    ).group_by(Category.name).order_by(func.sum(Transaction.amount).desc()).limit(5)
+    # 지난 주(실제로는 지지난 주) 거래 데이터 (이상 거래 제외, 소비 집계)
+    last_week_total, _ = await spend_totals(db, last_week_start.date(), last_week_end.date())
     
-    category_result = await db.execute(category_query)
-    categories = category_result.all()
+    # 카테고리별 집계 (이상 거래 제외, 소비 집계)
+    categories = await spend_by_category(db, start_of_week.date(), end_of_week.date(), limit=5, include_uncategorized=False)
     
     # 전주 대비 증감율 계산
-    this_week_total = float(this_week_data.total_amount or 0)
-    last_week_total = float(last_week_data.total_amount or 0)
-    
     if last_week_total > 0:
         change_rate = ((this_week_total - last_week_total) / last_week_total) * 100
     else:
@@ -804,7 +763,7 @@ async def generate_weekly_report(db: AsyncSession) -> Dict[str, Any]:
         "period_start": start_of_week.strftime("%Y-%m-%d"),
         "period_end": (end_of_week - timedelta(days=1)).strftime("%Y-%m-%d"),
         "total_amount": this_week_total,
-        "transaction_count": this_week_data.count or 0,
+        "transaction_count": this_week_count,
         "change_rate": round(change_rate, 1),
         "top_categories": [],
         "max_transaction": None,
@@ -813,14 +772,13 @@ async def generate_weekly_report(db: AsyncSession) -> Dict[str, Any]:
     
     # 카테고리 데이터 처리 (비율 계산)
     if categories and this_week_total > 0:
-        for cat in categories:
-            cat_amount = float(cat.amount)
+        for cat_name, cat_amount, cat_count in categories:
             # 전체 지출액 대비 비중으로 계산
             percentage = (cat_amount / this_week_total) * 100
             report_data["top_categories"].append({
-                "name": cat.name, 
+                "name": cat_name, 
                 "amount": cat_amount, 
-                "count": int(cat.count),
+                "count": cat_count,
                 "percent": percentage
             })
             
@@ -887,20 +845,8 @@ async def generate_monthly_report(db: AsyncSession) -> Dict[str, Any]:
         last_month_start = start_of_month.replace(month=start_of_month.month - 1)
     last_month_end = start_of_month
     
-    # 이번 달 거래 데이터 (이상 거래 제외)
-    this_month_query = select(
-        func.count(Transaction.id).label("count"),
-        func.sum(Transaction.amount).label("total_amount")
-    ).where(
-        and_(
-            Transaction.transaction_time >= start_of_month,
-            Transaction.transaction_time < end_of_month,
-            Transaction.status == "completed",
-            Transaction.is_fraudulent == False
-        )
-    )
-    this_month_result = await db.execute(this_month_query)
-    this_month_data = this_month_result.first()
+    # 이번 달 거래 데이터 (이상 거래 제외, 소비 집계)
+    this_month_total, this_month_count = await spend_totals(db, start_of_month.date(), end_of_month.date())
     
     # 최대 지출 거래 조회 (이상 거래 제외)
     max_tx_query = select(Transaction, Category.name).join(
@@ -930,43 +876,13 @@ async def generate_monthly_report(db: AsyncSession) -> Dict[str, Any]:
     fraud_tx_result = await db.execute(fraud_tx_query)
     fraud_transactions = fraud_tx_result.scalars().all()
     
-    # 지난 달 거래 데이터 (이상 거래 제외)
-    last_month_query = select(
-        func.sum(Transaction.amount).label("total_amount")
-    ).where(
-        and_(
-            Transaction.transaction_time >= last_month_start,
-            Transaction.transaction_time < last_month_end,
-            Transaction.status == "completed",
-            Transaction.is_fraudulent == False
-        )
-    )
-    last_month_result = await db.execute(last_month_query)
-    last_month_data = last_month_result.first()
-    
-    # 카테고리별 집계 (이상 거래 제외)
-    category_query = select(
-        Category.name,
-        func.sum(Transaction.amount).label("amount"),
-        func.count(Transaction.id).label("count")
-    ).join(
-        Transaction, Transaction.category_id == Category.id
-    ).where(
-        and_(
-            Transaction.transaction_time >= start_of_month,
-            Transaction.transaction_time < end_of_month,
-            Transaction.status == "completed",
-            Transaction.is_fraudulent == False
-        )
-    ).group_by(Category.name).order_by(func.sum(Transaction.amount).desc()).limit(5)
+    # 지난 달 거래 데이터 (이상 거래 제외, 소비 집계)
+    last_month_total, _ = await spend_totals(db, last_month_start.date(), last_month_end.date())
     
-    category_result = await db.execute(category_query)
-    categories = category_result.all()
+    # 카테고리별 집계 (이상 거래 제외, 소비 집계)
+    categories = await spend_by_category(db, start_of_month.date(), end_of_month.date(), limit=5, include_uncategorized=False)
     
     # 전월 대비 증감율 계산
-    this_month_total = float(this_month_data.total_amount or 0)
-    last_month_total = float(last_month_data.total_amount or 0)
-    
     if last_month_total > 0:
         change_rate = ((this_month_total - last_month_total) / last_month_total) * 100
     else:
@@ -976,7 +892,7 @@ async def generate_monthly_report(db: AsyncSession) -> Dict[str, Any]:
         "period_start": start_of_month.strftime("%Y-%m-%d"),
         "period_end": (end_of_month - timedelta(days=1)).strftime("%Y-%m-%d"),
         "total_amount": this_month_total,
-        "transaction_count": this_month_data.count or 0,
+        "transaction_count": this_month_count,
         "change_rate": round(change_rate, 1),
         "top_categories": [],
         "max_transaction": None,
@@ -985,14 +901,13 @@ async def generate_monthly_report(db: AsyncSession) -> Dict[str, Any]:
     
     # 카테고리 데이터 처리 (비율 계산)
     if categories and this_month_total > 0:
-        for cat in categories:
-            cat_amount = float(cat.amount)
+        for cat_name, cat_amount, cat_count in categories:
             # 전체 지출액 대비 비중으로 계산
             percentage = (cat_amount / this_month_total) * 100
             report_data["top_categories"].append({
-                "name": cat.name, 
+                "name": cat_name, 
                 "amount": cat_amount, 
-                "count": int(cat.count),
+                "count": cat_count,
                 "percent": percentage
             })
             
@@ -1047,20 +962,8 @@ async def generate_daily_report(db: AsyncSession) -> Dict[str, Any]:
     day_before_yesterday_start = start_of_day - timedelta(days=1)
     day_before_yesterday_end = start_of_day
 
-    # 어제 거래 데이터 (이상 거래 제외)
-    yesterday_query = select(
-        func.count(Transaction.id).label("count"),
-        func.sum(Transaction.amount).label("total_amount")
-    ).where(
-        and_(
-            Transaction.transaction_time >= start_of_day,
-            Transaction.transaction_time < end_of_day,
-            Transaction.status == "completed",
-            Transaction.is_fraudulent == False
-        )
-    )
-    yesterday_result = await db.execute(yesterday_query)
-    yesterday_data = yesterday_result.first()
+    # 어제 거래 데이터 (이상 거래 제외, 소비 집계)
+    yesterday_total, yesterday_count = await spend_totals(db, start_of_day.date(), end_of_day.date())
 
     # 최대 지출 거래 조회 (카테고리명 포함)
     max_tx_query = select(Transaction, Category.name).join(
@@ -1090,43 +993,13 @@ async def generate_daily_report(db: AsyncSession) -> Dict[str, Any]:
     fraud_tx_result = await db.execute(fraud_tx_query)
     fraud_transactions = fraud_tx_result.scalars().all()
 
-    # 그저께 거래 데이터 (이상 거래 제외)
-    day_before_query = select(
-        func.sum(Transaction.amount).label("total_amount")
-    ).where(
-        and_(
-            Transaction.transaction_time >= day_before_yesterday_start,
-            Transaction.transaction_time < day_before_yesterday_end,
-            Transaction.status == "completed",
-            Transaction.is_fraudulent == False
-        )
-    )
-    day_before_result = await db.execute(day_before_query)
-    day_before_data = day_before_result.first()
+    # 그저께 거래 데이터 (이상 거래 제외, 소비 집계)
+    day_before_total, _ = await spend_totals(db, day_before_yesterday_start.date(), day_before_yesterday_end.date())
 
-    # 카테고리별 집계 (이상 거래 제외)
-    category_query = select(
-        Category.name,
-        func.sum(Transaction.amount).label("amount"),
-        func.count(Transaction.id).label("count")
-    ).join(
-        Transaction, Transaction.category_id == Category.id
-    ).where(
-        and_(
-            Transaction.transaction_time >= start_of_day,
-            Transaction.transaction_time < end_of_day,
-            Transaction.status == "completed",
-            Transaction.is_fraudulent == False
-        )
-    ).group_by(Category.name).order_by(func.sum(Transaction.amount).desc()).limit(5)
-    
-    category_result = await db.execute(category_query)
-    categories = category_result.all()
+    # 카테고리별 집계 (이상 거래 제외, 소비 집계)
+    categories = await spend_by_category(db, start_of_day.date(), end_of_day.date(), limit=5, include_uncategorized=False)
 
     # 전일 대비 증감율 계산
-    yesterday_total = float(yesterday_data.total_amount or 0)
-    day_before_total = float(day_before_data.total_amount or 0)
-    
     if day_before_total > 0:
         change_rate = ((yesterday_total - day_before_total) / day_before_total) * 100
     else:
@@ -1136,7 +1009,7 @@ async def generate_daily_report(db: AsyncSession) -> Dict[str, Any]:
         "period_start": start_of_day.strftime("%Y-%m-%d"),
         "period_end": start_of_day.strftime("%Y-%m-%d"),
         "total_amount": yesterday_total,
-        "transaction_count": yesterday_data.count or 0,
+        "transaction_count": yesterday_count,
         "change_rate": round(change_rate, 1),
         "top_categories": [],
         "max_transaction": None,
@@ -1145,14 +1018,13 @@ async def generate_daily_report(db: AsyncSession) -> Dict[str, Any]:
 
     # 카테고리 데이터 처리
     if categories and yesterday_total > 0:
-        for cat in categories:
-            cat_amount = float(cat.amount)
+        for cat_name, cat_amount, cat_count in categories:
             # 전체 지출액 대비 비중으로 계산
             percentage = (cat_amount / yesterday_total) * 100
             report_data["top_categories"].append({
-                "name": cat.name, 
+                "name": cat_name, 
                 "amount": cat_amount, 
-                "count": int(cat.count),
+                "count": cat_count,
                 "percent": percentage
             })
             
@@ -7,6 +7,7 @@ APScheduler를 사용하여 주간/월간 리포트를 자동으로 생성하고
 import logging
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
@@ -18,15 +19,27 @@ from app.services.report_service import (
     format_report_html
 )
 from app.services.email_service import send_report_email
+from app.services.next_prediction import refresh_next_predictions
+from app.services.anomaly_scanner import scan_new_transactions
+from app.services.transaction_search import sync_merchant_names
+from app.services.admin_snapshot import refresh_admin_snapshot, ADMIN_SNAPSHOT_REFRESH_SECONDS
+from app.services.user_cohorts import refresh_user_cohorts, USER_COHORTS_ENABLED, USER_COHORT_REFRESH_SECONDS
 from sqlalchemy import select
 from app.db.model.admin_settings import AdminSettings
 import json
+import os
 
 logger = logging.getLogger(__name__)
 
 # 전역 스케줄러 인스턴스
 scheduler: AsyncIOScheduler = None
 
+# 이상거래 스캔 주기 (초)
+ANOMALY_SCAN_INTERVAL_SECONDS = int(os.getenv("ANOMALY_SCAN_INTERVAL_SECONDS", 60))
+
+# 가맹점명 정규화 테이블 동기화 주기 (초)
+MERCHANT_SYNC_INTERVAL_SECONDS = int(os.getenv("MERCHANT_SYNC_INTERVAL_SECONDS", 3600))
+
 
 async def get_db_session() -> AsyncSession:
     """
@@ -199,6 +212,90 @@ async def send_monthly_report_job():
         await db.close()
 
 
+async def refresh_next_predictions_job():
+    """
+    활성 사용자 전체의 다음 소비 카테고리 예측을 미리 계산하는 스케줄 작업입니다.
+    매일 새벽 3시에 실행됩니다.
+    """
+    logger.info("Next category prediction refresh started")
+
+    from app.routers.ml import get_model
+    model = get_model()
+    if model is None:
+        logger.warning("Category model is not loaded. Skipping prediction refresh.")
+        return
+
+    db = await get_db_session()
+    try:
+        results = await refresh_next_predictions(db, model)
+        logger.info(f"Next category predictions refreshed for {len(results)} users")
+    except Exception as e:
+        logger.error(f"Failed to refresh next category predictions: {str(e)}", exc_info=True)
+    finally:
+        await db.close()
+
+
+async def scan_anomalies_job():
+    """
+    마지막 스캔 이후 새로 들어온 거래만 이상 탐지하여 anomalies 테이블에 저장하는 스케줄 작업입니다.
+    ANOMALY_SCAN_INTERVAL_SECONDS마다 실행됩니다.
+    """
+    db = await get_db_session()
+    try:
+        await scan_new_transactions(db)
+    except Exception as e:
+        logger.error(f"Failed to scan anomalies: {str(e)}", exc_info=True)
+    finally:
+        await db.close()
+
+
+async def sync_merchant_names_job():
+    """
+    거래 가맹점명 중 정규화 테이블(merchant_names)에 없는 이름을 등록하는 스케줄 작업입니다.
+    MERCHANT_SYNC_INTERVAL_SECONDS마다 실행됩니다. (pg_trgm이 없으면 아무것도 하지 않음)
+    """
+    db = await get_db_session()
+    try:
+        added = await sync_merchant_names(db)
+        await db.commit()
+        if added:
+            logger.info(f"Merchant names synced: {added} new")
+    except Exception as e:
+        logger.error(f"Failed to sync merchant names: {str(e)}", exc_info=True)
+    finally:
+        await db.close()
+
+
+async def refresh_admin_snapshot_job():
+    """
+    관리자 분석 대시보드 스냅샷(admin_spend_snapshot)을 갱신하는 스케줄 작업입니다.
+    ADMIN_SNAPSHOT_REFRESH_SECONDS마다 실행됩니다. (PostgreSQL은 REFRESH ... CONCURRENTLY)
+    """
+    db = await get_db_session()
+    try:
+        await refresh_admin_snapshot(db)
+        await db.commit()
+    except Exception as e:
+        logger.error(f"Failed to refresh admin analytics snapshot: {str(e)}", exc_info=True)
+    finally:
+        await db.close()
+
+
+async def refresh_user_cohorts_job():
+    """
+    일별 사용자 코호트(user_activity_daily)를 마지막 저장일부터 오늘까지 갱신하는 스케줄 작업입니다.
+    USER_COHORT_REFRESH_SECONDS마다 실행됩니다. (최초 실행 시 백필)
+    """
+    db = await get_db_session()
+    try:
+        await refresh_user_cohorts(db)
+        await db.commit()
+    except Exception as e:
+        logger.error(f"Failed to refresh user cohorts: {str(e)}", exc_info=True)
+    finally:
+        await db.close()
+
+
 def start_scheduler():
     """
     스케줄러를 시작합니다.
@@ -240,6 +337,63 @@ def start_scheduler():
         replace_existing=True
     )
     
+    # 다음 소비 카테고리 예측 캐시: 매일 오전 3시
+    scheduler.add_job(
+        refresh_next_predictions_job,
+        trigger=CronTrigger(hour=3, minute=0),
+        id="next_category_predictions",
+        name="Refresh Next Category Predictions",
+        replace_existing=True
+    )
+    
+    # 이상거래 증분 스캔: 시작 직후 1회 + 주기 실행
+    scheduler.add_job(
+        scan_anomalies_job,
+        trigger=IntervalTrigger(seconds=ANOMALY_SCAN_INTERVAL_SECONDS),
+        id="anomaly_scan",
+        name="Scan New Transactions For Anomalies",
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+    
+    # 가맹점명 정규화 테이블 동기화: 시작 직후 1회 + 주기 실행
+    scheduler.add_job(
+        sync_merchant_names_job,
+        trigger=IntervalTrigger(seconds=MERCHANT_SYNC_INTERVAL_SECONDS),
+        id="merchant_name_sync",
+        name="Sync Merchant Names For Search",
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+    
+    # 관리자 분석 스냅샷 갱신: 주기 실행 (최초 갱신은 기동 시 db_init)
+    scheduler.add_job(
+        refresh_admin_snapshot_job,
+        trigger=IntervalTrigger(seconds=ADMIN_SNAPSHOT_REFRESH_SECONDS),
+        id="admin_snapshot_refresh",
+        name="Refresh Admin Analytics Snapshot",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+    
+    # 일별 사용자 코호트 갱신: 시작 직후 1회 + 주기 실행
+    if USER_COHORTS_ENABLED:
+        scheduler.add_job(
+            refresh_user_cohorts_job,
+            trigger=IntervalTrigger(seconds=USER_COHORT_REFRESH_SECONDS),
+            id="user_cohort_refresh",
+            name="Refresh Daily User Cohorts",
+            next_run_time=datetime.now(),
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+    
     # 스케줄러 시작
     scheduler.start()
     
@@ -248,6 +402,12 @@ def start_scheduler():
     logger.info("  - Daily Report: Every day 07:00")
     logger.info("  - Weekly Report: Every Monday 09:00")
     logger.info("  - Monthly Report: Every 1st day of month 09:00")
+    logger.info("  - Next Category Predictions: Every day 03:00")
+    logger.info(f"  - Anomaly Scan: Every {ANOMALY_SCAN_INTERVAL_SECONDS}s")
+    logger.info(f"  - Merchant Name Sync: Every {MERCHANT_SYNC_INTERVAL_SECONDS}s")
+    logger.info(f"  - Admin Analytics Snapshot: Every {ADMIN_SNAPSHOT_REFRESH_SECONDS}s")
+    if USER_COHORTS_ENABLED:
+        logger.info(f"  - User Cohorts: Every {USER_COHORT_REFRESH_SECONDS}s")
     logger.info("=" * 60)
 
 
@@ -0,0 +1,296 @@
+"""
+Spending Rollups
+사용자·카테고리별 일/월 소비 합계 (spend_daily / spend_monthly)
+
+분석 대시보드와 정기 리포트는 거래 원본 대신 이 집계를 읽으므로
+조회 비용이 거래 수가 아닌 기간(일/월) 수에 비례합니다.
+
+- 거래 추가: add_transactions (같은 트랜잭션에서 증분 UPSERT)
+- 이상거래 표시: remove_transactions (플래그를 바꾸기 전에 호출, 합계에서 차감)
+- 사용자 거래 전체 삭제: clear_user_rollups
+- 전체/일부 재계산: rebuild_rollups (scripts/rebuild_spend_rollups.py)
+
+집계 대상은 is_fraudulent = false인 거래이며, 일자는 DB의 date(transaction_time) 기준입니다.
+"""
+
+from datetime import date, datetime
+from typing import Optional, List, Dict, Tuple, Iterable, Any
+import logging
+
+from sqlalchemy import select, delete, func, cast, literal_column, Date
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.model.transaction import Transaction, Category
+from app.db.model.rollup import SpendDaily, SpendMonthly, UNCATEGORIZED_ID
+from app.db.model.user import User
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_CHUNK_SIZE = 1000  # 증분 갱신 시 한 번에 읽는 거래 id 수
+
+
+# ============================================================
+# 방언별 헬퍼
+# ============================================================
+
+def _dialect(db: AsyncSession) -> str:
+    return db.get_bind().dialect.name
+
+
+def _upsert(db: AsyncSession, table):
+    """방언별 INSERT ... ON CONFLICT 구문 (PostgreSQL / SQLite)"""
+    if _dialect(db) == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    return dialect_insert(table)
+
+
+# GROUP BY에 쓰는 식은 상수를 바인드 파라미터 대신 SQL에 직접 넣음
+# (PostgreSQL은 SELECT와 GROUP BY의 파라미터 번호가 다르면 같은 식으로 보지 않음)
+
+def _month_of(db: AsyncSession, day_column):
+    """날짜 → 해당 월 1일"""
+    if _dialect(db) == "sqlite":
+        return func.date(day_column, literal_column("'start of month'"))
+    return cast(func.date_trunc(literal_column("'month'"), day_column), Date)
+
+
+def _category_key():
+    """카테고리 없는 거래 → UNCATEGORIZED_ID"""
+    return func.coalesce(Transaction.category_id, literal_column(str(UNCATEGORIZED_ID)))
+
+
+def _as_date(value: Any) -> date:
+    """date(...) 결과 (SQLite는 문자열) → date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+# ============================================================
+# 증분 갱신
+# ============================================================
+
+async def _apply(db: AsyncSession, transaction_ids: List[int], sign: int) -> None:
+    """거래 id 목록의 (사용자, 카테고리, 일) 합계를 집계 테이블에 더하거나 뺌"""
+    daily: Dict[Tuple[int, date, int], list] = {}
+    for start in range(0, len(transaction_ids), ROLLUP_CHUNK_SIZE):
+        result = await db.execute(
+            select(
+                Transaction.user_id,
+                func.date(Transaction.transaction_time),
+                _category_key(),
+                func.sum(Transaction.amount),
+                func.count(Transaction.id)
+            )
+            .where(Transaction.id.in_(transaction_ids[start:start + ROLLUP_CHUNK_SIZE]))
+            .where(Transaction.is_fraudulent == False)
+            .group_by(
+                Transaction.user_id,
+                func.date(Transaction.transaction_time),
+                _category_key()
+            )
+        )
+        for user_id, day, category_id, total, count in result.all():
+            entry = daily.setdefault((user_id, _as_date(day), category_id), [0, 0])
+            entry[0] += total
+            entry[1] += count
+    if not daily:
+        return
+
+    monthly: Dict[Tuple[int, date, int], list] = {}
+    for (user_id, day, category_id), (total, count) in daily.items():
+        entry = monthly.setdefault((user_id, day.replace(day=1), category_id), [0, 0])
+        entry[0] += total
+        entry[1] += count
+
+    for table, period, groups in ((SpendDaily, "day", daily), (SpendMonthly, "month", monthly)):
+        rows = [
+            {"user_id": user_id, period: key, "category_id": category_id,
+             "total": sign * total, "count": sign * count}
+            for (user_id, key, category_id), (total, count) in groups.items()
+        ]
+        stmt = _upsert(db, table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.user_id, getattr(table, period), table.category_id],
+            set_={"total": table.total + stmt.excluded.total, "count": table.count + stmt.excluded.count}
+        )
+        await db.execute(stmt, rows)
+
+    if sign < 0:
+        # 거래가 모두 빠진 기간은 행 삭제
+        user_ids = list({user_id for user_id, _, _ in daily})
+        for table in (SpendDaily, SpendMonthly):
+            await db.execute(delete(table).where(table.user_id.in_(user_ids), table.count <= 0))
+
+
+async def add_transactions(db: AsyncSession, transaction_ids: Iterable[int]) -> None:
+    """
+    새로 저장한 거래를 집계에 반영 (flush 후, 커밋 전 같은 트랜잭션에서 호출)
+    """
+    await _apply(db, list(transaction_ids), 1)
+
+
+async def remove_transactions(db: AsyncSession, transaction_ids: Iterable[int]) -> None:
+    """
+    거래를 집계에서 차감 (이상거래 플래그 변경/개별 삭제 전에 호출)
+
+    이미 is_fraudulent = true인 거래는 집계에 없으므로 무시됩니다.
+    """
+    await _apply(db, list(transaction_ids), -1)
+
+
+async def clear_user_rollups(db: AsyncSession, user_id: int) -> None:
+    """사용자 거래 전체 삭제 시 집계 삭제"""
+    for table in (SpendDaily, SpendMonthly):
+        await db.execute(delete(table).where(table.user_id == user_id))
+
+
+async def rebuild_rollups(db: AsyncSession, user_ids: Optional[List[int]] = None) -> Dict[str, int]:
+    """
+    거래 원본에서 집계 재계산 (user_ids가 없으면 전체, 커밋은 호출자 책임)
+
+    Returns:
+        {"daily_rows": ..., "monthly_rows": ...}
+    """
+    for table in (SpendDaily, SpendMonthly):
+        stmt = delete(table)
+        if user_ids is not None:
+            stmt = stmt.where(table.user_id.in_(user_ids))
+        await db.execute(stmt)
+
+    day = func.date(Transaction.transaction_time)
+    category_id = _category_key()
+    daily_source = (
+        select(Transaction.user_id, day, category_id, func.sum(Transaction.amount), func.count(Transaction.id))
+        .where(Transaction.is_fraudulent == False)
+        .group_by(Transaction.user_id, day, category_id)
+    )
+    if user_ids is not None:
+        daily_source = daily_source.where(Transaction.user_id.in_(user_ids))
+    await db.execute(
+        SpendDaily.__table__.insert().from_select(["user_id", "day", "category_id", "total", "count"], daily_source)
+    )
+
+    month = _month_of(db, SpendDaily.day)
+    monthly_source = (
+        select(SpendDaily.user_id, month, SpendDaily.category_id, func.sum(SpendDaily.total), func.sum(SpendDaily.count))
+        .group_by(SpendDaily.user_id, month, SpendDaily.category_id)
+    )
+    if user_ids is not None:
+        monthly_source = monthly_source.where(SpendDaily.user_id.in_(user_ids))
+    await db.execute(
+        SpendMonthly.__table__.insert().from_select(["user_id", "month", "category_id", "total", "count"], monthly_source)
+    )
+
+    counts = {}
+    for key, table in (("daily_rows", SpendDaily), ("monthly_rows", SpendMonthly)):
+        stmt = select(func.count()).select_from(table)
+        if user_ids is not None:
+            stmt = stmt.where(table.user_id.in_(user_ids))
+        counts[key] = await db.scalar(stmt) or 0
+    logger.info(f"소비 집계 재계산 완료: {counts}")
+    return counts
+
+
+async def ensure_rollups(db: AsyncSession) -> bool:
+    """
+    집계 테이블이 비어 있고 거래가 있으면 전체 재계산 (집계 도입 후 첫 기동, 커밋은 호출자 책임)
+
+    Returns:
+        재계산 여부
+    """
+    if await db.scalar(select(SpendDaily.user_id).limit(1)) is not None:
+        return False
+    if await db.scalar(select(Transaction.id).where(Transaction.is_fraudulent == False).limit(1)) is None:
+        return False
+    await rebuild_rollups(db)
+    return True
+
+
+# ============================================================
+# 조회
+# ============================================================
+
+def _scope(stmt, table, user_id: Optional[int], exclude_superusers: bool):
+    """사용자 한 명 / 관리자 제외 전체 사용자 조건"""
+    if user_id is not None:
+        stmt = stmt.where(table.user_id == user_id)
+    if exclude_superusers:
+        stmt = stmt.join(User, User.id == table.user_id).where(User.is_superuser == False)
+    return stmt
+
+
+def _day_range(stmt, start: Optional[date], end: Optional[date]):
+    """start <= day < end (end가 없으면 상한 없음)"""
+    if start is not None:
+        stmt = stmt.where(SpendDaily.day >= start)
+    if end is not None:
+        stmt = stmt.where(SpendDaily.day < end)
+    return stmt
+
+
+async def spend_totals(
+    db: AsyncSession,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    exclude_superusers: bool = False
+) -> Tuple[float, int]:
+    """기간 합계 (금액, 건수)"""
+    stmt = select(func.coalesce(func.sum(SpendDaily.total), 0), func.coalesce(func.sum(SpendDaily.count), 0))
+    stmt = _day_range(_scope(stmt, SpendDaily, user_id, exclude_superusers), start, end)
+    total, count = (await db.execute(stmt)).one()
+    return float(total or 0), int(count or 0)
+
+
+async def spend_by_category(
+    db: AsyncSession,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    exclude_superusers: bool = False,
+    limit: Optional[int] = None,
+    include_uncategorized: bool = True
+) -> List[Tuple[Optional[str], float, int]]:
+    """
+    기간 카테고리 이름별 합계 (금액 큰 순)
+
+    Returns:
+        [(카테고리 이름 또는 None, 금액, 건수), ...]  None은 카테고리 없음/삭제된 카테고리
+    """
+    total = func.sum(SpendDaily.total)
+    stmt = select(Category.name, total, func.sum(SpendDaily.count))
+    if include_uncategorized:
+        stmt = stmt.select_from(SpendDaily).outerjoin(Category, Category.id == SpendDaily.category_id)
+    else:
+        stmt = stmt.select_from(SpendDaily).join(Category, Category.id == SpendDaily.category_id)
+    stmt = _day_range(_scope(stmt, SpendDaily, user_id, exclude_superusers), start, end)
+    stmt = stmt.group_by(Category.name).order_by(total.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [(name, float(amount or 0), int(count or 0)) for name, amount, count in (await db.execute(stmt)).all()]
+
+
+async def monthly_trend(
+    db: AsyncSession,
+    months: int,
+    user_id: Optional[int] = None,
+    exclude_superusers: bool = False
+) -> List[Tuple[str, float, int]]:
+    """
+    최근 months개월 월별 합계 (거래가 있는 달만, 최신순)
+
+    Returns:
+        [("YYYY-MM", 금액, 건수), ...]
+    """
+    stmt = select(SpendMonthly.month, func.sum(SpendMonthly.total), func.sum(SpendMonthly.count))
+    stmt = _scope(stmt, SpendMonthly, user_id, exclude_superusers)
+    stmt = stmt.group_by(SpendMonthly.month).order_by(SpendMonthly.month.desc()).limit(months)
+    return [
+        (_as_date(month).strftime("%Y-%m"), float(amount or 0), int(count or 0))
+        for month, amount, count in (await db.execute(stmt)).all()
+    ]
@@ -0,0 +1,230 @@
+"""
+Transaction Bulk Insert
+거래 일괄 생성 (POST /transactions/bulk)
+
+- 날짜 파싱: 행마다 strptime을 시도하는 대신 pandas로 형식별 한 번씩 벡터화 파싱
+- 저장: BULK_INSERT_CHUNK_SIZE 단위 executemany (SQLAlchemy insertmanyvalues → multi-VALUES INSERT ... RETURNING)
+  청크마다 SAVEPOINT를 쓰고, 청크가 실패하면 그 청크만 행 단위로 다시 저장해 실패 행을 보고
+- 멱등성: 클라이언트가 보낸 dedupe_key가 이미 있는 거래(요청 내 중복 포함)는 건너뜀
+  (transactions (user_id, dedupe_key) 유니크 인덱스로 동시 재시도도 보호)
+
+사용 예:
+    result = await insert_transactions_bulk(db, user_id, data.transactions)
+    await db.commit()
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+import math
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.model.transaction import Transaction
+from app.services.category_cache import get_category_ids
+
+logger = logging.getLogger(__name__)
+
+BULK_INSERT_CHUNK_SIZE = int(os.getenv("BULK_INSERT_CHUNK_SIZE", 1000))
+
+# 시도 순서대로 (초 단위는 버림)
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+RANDOM_DATE_MAX_DAYS = 365  # 파싱 실패 시 임의의 과거 날짜 범위 (Team Logic)
+
+MAX_AMOUNT = 10 ** 10       # Numeric(12, 2) 한도
+MAX_MERCHANT_LENGTH = 255
+MAX_CURRENCY_LENGTH = 10
+MAX_DEDUPE_KEY_LENGTH = 100
+
+
+@dataclass
+class BulkInsertResult:
+    """일괄 생성 결과"""
+    created: List[Dict[str, Any]] = field(default_factory=list)   # 저장된 행 값 (id 포함, 요청 순서)
+    failures: List[Dict[str, Any]] = field(default_factory=list)  # {"index", "dedupe_key", "error"}
+    skipped: List[Dict[str, Any]] = field(default_factory=list)   # dedupe_key 중복으로 건너뛴 행
+
+
+# ============================================================
+# 파싱 / 검증
+# ============================================================
+
+def parse_transaction_dates(values: List[Optional[str]], now: Optional[datetime] = None) -> Tuple[List[Optional[datetime]], int]:
+    """
+    거래 일시 문자열 목록을 분 단위 datetime으로 변환 (형식별 벡터화 파싱)
+
+    DATE_FORMATS 중 어느 것과도 맞지 않으면 최근 RANDOM_DATE_MAX_DAYS일 중 임의의 날짜를 씁니다.
+    값이 없으면(None) None을 돌려주며, 호출자가 실패 행으로 처리합니다.
+
+    Returns:
+        (datetime 목록, 임의 날짜로 대체한 행 수)
+    """
+    raw = pd.Series(values, dtype=object)
+    missing = raw.isna().to_numpy()
+    text = raw.where(~missing, "").astype(str)
+
+    parsed = pd.Series(pd.NaT, index=raw.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        todo = parsed.isna().to_numpy() & ~missing
+        if not todo.any():
+            break
+        parsed[todo] = pd.to_datetime(text[todo], format=fmt, errors="coerce")
+
+    unparsed = parsed.isna().to_numpy() & ~missing
+    if unparsed.any():
+        # Fallback: Random past date (Team Logic)
+        now = (now or datetime.now()).replace(second=0, microsecond=0)
+        days_ago = np.random.randint(0, RANDOM_DATE_MAX_DAYS + 1, size=int(unparsed.sum()))
+        parsed[unparsed] = pd.Timestamp(now) - pd.to_timedelta(days_ago, unit="D")
+
+    # User Request: Truncate seconds even if provided
+    parsed = parsed.dt.floor("min")
+    stamps = parsed.to_numpy().astype("datetime64[us]").astype(object)
+    return [None if miss else stamp for stamp, miss in zip(stamps, missing)], int(unparsed.sum())
+
+
+def _validate(tx) -> Optional[str]:
+    """DB 제약에 걸릴 값 사전 검사 (청크 전체가 실패하지 않도록)"""
+    if not math.isfinite(tx.amount) or abs(tx.amount) >= MAX_AMOUNT:
+        return "amount 범위 초과"
+    merchant = tx.merchant_name or tx.merchant
+    if merchant and len(merchant) > MAX_MERCHANT_LENGTH:
+        return f"merchant는 {MAX_MERCHANT_LENGTH}자 이하여야 합니다"
+    if tx.currency and len(tx.currency) > MAX_CURRENCY_LENGTH:
+        return f"currency는 {MAX_CURRENCY_LENGTH}자 이하여야 합니다"
+    if tx.dedupe_key and len(tx.dedupe_key) > MAX_DEDUPE_KEY_LENGTH:
+        return f"dedupe_key는 {MAX_DEDUPE_KEY_LENGTH}자 이하여야 합니다"
+    return None
+
+
+# ============================================================
+# 저장
+# ============================================================
+
+async def _existing_keys(db: AsyncSession, user_id: int, keys: List[str]) -> set:
+    """이미 저장된 dedupe_key (청크 단위 IN 조회)"""
+    found = set()
+    for start in range(0, len(keys), BULK_INSERT_CHUNK_SIZE):
+        result = await db.execute(
+            select(Transaction.dedupe_key)
+            .where(Transaction.user_id == user_id)
+            .where(Transaction.dedupe_key.in_(keys[start:start + BULK_INSERT_CHUNK_SIZE]))
+        )
+        found.update(result.scalars().all())
+    return found
+
+
+async def _insert_chunk(db: AsyncSession, rows: List[Dict[str, Any]]) -> List[int]:
+    """한 청크를 executemany로 저장하고 요청 순서대로 id 반환"""
+    result = await db.execute(
+        insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+        rows
+    )
+    return list(result.scalars().all())
+
+
+async def _insert_rows_one_by_one(
+    db: AsyncSession,
+    user_id: int,
+    chunk: List[Tuple[int, Dict[str, Any]]],
+    result: BulkInsertResult
+) -> None:
+    """
+    청크 저장 실패 시 행 단위로 다시 저장 (동시 재시도로 생긴 중복 키는 건너뜀)
+    """
+    keys = [row["dedupe_key"] for _, row in chunk if row["dedupe_key"]]
+    existing = await _existing_keys(db, user_id, keys) if keys else set()
+
+    for index, row in chunk:
+        if row["dedupe_key"] in existing:
+            result.skipped.append({"index": index, "dedupe_key": row["dedupe_key"]})
+            continue
+        try:
+            async with db.begin_nested():
+                (tx_id,) = await _insert_chunk(db, [row])
+            result.created.append({**row, "id": tx_id, "index": index})
+        except DBAPIError as e:
+            logger.warning(f"거래 개별 생성 실패 (index {index}): {e.orig}")
+            result.failures.append({"index": index, "dedupe_key": row["dedupe_key"], "error": "저장 실패"})
+
+
+async def insert_transactions_bulk(db: AsyncSession, user_id: int, transactions: List[Any]) -> BulkInsertResult:
+    """
+    거래 일괄 저장 (커밋은 호출자 책임)
+
+    Args:
+        transactions: TransactionCreate 목록 (category, amount, merchant(_name), transaction_date, dedupe_key ...)
+
+    Returns:
+        BulkInsertResult (created 행에는 id, index, category_name 포함)
+    """
+    result = BulkInsertResult()
+
+    # 카테고리 매핑 조회 (이름이 같은 카테고리가 여럿이면 id가 가장 작은 것)
+    category_ids = await get_category_ids(db)
+    categories = {name: ids[0] for name, ids in category_ids.items()}
+    category_names = {cat_id: name for name, cat_id in categories.items()}
+    default_category = categories.get('기타') or (next(iter(categories.values())) if categories else None)
+
+    tx_times, random_dates = parse_transaction_dates([tx.transaction_date for tx in transactions])
+    if random_dates:
+        logger.info(f"일괄 생성: 날짜 형식을 알 수 없는 {random_dates}건은 임의의 과거 날짜 사용")
+
+    # 검증 + 요청 내 중복 키 제거
+    pending: List[Tuple[int, Dict[str, Any]]] = []
+    seen_keys = set()
+    for index, (tx, tx_time) in enumerate(zip(transactions, tx_times)):
+        error = "transaction_date 누락" if tx_time is None else _validate(tx)
+        if error:
+            result.failures.append({"index": index, "dedupe_key": tx.dedupe_key, "error": error})
+            continue
+        if tx.dedupe_key:
+            if tx.dedupe_key in seen_keys:
+                result.skipped.append({"index": index, "dedupe_key": tx.dedupe_key})
+                continue
+            seen_keys.add(tx.dedupe_key)
+
+        category_id = categories.get(tx.category) or default_category
+        pending.append((index, {
+            "user_id": user_id,
+            "category_id": category_id,
+            "amount": tx.amount,
+            "currency": tx.currency or "KRW",
+            "merchant_name": tx.merchant_name or tx.merchant,
+            "description": tx.description,
+            "status": "completed",
+            "transaction_time": tx_time,
+            "dedupe_key": tx.dedupe_key,
+        }))
+
+    # 이미 저장된 키 (이전 요청의 재시도)
+    existing = await _existing_keys(db, user_id, list(seen_keys)) if seen_keys else set()
+    if existing:
+        result.skipped.extend(
+            {"index": index, "dedupe_key": row["dedupe_key"]} for index, row in pending if row["dedupe_key"] in existing
+        )
+        pending = [(index, row) for index, row in pending if row["dedupe_key"] not in existing]
+
+    for start in range(0, len(pending), BULK_INSERT_CHUNK_SIZE):
+        chunk = pending[start:start + BULK_INSERT_CHUNK_SIZE]
+        try:
+            async with db.begin_nested():
+                ids = await _insert_chunk(db, [row for _, row in chunk])
+        except DBAPIError as e:
+            logger.warning(f"일괄 생성 청크 실패, 행 단위로 재시도 ({len(chunk)}건): {e.orig}")
+            await _insert_rows_one_by_one(db, user_id, chunk, result)
+            continue
+        result.created.extend({**row, "id": tx_id, "index": index} for (index, row), tx_id in zip(chunk, ids))
+
+    for row in result.created:
+        row["category_name"] = category_names.get(row["category_id"])
+    result.created.sort(key=lambda row: row["index"])
+    result.failures.sort(key=lambda row: row["index"])
+    result.skipped.sort(key=lambda row: row["index"])
+    return result
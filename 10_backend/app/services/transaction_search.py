@@ -0,0 +1,278 @@
+"""
+Transaction Search
+거래 가맹점명/설명 검색
+
+- PostgreSQL + pg_trgm: merchant_name / description GIN(gin_trgm_ops) 인덱스로 부분 일치(ILIKE)와
+  오타 허용(word_similarity, <% 연산자) 검색, 유사도 순 정렬(relevance) 지원
+- 가맹점명 정규화 테이블(merchant_names): "(주)스타벅스 강남점" / "스타벅스강남점"처럼 표기가 달라도 같은 가맹점으로 검색
+- 확장이 없는 DB(SQLite 등)는 기존과 같은 ILIKE 검색으로 동작 (정렬은 최신순)
+- 자동완성: 사용자별 가맹점 목록을 정규화 이름 순으로 프로세스 내에 보관하고 접두어 이분 탐색
+
+사용 예:
+    backend = await get_search_backend(db)
+    condition, rank = search_condition(backend, search)
+    names = await autocomplete_merchants(db, user_id, "스타")
+"""
+
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, Tuple, Iterable
+import os
+import re
+import time
+import unicodedata
+import logging
+
+from sqlalchemy import select, func, or_, and_, literal, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.model.transaction import Transaction, MerchantName
+
+logger = logging.getLogger(__name__)
+
+SEARCH_BACKEND_TRIGRAM = "trigram"  # PostgreSQL + pg_trgm
+SEARCH_BACKEND_ILIKE = "ilike"      # 확장 없음: 기존 ILIKE 검색
+
+MERCHANT_INDEX_TTL_SECONDS = int(os.getenv("MERCHANT_INDEX_TTL_SECONDS", 300))
+MERCHANT_INDEX_MAX_USERS = int(os.getenv("MERCHANT_INDEX_MAX_USERS", 1000))
+MERCHANT_SYNC_CHUNK_SIZE = 1000
+
+# 법인 표기 (정규화 시 제거)
+_CORPORATE_MARKS = re.compile(r"\(주\)|\(유\)|\(사\)|㈜|주식회사|유한회사")
+# 한글/영문/숫자 외 문자 (공백, 기호)
+_NON_WORD = re.compile(r"[^0-9a-z가-힣ㄱ-ㅎㅏ-ㅣ]+")
+
+# 프로세스 내 검색 백엔드 (첫 조회 시 결정)
+_backend: Optional[str] = None
+
+# user_id → (만료 시각, 정규화 이름 목록, [(정규화 이름, 표시 이름, 거래 수)]) 정규화 이름 순
+_merchant_index: "OrderedDict[int, tuple]" = OrderedDict()
+
+
+# ============================================================
+# 가맹점명 정규화
+# ============================================================
+
+def normalize_merchant(name: Optional[str]) -> str:
+    """
+    검색용 가맹점명 정규화
+
+    NFKC(전각/반각 통일) → 소문자 → 법인 표기 제거 → 공백/기호 제거
+    예: "(주)스타벅스 강남점" → "스타벅스강남점", "ＧＳ２５ 역삼" → "gs25역삼"
+    """
+    if not name:
+        return ""
+    value = unicodedata.normalize("NFKC", name).lower()
+    value = _CORPORATE_MARKS.sub("", value)
+    return _NON_WORD.sub("", value)
+
+
+async def register_merchant_names(db: AsyncSession, names: Iterable[Optional[str]]) -> int:
+    """
+    새 가맹점명을 merchant_names에 추가 (이미 있는 이름은 무시, 커밋은 호출자 책임)
+
+    정규화 테이블은 trigram 검색에서만 쓰므로 확장이 없는 DB에서는 아무것도 하지 않습니다.
+
+    Returns:
+        추가 시도한 이름 수
+    """
+    if await get_search_backend(db) != SEARCH_BACKEND_TRIGRAM:
+        return 0
+    rows = [
+        {"raw_name": name, "normalized_name": normalize_merchant(name)}
+        for name in sorted({name for name in names if name})
+    ]
+    if not rows:
+        return 0
+
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    for start in range(0, len(rows), MERCHANT_SYNC_CHUNK_SIZE):
+        await db.execute(
+            pg_insert(MerchantName).on_conflict_do_nothing(index_elements=[MerchantName.raw_name]),
+            rows[start:start + MERCHANT_SYNC_CHUNK_SIZE]
+        )
+    return len(rows)
+
+
+async def sync_merchant_names(db: AsyncSession) -> int:
+    """
+    merchant_names에 없는 거래 가맹점명을 모두 등록 (스케줄러 작업, 커밋은 호출자 책임)
+
+    Returns:
+        새로 등록한 이름 수
+    """
+    if await get_search_backend(db) != SEARCH_BACKEND_TRIGRAM:
+        return 0
+    result = await db.execute(
+        select(Transaction.merchant_name)
+        .distinct()
+        .outerjoin(MerchantName, MerchantName.raw_name == Transaction.merchant_name)
+        .where(Transaction.merchant_name.isnot(None))
+        .where(MerchantName.raw_name.is_(None))
+    )
+    return await register_merchant_names(db, result.scalars().all())
+
+
+# ============================================================
+# 검색 조건
+# ============================================================
+
+async def get_search_backend(db: AsyncSession) -> str:
+    """
+    검색 백엔드 결정 (프로세스당 한 번 조회)
+
+    PostgreSQL이고 pg_trgm 확장이 설치되어 있으면 trigram, 아니면 ilike
+    """
+    global _backend
+    if _backend is not None:
+        return _backend
+
+    backend = SEARCH_BACKEND_ILIKE
+    if db.get_bind().dialect.name == "postgresql":
+        try:
+            installed = await db.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+            if installed:
+                backend = SEARCH_BACKEND_TRIGRAM
+        except Exception as e:
+            logger.warning(f"pg_trgm 확인 실패, ILIKE 검색 사용: {e}")
+
+    _backend = backend
+    logger.info(f"거래 검색 백엔드: {backend}")
+    return backend
+
+
+def reset_search_backend() -> None:
+    """검색 백엔드 재확인 (확장 설치/삭제 후)"""
+    global _backend
+    _backend = None
+
+
+def search_condition(backend: str, term: str) -> Tuple[Any, Optional[Any]]:
+    """
+    ORM 쿼리용 검색 조건과 유사도 점수 식
+
+    Returns:
+        (WHERE 조건, 유사도 식 또는 None)  ilike 백엔드는 기존 조건 그대로, 유사도 없음
+    """
+    pattern = f"%{term}%"
+    substring = or_(
+        Transaction.merchant_name.ilike(pattern),
+        Transaction.description.ilike(pattern)
+    )
+    if backend != SEARCH_BACKEND_TRIGRAM:
+        return substring, None
+
+    clauses = [
+        substring,
+        # 오타 허용: word_similarity(term, merchant_name) > pg_trgm.word_similarity_threshold
+        literal(term).op("<%")(Transaction.merchant_name),
+    ]
+    normalized = normalize_merchant(term)
+    if normalized:
+        clauses.append(Transaction.merchant_name.in_(
+            select(MerchantName.raw_name).where(MerchantName.normalized_name.like(f"%{normalized}%"))
+        ))
+
+    rank = func.greatest(
+        func.word_similarity(term, func.coalesce(Transaction.merchant_name, "")),
+        func.word_similarity(term, func.coalesce(Transaction.description, ""))
+    )
+    return or_(*clauses), rank
+
+
+def search_sql(backend: str, term: str, alias: str = "t") -> Tuple[str, Optional[str], Dict[str, Any]]:
+    """
+    text() SQL용 검색 조건 (관리자 거래 조회)
+
+    Returns:
+        (WHERE 조건 SQL, 유사도 식 SQL 또는 None, 바인드 파라미터)
+    """
+    params: Dict[str, Any] = {"search": f"%{term}%"}
+    substring = f"{alias}.merchant_name ILIKE :search OR {alias}.description ILIKE :search"
+    if backend != SEARCH_BACKEND_TRIGRAM:
+        return f"({substring})", None, params
+
+    params["search_term"] = term
+    clauses = [substring, f":search_term <% {alias}.merchant_name"]
+    normalized = normalize_merchant(term)
+    if normalized:
+        params["search_normalized"] = f"%{normalized}%"
+        clauses.append(
+            f"{alias}.merchant_name IN "
+            "(SELECT raw_name FROM merchant_names WHERE normalized_name LIKE :search_normalized)"
+        )
+
+    rank = (
+        f"greatest(word_similarity(:search_term, coalesce({alias}.merchant_name, '')), "
+        f"word_similarity(:search_term, coalesce({alias}.description, '')))"
+    )
+    return "(" + " OR ".join(clauses) + ")", rank, params
+
+
+# ============================================================
+# 가맹점 자동완성 (사용자별 프로세스 내 접두어 인덱스)
+# ============================================================
+
+async def _build_merchant_index(db: AsyncSession, user_id: int) -> tuple:
+    """사용자의 가맹점별 거래 수 조회 → 정규화 이름 순 정렬 목록"""
+    result = await db.execute(
+        select(Transaction.merchant_name, func.count(Transaction.id))
+        .where(and_(
+            Transaction.user_id == user_id,
+            Transaction.is_fraudulent == False,
+            Transaction.merchant_name.isnot(None)
+        ))
+        .group_by(Transaction.merchant_name)
+    )
+
+    # 정규화 이름이 같은 가맹점은 거래가 가장 많은 표기로 합침
+    merged: Dict[str, list] = {}
+    for name, count in result.all():
+        key = normalize_merchant(name)
+        if not key:
+            continue
+        entry = merged.get(key)
+        if entry is None:
+            merged[key] = [name, count, count]
+        else:
+            if count > entry[2]:
+                entry[0], entry[2] = name, count
+            entry[1] += count
+
+    entries = sorted((key, name, total) for key, (name, total, _) in merged.items())
+    return [entry[0] for entry in entries], entries
+
+
+async def autocomplete_merchants(db: AsyncSession, user_id: int, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    사용자가 거래한 가맹점 중 접두어가 일치하는 것 (거래 수 많은 순)
+
+    접두어는 정규화 후 비교하므로 공백/기호/법인 표기와 대소문자는 무시됩니다.
+    접두어가 비어 있으면 자주 거래한 가맹점을 돌려줍니다.
+    """
+    entry = _merchant_index.get(user_id)
+    if entry is None or entry[0] < time.monotonic():
+        keys, entries = await _build_merchant_index(db, user_id)
+        entry = (time.monotonic() + MERCHANT_INDEX_TTL_SECONDS, keys, entries)
+        _merchant_index[user_id] = entry
+        while len(_merchant_index) > MERCHANT_INDEX_MAX_USERS:
+            _merchant_index.popitem(last=False)
+    _merchant_index.move_to_end(user_id)
+    _, keys, entries = entry
+
+    normalized = normalize_merchant(prefix)
+    start = bisect_left(keys, normalized)
+    end = start
+    while end < len(keys) and keys[end].startswith(normalized):
+        end += 1
+
+    matches = sorted(entries[start:end], key=lambda item: (-item[2], item[0]))
+    return [{"merchant": name, "count": count} for _, name, count in matches[:limit]]
+
+
+def invalidate_merchant_index(user_id: Optional[int] = None) -> None:
+    """자동완성 인덱스 삭제 (거래 생성/삭제 시, user_id가 없으면 전체)"""
+    if user_id is None:
+        _merchant_index.clear()
+    else:
+        _merchant_index.pop(user_id, None)
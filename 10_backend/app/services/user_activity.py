@@ -0,0 +1,80 @@
+"""
+User Activity Service
+사용자 활동/이탈(churn) 집합 계산 (관리자 사용자 분석 /admin/users)
+
+이탈 사용자 = 최근 N일 동안 거래가 한 건도 없는 사용자 (관리자 제외)
+
+사용자마다 "최근 거래가 있는지" 쿼리를 보내지 않고, 최근 N일 거래의 user_id 집합을
+transaction_time 인덱스 범위 스캔 한 번으로 구해 users와 함께 조회합니다.
+사용자 수와 관계없이 요청당 쿼리 1회입니다.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Tuple, Dict, Iterable, Optional, Any
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+
+from app.db.model.user import User
+from app.db.model.transaction import Transaction
+
+DEFAULT_ACTIVITY_DAYS = 30  # UserResponse.has_recent_activity 기준
+
+
+def active_user_ids(days: int, now: Optional[datetime] = None):
+    """최근 days일 안에 거래가 있는 user_id 집합 (서브쿼리)"""
+    cutoff = (now or datetime.now()) - timedelta(days=days)
+    return select(Transaction.user_id).where(Transaction.transaction_time >= cutoff).distinct()
+
+
+async def list_users_with_activity(
+    db: AsyncSession,
+    where: Iterable[Any] = (),
+    order_by: Iterable[Any] = (User.id.asc(),),
+    activity_days: int = DEFAULT_ACTIVITY_DAYS,
+    churned_only: bool = False
+) -> List[Tuple[User, bool]]:
+    """
+    관리자 제외 사용자 목록 + 최근 활동 여부 (쿼리 1회)
+
+    Args:
+        where: 추가 조건 (예: User.created_at >= cutoff)
+        activity_days: 최근 활동 판단 기간 (일)
+        churned_only: True면 활동이 없는(이탈) 사용자만
+
+    Returns:
+        [(User, has_recent_activity), ...]
+    """
+    is_active = User.id.in_(active_user_ids(activity_days))
+    # login_histories(selectin)는 목록 응답에 쓰지 않으므로 읽지 않음
+    stmt = select(User, is_active).options(noload(User.login_histories)).where(User.is_superuser == False, *where)
+    if churned_only:
+        stmt = stmt.where(~is_active)
+    stmt = stmt.order_by(*order_by)
+    return [(user, bool(active)) for user, active in (await db.execute(stmt)).all()]
+
+
+async def get_churn_counts(db: AsyncSession, churn_days: int, signup_days: int) -> Dict[str, int]:
+    """
+    이탈/가입 집계 (쿼리 1회)
+
+    Returns:
+        {"total_users": ..., "total_churned": ..., "new_signups": ...}
+    """
+    signup_cutoff = datetime.now() - timedelta(days=signup_days)
+    is_active = User.id.in_(active_user_ids(churn_days))
+    stmt = (
+        select(
+            func.count(User.id),
+            func.count(User.id).filter(~is_active),
+            func.count(User.id).filter(User.created_at >= signup_cutoff)
+        )
+        .where(User.is_superuser == False)
+    )
+    total_users, total_churned, new_signups = (await db.execute(stmt)).one()
+    return {
+        "total_users": total_users or 0,
+        "total_churned": total_churned or 0,
+        "new_signups": new_signups or 0,
+    }
@@ -0,0 +1,410 @@
+"""
+User Cohort Service
+일별 가입/활동 코호트(user_activity_daily) 유지와 비트맵 기반 이탈률·리텐션·이탈 추이 계산
+
+- 스케줄러(refresh_user_cohorts)가 마지막 저장일부터 오늘까지 다시 만듦
+  직전 갱신 이후 저장된 거래 중 과거 날짜(카드 내역 일괄 입력, transaction_date 지정)가 있으면
+  그 날짜부터 다시 만듦 (최근 N일 집합도 그 날짜 이후 전부 재계산)
+  (최초 실행 시 USER_COHORT_BACKFILL_DAYS일 백필, 저장된 첫 날 이전은 조회하지 않음)
+- 사용자 집합은 비트맵(bit i = user_id i)으로 저장 → 이탈/리텐션은 OR/AND/popcount 연산
+- 최근 7/30/90일 활동 집합은 미리 저장, 그 외 기간은 일별 활동 비트맵을 OR
+
+기간은 일 단위입니다: "최근 N일" = 오늘 포함 N개 날짜 (실시간 계산은 현재 시각 - N일 이후).
+사용자/거래 삭제처럼 저장 시각으로 찾을 수 없는 변경 후에는
+scripts/rebuild_user_cohorts.py로 다시 만드세요.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Dict, Iterable, Any, Sequence
+import os
+import zlib
+import logging
+
+import numpy as np
+from sqlalchemy import select, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.model.cohort import UserActivityDaily
+from app.db.model.transaction import Transaction
+from app.db.model.user import User
+
+logger = logging.getLogger(__name__)
+
+USER_COHORTS_ENABLED = os.getenv("USER_COHORTS", "1") == "1"
+USER_COHORT_REFRESH_SECONDS = int(os.getenv("USER_COHORT_REFRESH_SECONDS", 900))
+USER_COHORT_BACKFILL_DAYS = int(os.getenv("USER_COHORT_BACKFILL_DAYS", 400))  # 최대 조회 기간(365일) + 여유
+COHORT_BUILD_CHUNK_DAYS = 31  # 활동 집합을 한 번에 읽는 날짜 수
+# 직전 갱신 시각보다 이만큼 앞서 저장된 거래부터 다시 확인 (갱신 중 커밋된 긴 트랜잭션 대비)
+COHORT_LATE_MARGIN_SECONDS = int(os.getenv("COHORT_LATE_MARGIN_SECONDS", 3600))
+
+ROLLING_WINDOWS = {
+    7: "active_7d_bitmap",
+    30: "active_30d_bitmap",
+    90: "active_90d_bitmap",
+}
+MAX_ROLLING_DAYS = max(ROLLING_WINDOWS)
+
+
+# ============================================================
+# 비트맵 (numpy uint8, bit i = user_id i)
+# ============================================================
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_EMPTY = np.zeros(0, dtype=np.uint8)
+
+
+def to_bitmap(user_ids: Iterable[int]) -> np.ndarray:
+    """user_id 목록 → 비트맵"""
+    ids = np.fromiter(user_ids, dtype=np.int64)
+    if not len(ids):
+        return _EMPTY
+    bits = np.zeros(int(ids.max()) + 1, dtype=bool)
+    bits[ids] = True
+    return np.packbits(bits, bitorder="little")
+
+
+def bitmap_ids(bitmap: np.ndarray) -> np.ndarray:
+    """비트맵 → user_id 배열"""
+    return np.flatnonzero(np.unpackbits(bitmap, bitorder="little"))
+
+
+def bitmap_count(bitmap: np.ndarray) -> int:
+    return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+
+def bitmap_or(bitmaps: Sequence[np.ndarray]) -> np.ndarray:
+    size = max((len(b) for b in bitmaps), default=0)
+    result = np.zeros(size, dtype=np.uint8)
+    for bitmap in bitmaps:
+        result[:len(bitmap)] |= bitmap
+    return result
+
+
+def bitmap_and(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    size = min(len(a), len(b))
+    return a[:size] & b[:size]
+
+
+def encode_bitmap(bitmap: np.ndarray) -> bytes:
+    return zlib.compress(np.ascontiguousarray(bitmap, dtype=np.uint8).tobytes())
+
+
+def decode_bitmap(blob: bytes) -> np.ndarray:
+    return np.frombuffer(zlib.decompress(blob), dtype=np.uint8)
+
+
+def _as_date(value: Any) -> date:
+    """date(...) 결과 (SQLite는 문자열) → date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+# ============================================================
+# 유지 (스케줄러)
+# ============================================================
+
+async def _active_sets(db: AsyncSession, start: date, end: date) -> Dict[date, List[int]]:
+    """start ~ end(포함) 날짜별 거래가 있는 사용자 (관리자 제외)"""
+    day = func.date(Transaction.transaction_time)
+    active: Dict[date, List[int]] = {}
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=COHORT_BUILD_CHUNK_DAYS - 1), end)
+        result = await db.execute(
+            select(day, Transaction.user_id)
+            .join(User, User.id == Transaction.user_id)
+            .where(
+                User.is_superuser == False,
+                Transaction.transaction_time >= datetime.combine(chunk_start, datetime.min.time()),
+                Transaction.transaction_time < datetime.combine(chunk_end + timedelta(days=1), datetime.min.time())
+            )
+            .distinct()
+        )
+        for row_day, user_id in result.all():
+            active.setdefault(_as_date(row_day), []).append(user_id)
+        chunk_start = chunk_end + timedelta(days=1)
+    return active
+
+
+async def build_user_cohorts(db: AsyncSession, start: date, end: date) -> int:
+    """
+    start ~ end(포함) 일별 코호트 행을 다시 계산해 저장 (커밋은 호출자 책임)
+
+    최근 N일 집합은 start 이전 저장된 일별 활동 비트맵을 이어서 사용합니다.
+
+    Returns:
+        저장한 날짜 수
+    """
+    if start > end:
+        return 0
+
+    users = (await db.execute(
+        select(User.id, func.date(User.created_at)).where(User.is_superuser == False)
+    )).all()
+    user_ids = np.array([user_id for user_id, _ in users], dtype=np.int64)
+    signup_days = np.array([_as_date(created).toordinal() for _, created in users], dtype=np.int64)
+
+    active = await _active_sets(db, start, end)
+
+    # 최근 90일 집합을 위한 이전 일별 활동 비트맵
+    window: Dict[date, np.ndarray] = {
+        _as_date(row_day): decode_bitmap(blob)
+        for row_day, blob in (await db.execute(
+            select(UserActivityDaily.day, UserActivityDaily.active_bitmap)
+            .where(
+                UserActivityDaily.day >= start - timedelta(days=MAX_ROLLING_DAYS - 1),
+                UserActivityDaily.day < start
+            )
+        )).all()
+    }
+
+    await db.execute(delete(UserActivityDaily).where(UserActivityDaily.day >= start, UserActivityDaily.day <= end))
+
+    now = datetime.now()
+    rows = []
+    current = start
+    while current <= end:
+        ordinal = current.toordinal()
+        active_bitmap = to_bitmap(active.get(current, ()))
+        signup_bitmap = to_bitmap(user_ids[signup_days == ordinal])
+        users_bitmap = to_bitmap(user_ids[signup_days <= ordinal])
+
+        window[current] = active_bitmap
+        rolling = {
+            column: encode_bitmap(bitmap_or([
+                window[d] for d in (current - timedelta(days=k) for k in range(days)) if d in window
+            ]))
+            for days, column in ROLLING_WINDOWS.items()
+        }
+        window.pop(current - timedelta(days=MAX_ROLLING_DAYS - 1), None)
+
+        rows.append({
+            "day": current,
+            "signups": bitmap_count(signup_bitmap),
+            "active_users": bitmap_count(active_bitmap),
+            "total_users": bitmap_count(users_bitmap),
+            "signup_bitmap": encode_bitmap(signup_bitmap),
+            "active_bitmap": encode_bitmap(active_bitmap),
+            "users_bitmap": encode_bitmap(users_bitmap),
+            **rolling,
+            "updated_at": now,
+        })
+        current += timedelta(days=1)
+
+    for chunk_start in range(0, len(rows), COHORT_BUILD_CHUNK_DAYS):
+        await db.execute(UserActivityDaily.__table__.insert(), rows[chunk_start:chunk_start + COHORT_BUILD_CHUNK_DAYS])
+    return len(rows)
+
+
+async def refresh_user_cohorts(db: AsyncSession, today: Optional[date] = None) -> int:
+    """
+    코호트 갱신 (커밋은 호출자 책임)
+
+    - 처음이면 최근 USER_COHORT_BACKFILL_DAYS일 백필
+    - 이후에는 마지막 저장일, 또는 직전 갱신 이후 저장된 과거 날짜 거래의 가장 이른 날부터 오늘까지
+
+    Returns:
+        저장한 날짜 수
+    """
+    today = today or date.today()
+    first_day, last_day, last_refreshed = (await db.execute(
+        select(func.min(UserActivityDaily.day), func.max(UserActivityDaily.day), func.max(UserActivityDaily.updated_at))
+    )).one()
+    if last_day is None:
+        start = today - timedelta(days=USER_COHORT_BACKFILL_DAYS - 1)
+    else:
+        start = min(_as_date(last_day), today)
+        earliest_late = await db.scalar(
+            select(func.min(func.date(Transaction.transaction_time)))
+            .where(Transaction.created_at >= last_refreshed - timedelta(seconds=COHORT_LATE_MARGIN_SECONDS))
+        )
+        if earliest_late is not None:
+            # 저장된 첫 날 이전은 코호트 범위 밖
+            start = max(min(start, _as_date(earliest_late)), _as_date(first_day))
+    days = await build_user_cohorts(db, start, today)
+    logger.info(f"User cohorts refreshed: {start} ~ {today} ({days} days)")
+    return days
+
+
+async def rebuild_user_cohorts(db: AsyncSession, days: int = USER_COHORT_BACKFILL_DAYS) -> int:
+    """전체 삭제 후 최근 days일 다시 만듦 (커밋은 호출자 책임)"""
+    await db.execute(delete(UserActivityDaily))
+    today = date.today()
+    return await build_user_cohorts(db, today - timedelta(days=days - 1), today)
+
+
+# ============================================================
+# 조회
+# ============================================================
+
+async def _first_day(db: AsyncSession) -> Optional[date]:
+    """저장된 첫 날 (이전 날짜의 활동은 코호트에 없음)"""
+    first_day = await db.scalar(select(func.min(UserActivityDaily.day)))
+    return _as_date(first_day) if first_day is not None else None
+
+
+async def _load_rows(db: AsyncSession, start: date, end: date, *columns) -> Dict[date, tuple]:
+    result = await db.execute(
+        select(UserActivityDaily.day, *columns)
+        .where(UserActivityDaily.day >= start, UserActivityDaily.day <= end)
+    )
+    return {_as_date(row[0]): tuple(row[1:]) for row in result.all()}
+
+
+def _window_bitmap(active_by_day: Dict[date, np.ndarray], end: date, days: int) -> np.ndarray:
+    """end 포함 최근 days일 활동 집합"""
+    return bitmap_or([
+        active_by_day[d] for d in (end - timedelta(days=k) for k in range(days)) if d in active_by_day
+    ])
+
+
+async def cohort_churn_counts(
+    db: AsyncSession,
+    churn_days: int,
+    signup_days: int,
+    today: Optional[date] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    오늘 코호트 기준 이탈/가입 집계
+
+    Returns:
+        {"total_users", "total_churned", "new_signups", "data_as_of"}
+        오늘 행이 아직 없거나 churn_days가 저장 범위를 넘으면 None (호출자가 실시간 계산으로 대체)
+    """
+    today = today or date.today()
+    first_day = await _first_day(db)
+    if first_day is None or today - timedelta(days=max(churn_days, signup_days) - 1) < first_day:
+        return None
+    columns = [UserActivityDaily.users_bitmap, UserActivityDaily.updated_at]
+    if churn_days in ROLLING_WINDOWS:
+        columns.append(getattr(UserActivityDaily, ROLLING_WINDOWS[churn_days]))
+    row = (await _load_rows(db, today, today, *columns)).get(today)
+    if row is None:
+        return None
+
+    users = decode_bitmap(row[0])
+    if churn_days in ROLLING_WINDOWS:
+        active = decode_bitmap(row[2])
+    else:
+        daily = await _load_rows(db, today - timedelta(days=churn_days - 1), today, UserActivityDaily.active_bitmap)
+        active = bitmap_or([decode_bitmap(blob) for blob, in daily.values()])
+
+    new_signups = await db.scalar(
+        select(func.coalesce(func.sum(UserActivityDaily.signups), 0))
+        .where(UserActivityDaily.day > today - timedelta(days=signup_days), UserActivityDaily.day <= today)
+    )
+    total_users = bitmap_count(users)
+    return {
+        "total_users": total_users,
+        "total_churned": total_users - bitmap_count(bitmap_and(users, active)),
+        "new_signups": int(new_signups or 0),
+        "data_as_of": row[1],
+    }
+
+
+async def churn_trend(
+    db: AsyncSession,
+    days: int,
+    churn_days: int,
+    today: Optional[date] = None
+) -> List[Dict[str, Any]]:
+    """
+    최근 days일 날짜별 이탈률 (그날 기준 최근 churn_days일 거래가 없는 사용자 비율)
+
+    churn_days 기간이 저장된 첫 날 이전에 걸치는 날은 active_users/churned_users/churn_rate가 None
+
+    Returns:
+        [{"day", "total_users", "active_users", "churned_users", "churn_rate"}, ...] (오래된 순)
+    """
+    today = today or date.today()
+    start = today - timedelta(days=days - 1)
+    first_day = await _first_day(db)
+    if churn_days in ROLLING_WINDOWS:
+        rows = await _load_rows(
+            db, start, today, UserActivityDaily.users_bitmap, getattr(UserActivityDaily, ROLLING_WINDOWS[churn_days])
+        )
+        sets = {d: (decode_bitmap(users), decode_bitmap(active)) for d, (users, active) in rows.items()}
+    else:
+        rows = await _load_rows(
+            db, start - timedelta(days=churn_days - 1), today,
+            UserActivityDaily.users_bitmap, UserActivityDaily.active_bitmap
+        )
+        active_by_day = {d: decode_bitmap(active) for d, (_, active) in rows.items()}
+        sets = {
+            d: (decode_bitmap(users), _window_bitmap(active_by_day, d, churn_days))
+            for d, (users, _) in rows.items() if d >= start
+        }
+
+    trend = []
+    for d in sorted(sets):
+        users, active = sets[d]
+        total_users = bitmap_count(users)
+        if d - timedelta(days=churn_days - 1) < first_day:
+            # 기간 일부가 저장 범위 밖 → 활동이 빠져 이탈이 과대 계산되므로 값 없음
+            trend.append({
+                "day": d, "total_users": total_users,
+                "active_users": None, "churned_users": None, "churn_rate": None,
+            })
+            continue
+        active_users = bitmap_count(bitmap_and(users, active))
+        churned = total_users - active_users
+        trend.append({
+            "day": d,
+            "total_users": total_users,
+            "active_users": active_users,
+            "churned_users": churned,
+            "churn_rate": round(churned / total_users * 100, 2) if total_users else 0.0,
+        })
+    return trend
+
+
+async def retention_curve(
+    db: AsyncSession,
+    days: int,
+    offsets: Sequence[int],
+    today: Optional[date] = None
+) -> Dict[str, Any]:
+    """
+    가입일 코호트별 N일차 리텐션 (가입 후 N일째 되는 날 거래가 있는 비율, %)
+
+    아직 오지 않은 N일차는 None
+
+    Returns:
+        {"cohorts": [{"cohort_date", "cohort_size", "retention": {N: rate}}, ...],
+         "average": {N: 코호트 크기 가중 평균}}
+    """
+    today = today or date.today()
+    start = today - timedelta(days=days - 1)
+    rows = await _load_rows(db, start, today, UserActivityDaily.signup_bitmap, UserActivityDaily.active_bitmap)
+    signups = {d: decode_bitmap(signup) for d, (signup, _) in rows.items()}
+    active_by_day = {d: decode_bitmap(active) for d, (_, active) in rows.items()}
+
+    cohorts = []
+    retained_total = {n: 0 for n in offsets}
+    size_total = {n: 0 for n in offsets}
+    for d in sorted(signups):
+        cohort = signups[d]
+        size = bitmap_count(cohort)
+        if not size:
+            continue
+        retention = {}
+        for n in offsets:
+            target = d + timedelta(days=n)
+            if target > today:
+                retention[n] = None
+                continue
+            retained = bitmap_count(bitmap_and(cohort, active_by_day.get(target, _EMPTY)))
+            retention[n] = round(retained / size * 100, 2)
+            retained_total[n] += retained
+            size_total[n] += size
+        cohorts.append({"cohort_date": d, "cohort_size": size, "retention": retention})
+
+    return {
+        "cohorts": cohorts,
+        "average": {
+            n: (round(retained_total[n] / size_total[n] * 100, 2) if size_total[n] else None) for n in offsets
+        },
+    }
@@ -0,0 +1,118 @@
+"""
+이상거래 스캔 벤치마크 (burst_count 계산: 기존 O(n²) 루프 vs 정렬 + 이분 탐색)
+
+- 기존 방식: 거래마다 전체 목록에서 같은 사용자 거래를 다시 걸러내고(list comprehension)
+  그 안에서 다른 거래를 모두 순회하며 10분 이내 거래 수를 셈
+- 새 방식: compute_burst_counts (사용자별 정렬 시각 + bisect)
+- 두 방식의 burst_count가 같은지 확인하고, score_transactions 전체 스캔 시간도 측정
+  (이상거래 모델은 로드하지 않음 → 휴리스틱만)
+
+사용법:
+    python scripts/bench_anomaly_scan.py
+    python scripts/bench_anomaly_scan.py --sizes 1000 10000 100000 --legacy-max 10000
+"""
+
+import argparse
+import sys
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# 상위 디렉토리 추가 (backend 폴더)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.anomaly_scanner import compute_burst_counts, score_transactions
+
+CATEGORIES = [SimpleNamespace(name=n) for n in ['식비', '교통', '쇼핑', '기타']]
+
+
+def make_transactions(n: int, tx_per_user: int, seed: int = 0) -> list:
+    """사용자당 tx_per_user건, 60일에 걸쳐 일부는 몰아서 발생하는 합성 거래"""
+    rng = np.random.default_rng(seed)
+    now = datetime(2025, 6, 1)
+    user_ids = rng.integers(1, max(2, n // tx_per_user) + 1, size=n)
+    offsets = rng.integers(0, 60 * 24 * 60, size=n)  # 분
+    burst = rng.random(n) < 0.2
+    offsets[burst] = offsets[burst] // 30 * 30       # 20%는 30분 단위로 몰림
+    amounts = rng.integers(1_000, 300_000, size=n)
+    categories = rng.integers(0, len(CATEGORIES), size=n)
+
+    return [
+        SimpleNamespace(
+            id=i + 1,
+            user_id=int(user_ids[i]),
+            category_id=int(categories[i]) + 1,
+            category=CATEGORIES[categories[i]],
+            amount=float(amounts[i]),
+            currency='KRW',
+            merchant_name=f"m{i % 97}",
+            transaction_time=now - timedelta(minutes=int(offsets[i])),
+        )
+        for i in range(n)
+    ]
+
+
+def legacy_burst_counts(recent_txs: list) -> dict:
+    """기존 GET /anomalies 방식 (거래마다 사용자 이력 재구성 + 전체 순회)"""
+    counts = {}
+    for tx in recent_txs:
+        user_recent_history = [t for t in recent_txs if t.user_id == tx.user_id]
+        burst_count = 0
+        for other in user_recent_history:
+            if other.id == tx.id: continue
+            if abs((tx.transaction_time - other.transaction_time).total_seconds()) < 600:
+                burst_count += 1
+        counts[tx.id] = burst_count
+    return counts
+
+
+def category_history(txs: list) -> dict:
+    """_load_category_history와 같은 구조 {user_id: {category_id: [(amount, id), ...]}}"""
+    history = defaultdict(lambda: defaultdict(list))
+    for tx in sorted(txs, key=lambda t: t.transaction_time, reverse=True):
+        bucket = history[tx.user_id][tx.category_id]
+        if len(bucket) < 50:
+            bucket.append((tx.amount, tx.id))
+    return history
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이상거래 스캔 burst_count 벤치마크")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--tx-per-user', type=int, default=50, help="사용자당 평균 거래 수")
+    parser.add_argument('--legacy-max', type=int, default=10_000, help="기존 방식을 실행할 최대 거래 수 (O(n²))")
+    args = parser.parse_args()
+
+    print(f"{'n':>8} | {'legacy burst':>12} | {'bisect burst':>12} | {'full scan':>10}")
+    for n in args.sizes:
+        txs = make_transactions(n, args.tx_per_user)
+        recent_by_user = defaultdict(list)
+        for tx in txs:
+            recent_by_user[tx.user_id].append(tx)
+
+        counts, new_seconds = timed(compute_burst_counts, txs, recent_by_user)
+        _, scan_seconds = timed(score_transactions, txs, category_history(txs), recent_by_user)
+
+        legacy = "skipped"
+        if n <= args.legacy_max:
+            expected, legacy_seconds = timed(legacy_burst_counts, txs)
+            assert expected == counts, "burst_count mismatch"
+            legacy = f"{legacy_seconds:10.3f} s"
+
+        print(f"{n:>8,} | {legacy:>12} | {new_seconds:10.3f} s | {scan_seconds:8.3f} s")
+
+    print("\n✅ burst_count 일치 (기존 방식 실행 구간)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+이탈(churn) 계산 벤치마크 (사용자별 쿼리 vs 집합 쿼리)
+
+- 사용자별: 관리자 사용자 분석 API의 이전 방식 (사용자마다 is_user_churned 쿼리 1회)
+- 집합 쿼리: app/services/user_activity (최근 N일 거래 user_id 집합 + users, 쿼리 1회)
+- 1k / 10k / 100k 사용자에서 /stats/churn-rate, /churned 계산 시간과 쿼리 수를 비교하고 결과 일치 확인
+- 사용자의 절반은 최근 30일 안에 거래가 있고 나머지는 그 이전 거래만 있음
+
+사용법:
+    python scripts/bench_churn.py
+    python scripts/bench_churn.py --users 1000 10000 --tx-per-user 20
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# 상위 디렉토리 추가 (backend 폴더)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from app.db.database import Base
+import app.db.model  # noqa: F401 (모델 등록)
+from app.db.model.user import User
+from app.db.model.transaction import Category, Transaction
+from app.routers.user_analytics import is_user_churned
+from app.services.user_activity import list_users_with_activity, get_churn_counts
+
+CHURN_DAYS = 30
+
+
+async def seed(session: AsyncSession, users: int, tx_per_user: int, seed_value: int = 0) -> None:
+    """짝수 id 사용자는 최근 180일, 홀수 id 사용자는 31~180일 전 거래만"""
+    rng = np.random.default_rng(seed_value)
+    now = datetime.now()
+    await session.execute(insert(Category), [{"id": 1, "code": "C1", "name": "식비"}])
+    for start in range(1, users + 1, 10_000):
+        await session.execute(insert(User), [
+            {"id": u, "email": f"bench{u}@example.com", "password_hash": "x", "name": f"user{u}",
+             "created_at": now - timedelta(days=int(u % 365))}
+            for u in range(start, min(start + 10_000, users + 1))
+        ])
+
+    n = users * tx_per_user
+    user_ids = np.arange(n) // tx_per_user + 1
+    min_days = np.where(user_ids % 2 == 0, 0, CHURN_DAYS + 1)
+    offsets = (min_days * 24 * 60) + rng.integers(0, 150 * 24 * 60, size=n)
+    for start in range(0, n, 20_000):
+        await session.execute(insert(Transaction), [
+            {
+                "id": i + 1,
+                "user_id": int(user_ids[i]),
+                "category_id": 1,
+                "amount": 10_000,
+                "currency": "KRW",
+                "status": "completed",
+                "transaction_time": now - timedelta(minutes=int(offsets[i])),
+                "is_fraudulent": False,
+            }
+            for i in range(start, min(start + 20_000, n))
+        ])
+    await session.commit()
+
+
+async def per_user_churned(session: AsyncSession) -> set:
+    """이전 방식: 사용자마다 최근 거래 존재 여부 쿼리"""
+    users = (await session.execute(select(User.id).where(User.is_superuser == False))).scalars().all()
+    return {user_id for user_id in users if await is_user_churned(session, user_id, CHURN_DAYS)}
+
+
+async def set_based_churned(session: AsyncSession) -> set:
+    rows = await list_users_with_activity(session, activity_days=CHURN_DAYS, churned_only=True)
+    return {user.id for user, _ in rows}
+
+
+async def timed(fn, session: AsyncSession, counter: list) -> tuple:
+    counter[0] = 0
+    start = time.perf_counter()
+    result = await fn(session)
+    return result, (time.perf_counter() - start) * 1000, counter[0]
+
+
+async def run(users: int, tx_per_user: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    counter = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(*_):
+        counter[0] += 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        await seed(session, users, tx_per_user)
+
+        naive, naive_ms, naive_queries = await timed(per_user_churned, session, counter)
+        churned, set_ms, set_queries = await timed(set_based_churned, session, counter)
+        counts, counts_ms, counts_queries = await timed(
+            lambda s: get_churn_counts(s, CHURN_DAYS, 30), session, counter
+        )
+        assert naive == churned, f"{users} users: churned sets differ"
+        assert counts["total_churned"] == len(naive)
+
+        print(f"{users:>8,} | {naive_ms:10.1f}ms ({naive_queries:>7,}q) | "
+              f"{set_ms:9.1f}ms ({set_queries}q) | {counts_ms:9.1f}ms ({counts_queries}q) | "
+              f"{naive_ms / set_ms:6.1f}x")
+    await engine.dispose()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="이탈 계산 벤치마크")
+    parser.add_argument('--users', type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument('--tx-per-user', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'users':>8} | {'per-user queries':>24} | {'set (churned list)':>18} | "
+          f"{'set (churn-rate)':>16} | speedup")
+    for users in args.users:
+        await run(users, args.tx_per_user)
+    print("\n✅ 이탈 사용자 집합 일치")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,159 @@
+"""
+사용자 대시보드 조회 벤치마크 (집계 테이블 순차 조회 vs 단일 쿼리)
+
+- 순차 방식: 이번 달 합계 → 최다 카테고리 → 전월 합계 → 카테고리 분석 → 월별 추이 (5회 왕복)
+- 단일 쿼리: get_user_full_analysis (조건부 집계 + 카테고리 순위 CTE + 추이 UNION ALL, 1회 왕복)
+- 두 방식의 결과가 같은지 확인하고 p50/p99 지연 시간과 쿼리 수를 비교
+- --rtt-ms로 쿼리마다 네트워크 왕복 지연을 흉내 냄 (로컬 SQLite는 왕복 비용이 거의 없음)
+
+사용법:
+    python scripts/bench_dashboard.py
+    python scripts/bench_dashboard.py --users 500 --tx-per-user 400 --rtt-ms 1
+    python scripts/bench_dashboard.py --database-url postgresql+asyncpg://user:pw@host/db  (기존 데이터 사용)
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+# 상위 디렉토리 추가 (backend 폴더)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from app.db.database import Base
+import app.db.model  # noqa: F401 (모델 등록)
+from app.db.model.user import User
+from app.db.model.transaction import Category, Transaction
+from app.services.analysis import get_user_full_analysis
+from app.services.spend_rollup import rebuild_rollups, spend_totals, spend_by_category, monthly_trend
+
+CATEGORIES = ['식비', '교통', '쇼핑', '기타']
+
+
+async def seed(session: AsyncSession, users: int, tx_per_user: int, seed_value: int = 0) -> None:
+    """사용자당 tx_per_user건, 최근 180일에 걸친 합성 거래 + 집계 재계산"""
+    rng = np.random.default_rng(seed_value)
+    now = datetime.now()
+    await session.execute(insert(Category), [
+        {"id": i + 1, "code": f"C{i + 1}", "name": name} for i, name in enumerate(CATEGORIES)
+    ])
+    await session.execute(insert(User), [
+        {"id": u, "email": f"bench{u}@example.com", "password_hash": "x", "name": f"user{u}"}
+        for u in range(1, users + 1)
+    ])
+
+    n = users * tx_per_user
+    offsets = rng.integers(0, 180 * 24 * 60, size=n)
+    amounts = rng.integers(1_000, 300_000, size=n)
+    categories = rng.integers(1, len(CATEGORIES) + 1, size=n)
+    rows = [
+        {
+            "id": i + 1,
+            "user_id": i // tx_per_user + 1,
+            "category_id": int(categories[i]),
+            "amount": int(amounts[i]),
+            "currency": "KRW",
+            "merchant_name": f"m{i % 97}",
+            "status": "completed",
+            "transaction_time": now - timedelta(minutes=int(offsets[i])),
+            "is_fraudulent": False,
+        }
+        for i in range(n)
+    ]
+    for start in range(0, n, 10_000):
+        await session.execute(insert(Transaction), rows[start:start + 10_000])
+    await rebuild_rollups(session)
+    await session.commit()
+
+
+async def sequential_full_analysis(session: AsyncSession, user_id: int) -> tuple:
+    """집계 테이블을 쿼리 5번으로 순차 조회 (단일 쿼리 이전 방식)"""
+    now = datetime.now()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0).date()
+    prev_start = (month_start - timedelta(days=1)).replace(day=1)
+
+    total, count = await spend_totals(session, start=month_start, user_id=user_id)
+    top = await spend_by_category(session, start=month_start, user_id=user_id, limit=1)
+    prev_total, prev_count = await spend_totals(session, start=prev_start, end=month_start, user_id=user_id)
+    categories = await spend_by_category(session, start=(now - timedelta(days=30)).date(), user_id=user_id)
+    trends = await monthly_trend(session, 6, user_id=user_id)
+    return (
+        total, count, (top[0][0] if top else None) or "없음",
+        sorted((name or "기타", amount, cnt) for name, amount, cnt in categories),
+        list(reversed(trends)),
+    )
+
+
+def as_tuple(analysis) -> tuple:
+    summary = analysis.summary
+    return (
+        summary.total_spending, summary.transaction_count, summary.top_category,
+        sorted((c.category, c.total_amount, c.transaction_count) for c in analysis.category_breakdown),
+        [(t.month, t.total_amount, t.transaction_count) for t in analysis.monthly_trend],
+    )
+
+
+async def measure(session: AsyncSession, fn, user_ids, counter: list) -> tuple:
+    latencies = []
+    counter[0] = 0
+    for user_id in user_ids:
+        start = time.perf_counter()
+        await fn(session, int(user_id))
+        latencies.append((time.perf_counter() - start) * 1000)
+    queries = counter[0] / len(user_ids)
+    return np.percentile(latencies, 50), np.percentile(latencies, 99), queries
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="사용자 대시보드 조회 벤치마크")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tx-per-user', type=int, default=300)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--rtt-ms', type=float, default=0.0, help="쿼리마다 더할 왕복 지연 (ms)")
+    parser.add_argument('--database-url', default=None, help="기존 DB 사용 (없으면 메모리 SQLite에 합성 데이터)")
+    args = parser.parse_args()
+
+    engine = create_async_engine(args.database_url or "sqlite+aiosqlite:///:memory:")
+    counter = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count(*_):
+        counter[0] += 1
+        if args.rtt_ms:
+            time.sleep(args.rtt_ms / 1000)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        if args.database_url is None:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            print(f"seeding {args.users:,} users × {args.tx_per_user:,} transactions ...")
+            await seed(session, args.users, args.tx_per_user)
+            user_ids = np.arange(1, args.users + 1)
+        else:
+            user_ids = np.array((await session.execute(select(User.id).limit(args.users))).scalars().all())
+
+        # 결과 일치 확인
+        for user_id in user_ids[:20]:
+            expected = await sequential_full_analysis(session, int(user_id))
+            actual = as_tuple(await get_user_full_analysis(session, int(user_id)))
+            if expected[1]:
+                assert expected == actual, f"user {user_id}: {expected} != {actual}"
+
+        sample = np.random.default_rng(1).choice(user_ids, size=args.iterations)
+        print(f"\n{'method':>12} | {'p50':>9} | {'p99':>9} | {'queries':>7}   (rtt {args.rtt_ms} ms)")
+        for name, fn in (("sequential", sequential_full_analysis), ("single", get_user_full_analysis)):
+            p50, p99, queries = await measure(session, fn, sample, counter)
+            print(f"{name:>12} | {p50:7.2f}ms | {p99:7.2f}ms | {queries:7.1f}")
+
+    await engine.dispose()
+    print("\n✅ 결과 일치 (요약 / 카테고리 / 월별 추이)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,160 @@
+"""
+XGBoost 추론 경로 벤치마크 (sklearn 래퍼 vs inplace_predict 빠른 경로)
+
+- 카테고리 모델: 단건(1행) p50/p99 지연 시간, 배치 처리량(rows/s)
+- 이상거래 모델: 전처리 포함 단건 p50/p99 (DataFrame 경로 vs float32 벡터 경로)
+- 두 경로의 예측 결과가 동일한지 확인
+
+모델 파일이 없으면 같은 피처 구성의 합성 모델을 학습해 사용합니다.
+
+사용법:
+    python scripts/bench_inference.py
+    python scripts/bench_inference.py --iterations 5000 --batch-rows 100000
+    python scripts/bench_inference.py --category-model app/model_xgboost_acc_73.47.joblib
+"""
+
+import argparse
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# 상위 디렉토리 추가 (backend 폴더)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+import numpy as np
+import pandas as pd
+from xgboost import XGBClassifier
+
+from app.services.preprocessing import DataPreprocessor
+from app.services.fraud_preprocessing import FraudPreprocessor
+from app.services.fast_inference import FastTreePredictor
+from app.services.model_registry import DEFAULT_MODEL_PATHS, CATEGORY_MODEL, FRAUD_MODEL
+
+
+def synthetic_model(feature_names, n_classes: int, seed: int = 0) -> XGBClassifier:
+    """실제 모델과 같은 피처 구성의 합성 모델 (모델 파일이 없을 때)"""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(0, 3, size=(5000, len(feature_names))), columns=feature_names)
+    y = rng.integers(0, n_classes, size=len(X))
+    model = XGBClassifier(n_estimators=200, max_depth=6, n_jobs=1)
+    model.fit(X, y)
+    return model
+
+
+def load_or_synthesize(path: str, feature_names, n_classes: int):
+    if path and os.path.exists(path):
+        print(f"  model: {path}")
+        return joblib.load(path)
+    print(f"  model: synthetic ({len(feature_names)} features, {n_classes} classes)")
+    return synthetic_model(feature_names, n_classes)
+
+
+def latency(func, arg, iterations: int):
+    """단건 호출 지연 시간 p50/p99 (ms)"""
+    for _ in range(min(50, iterations)):
+        func(arg)
+    samples = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(arg)
+        samples[i] = time.perf_counter() - start
+    p50, p99 = np.percentile(samples, [50, 99]) * 1000
+    return p50, p99
+
+
+def throughput(func, arg, repeat: int = 3) -> float:
+    """배치 처리량 (rows/s, 최적값)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return len(arg) / best
+
+
+def category_sample(preprocessor: DataPreprocessor, n_rows: int) -> pd.DataFrame:
+    """전처리된 카테고리 모델 입력 (업로드 CSV 형식 샘플 기반)"""
+    rng = np.random.default_rng(1)
+    stamps = pd.Timestamp('2025-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 525_600, n_rows)), unit='m')
+    raw = pd.DataFrame({
+        '날짜': stamps.strftime('%Y-%m-%d'),
+        '시간': stamps.strftime('%H:%M'),
+        '금액': rng.integers(-300_000, 0, size=n_rows),
+        '대분류': rng.choice(['교통', '생활', '쇼핑', '식료품', '외식', '주유', '기타'], size=n_rows),
+    })
+    return preprocessor.preprocess(raw)
+
+
+def print_row(label: str, p50: float, p99: float):
+    print(f"  {label:<34} p50 {p50:8.3f} ms | p99 {p99:8.3f} ms")
+
+
+def bench_category(args):
+    print("\n[카테고리 모델]")
+    preprocessor = DataPreprocessor()
+    model = load_or_synthesize(args.category_model, preprocessor.feature_names, 6)
+    fast = FastTreePredictor(model)
+
+    batch = category_sample(preprocessor, args.batch_rows)
+    single = batch.iloc[:1]
+    single_array = fast.to_array(single)
+
+    np.testing.assert_allclose(model.predict_proba(batch), fast.predict_proba(batch), atol=1e-6)
+    assert (model.predict(batch) == fast.predict(batch)).all()
+
+    print_row("sklearn predict (DataFrame)", *latency(model.predict, single, args.iterations))
+    print_row("fast predict (DataFrame)", *latency(fast.predict, single, args.iterations))
+    print_row("fast predict (float32 array)", *latency(fast.predict, single_array, args.iterations))
+
+    slow_tp = throughput(model.predict, batch)
+    fast_tp = throughput(fast.predict, batch)
+    print(f"  batch {len(batch):,} rows: sklearn {slow_tp:,.0f} rows/s | fast {fast_tp:,.0f} rows/s")
+
+
+def bench_fraud(args):
+    print("\n[이상거래 모델 (전처리 포함)]")
+    preprocessor = FraudPreprocessor()
+    rng = np.random.default_rng(2)
+    now = datetime(2025, 6, 1, 12)
+    history = [
+        SimpleNamespace(amount=float(a), transaction_time=now - timedelta(hours=i))
+        for i, a in enumerate(rng.integers(1000, 200_000, size=30))
+    ]
+    tx = SimpleNamespace(amount=125_000.0, transaction_time=now)
+    feature_order = list(preprocessor.preprocess_transaction(tx, history).columns)
+
+    model = load_or_synthesize(args.fraud_model, feature_order, 2)
+    fast = FastTreePredictor(model)
+
+    expected = model.predict_proba(preprocessor.preprocess_transaction(tx, history))
+    actual = fast.predict_proba(preprocessor.transaction_vector(tx, history, fast.feature_names))
+    np.testing.assert_allclose(expected, actual, atol=1e-6)
+
+    def legacy(_):
+        return model.predict_proba(preprocessor.preprocess_transaction(tx, history))
+
+    def vector(_):
+        return fast.predict_proba(preprocessor.transaction_vector(tx, history, fast.feature_names))
+
+    print_row("DataFrame + sklearn predict_proba", *latency(legacy, None, args.iterations))
+    print_row("float32 vector + inplace_predict", *latency(vector, None, args.iterations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XGBoost 추론 경로 벤치마크")
+    parser.add_argument('--iterations', type=int, default=2000, help="단건 지연 시간 측정 횟수")
+    parser.add_argument('--batch-rows', type=int, default=10_000, help="배치 처리량 측정 행 수")
+    parser.add_argument('--category-model', default=DEFAULT_MODEL_PATHS[CATEGORY_MODEL])
+    parser.add_argument('--fraud-model', default=DEFAULT_MODEL_PATHS[FRAUD_MODEL])
+    args = parser.parse_args()
+
+    bench_category(args)
+    bench_fraud(args)
+    print("\n✅ 두 경로의 예측 결과 일치")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+DataPreprocessor._feature_engineering 벡터화 검증/벤치마크 스크립트
+
+- 기존 행 단위(apply) 구현과 현재 벡터화 구현의 결과가 완전히 동일한지 비교
+- 1k / 100k / 1M 행 기준 실행 시간 측정
+
+사용법:
+    python scripts/bench_preprocessing.py
+    python scripts/bench_preprocessing.py --sizes 1000 100000
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# 상위 디렉토리 추가 (backend 폴더)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from app.services.preprocessing import DataPreprocessor
+
+
+CATEGORIES = ['교통', '생활', '쇼핑', '식료품', '외식', '주유', '카페', '편의점', '기타']
+
+
+def make_sample(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """업로드 CSV와 같은 형식의 샘플 DataFrame 생성"""
+    rng = np.random.default_rng(seed)
+    base = np.datetime64('2025-01-01T00:00')
+    minutes = np.sort(rng.integers(0, 60 * 24 * 365, size=n_rows))
+    stamps = pd.to_datetime(base + minutes.astype('timedelta64[m]'))
+
+    return pd.DataFrame({
+        '날짜': stamps.strftime('%Y-%m-%d'),
+        '시간': stamps.strftime('%H:%M'),
+        '금액': rng.integers(-300_000, 0, size=n_rows),
+        '대분류': rng.choice(CATEGORIES, size=n_rows),
+    })
+
+
+def legacy_boolean_features(df: pd.DataFrame) -> pd.DataFrame:
+    """벡터화 이전의 Boolean Time Feature 계산 (비교 기준)"""
+    df = df.copy()
+    df['IsWeekend'] = df['DayOfWeek'].apply(lambda x: 1 if x >= 5 else 0)
+    df['IsLunchTime'] = df['Hour'].apply(lambda x: 1 if 11 <= x <= 13 else 0)
+    df['IsEvening'] = df['Hour'].apply(lambda x: 1 if 18 <= x <= 20 else 0)
+    df['IsMorningRush'] = df['Hour'].apply(lambda x: 1 if 7 <= x <= 9 else 0)
+    df['IsNight'] = df['Hour'].apply(lambda x: 1 if x >= 22 or x <= 4 else 0)
+    df['IsBusinessHour'] = df.apply(lambda row: 1 if (9 <= row['Hour'] <= 17) and (row['IsWeekend'] == 0) else 0, axis=1)
+    return df
+
+
+def check_equivalence(preprocessor: DataPreprocessor, df_clean: pd.DataFrame):
+    """현재 구현의 Boolean 컬럼이 기존 구현과 동일한지 확인"""
+    result = preprocessor._feature_engineering(df_clean)
+    expected = legacy_boolean_features(result[['Hour', 'DayOfWeek']])
+
+    for col in ['IsWeekend', 'IsLunchTime', 'IsEvening', 'IsMorningRush', 'IsNight', 'IsBusinessHour']:
+        pd.testing.assert_series_equal(result[col], expected[col], check_names=True)
+
+
+def timed(func, *args, repeat: int = 3) -> float:
+    """최소 실행 시간(초) 반환"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feature Engineering 벤치마크")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-limit', type=int, default=100_000,
+                        help="이 행 수를 넘으면 기존(apply) 구현 측정 생략")
+    args = parser.parse_args()
+
+    preprocessor = DataPreprocessor()
+
+    print(f"{'rows':>10} | {'vectorized(s)':>14} | {'legacy bool(s)':>14}")
+    print("-" * 46)
+    for n_rows in args.sizes:
+        df_clean = preprocessor._clean_data(make_sample(n_rows))
+        check_equivalence(preprocessor, df_clean)
+
+        vectorized = timed(preprocessor._feature_engineering, df_clean)
+
+        if n_rows <= args.legacy_limit:
+            base = preprocessor._feature_engineering(df_clean)[['Hour', 'DayOfWeek']]
+            legacy = f"{timed(legacy_boolean_features, base, repeat=1):14.3f}"
+        else:
+            legacy = f"{'skipped':>14}"
+
+        print(f"{n_rows:>10,} | {vectorized:14.3f} | {legacy}")
+
+    print("✅ 모든 크기에서 기존 구현과 결과 일치")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+소비 집계(spend_daily / spend_monthly) 재계산
+
+거래 원본에서 일/월 집계를 다시 만듭니다.
+집계 도입 직후나 DB를 직접 수정한 뒤(수동 삭제/복구 등) 실행하세요.
+
+사용법:
+    python scripts/rebuild_spend_rollups.py
+    python scripts/rebuild_spend_rollups.py --user-ids 12 34
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# 상위 디렉토리 추가 (backend 폴더)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from app.core.settings import settings
+import app.db.model  # noqa: F401 (모델 등록)
+from app.services.spend_rollup import rebuild_rollups
+
+
+async def main(user_ids):
+    engine = create_async_engine(settings.database_url, echo=False)
+    async with AsyncSession(engine) as session:
+        counts = await rebuild_rollups(session, user_ids)
+        await session.commit()
+    await engine.dispose()
+    target = f"{len(user_ids)}명" if user_ids else "전체 사용자"
+    print(f"소비 집계 재계산 완료 ({target}): 일별 {counts['daily_rows']}행, 월별 {counts['monthly_rows']}행")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="소비 집계 재계산")
+    parser.add_argument("--user-ids", type=int, nargs="*", default=None, help="대상 사용자 (기본: 전체)")
+    args = parser.parse_args()
+    asyncio.run(main(args.user_ids or None))
@@ -0,0 +1,40 @@
+"""
+일별 사용자 코호트(user_activity_daily) 재계산
+
+최근 N일 코호트(가입/활동 비트맵, 최근 7/30/90일 활동 집합)를 처음부터 다시 만듭니다.
+사용자 삭제나 과거 거래 일괄 입력처럼 이미 저장된 날짜를 바꾸는 작업 후에 실행하세요.
+(평소에는 스케줄러가 마지막 저장일부터 오늘까지 갱신)
+
+사용법:
+    python scripts/rebuild_user_cohorts.py
+    python scripts/rebuild_user_cohorts.py --days 120
+"""
+
+import argparse
+import asyncio
+import sys
+import os
+
+# 상위 디렉토리 추가 (backend 폴더)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from app.core.settings import settings
+import app.db.model  # noqa: F401 (모델 등록)
+from app.services.user_cohorts import rebuild_user_cohorts, USER_COHORT_BACKFILL_DAYS
+
+
+async def main(days):
+    engine = create_async_engine(settings.database_url, echo=False)
+    async with AsyncSession(engine) as session:
+        built = await rebuild_user_cohorts(session, days)
+        await session.commit()
+    await engine.dispose()
+    print(f"사용자 코호트 재계산 완료: {built}일")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="일별 사용자 코호트 재계산")
+    parser.add_argument("--days", type=int, default=USER_COHORT_BACKFILL_DAYS, help="재계산할 최근 일수")
+    args = parser.parse_args()
+    asyncio.run(main(args.days))
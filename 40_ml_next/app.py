@@ -1,8 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 import os
 from dotenv import load_dotenv
 import logging
 import joblib
+import hashlib
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from io import BytesIO
+import numpy as np
 
 load_dotenv()
 
@@ -19,29 +26,35 @@ S3_BUCKET = os.getenv("S3_BUCKET")
 MODEL_KEY = os.getenv("MODEL_KEY")
 LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "/app/model.joblib")
 
-model = None
+# ============================================================
+# 모델 버전 관리 (여러 버전 보관 + 원자적 교체)
+# ============================================================
+MAX_VERSIONS = 3         # 보관할 최대 버전 수 (활성 버전 제외 오래된 것부터 해제)
+LATENCY_WINDOW = 1000    # 지연 시간 백분위 계산에 쓰는 최근 호출 수
 
+_lock = threading.Lock()
+model_versions = {}      # version -> 모델 정보 딕셔너리
+active_version = None
 
-def load_model_from_local():
-    """로컬 파일에서 모델 로드"""
+
+def _read_local_model():
+    """로컬 모델 파일 바이트 읽기"""
     try:
         if os.path.exists(LOCAL_MODEL_PATH):
-            loaded_model = joblib.load(LOCAL_MODEL_PATH)
-            logger.info(f"✅ 로컬 모델 로드 성공: {LOCAL_MODEL_PATH}")
-            return loaded_model
+            with open(LOCAL_MODEL_PATH, "rb") as f:
+                return f.read()
         else:
             logger.warning(f"⚠️ 로컬 모델 파일 없음: {LOCAL_MODEL_PATH}")
             return None
     except Exception as e:
-        logger.warning(f"⚠️ 로컬 모델 로드 실패: {e}")
+        logger.warning(f"⚠️ 로컬 모델 읽기 실패: {e}")
         return None
 
 
-def load_model_from_s3():
-    """S3에서 모델 로드"""
+def _read_s3_model():
+    """S3 모델 파일 바이트 다운로드"""
     try:
         import boto3
-        from io import BytesIO
         
         if not all([AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, S3_BUCKET, MODEL_KEY]):
             raise ValueError("S3 환경 변수가 설정되지 않음")
@@ -53,27 +66,94 @@ def load_model_from_s3():
         )
         buffer = BytesIO()
         s3.download_fileobj(S3_BUCKET, MODEL_KEY, buffer)
-        buffer.seek(0)
-        loaded_model = joblib.load(buffer)
-        logger.info("✅ S3 모델 로드 성공")
-        return loaded_model
+        return buffer.getvalue()
     except Exception as e:
-        logger.warning(f"⚠️ S3 모델 로드 실패: {e}")
+        logger.warning(f"⚠️ S3 모델 다운로드 실패: {e}")
         return None
 
 
+def _register_version(raw: bytes, source: str):
+    """모델 바이트를 로드해 새 버전으로 등록하고 활성화 (같은 내용이면 기존 버전 재사용)"""
+    global active_version
+
+    version = hashlib.sha256(raw).hexdigest()[:12]
+    with _lock:
+        if version in model_versions:
+            active_version = version
+            return model_versions[version]
+
+    # joblib 로드는 잠금 밖에서 수행 (기존 버전은 계속 서빙)
+    start = time.perf_counter()
+    loaded_model = joblib.load(BytesIO(raw))
+    load_seconds = time.perf_counter() - start
+
+    entry = {
+        "model": loaded_model,
+        "version": version,
+        "source": source,
+        "loaded_at": datetime.now(),
+        "load_seconds": load_seconds,
+        "memory_bytes": len(raw),
+        "latencies": deque(maxlen=LATENCY_WINDOW),
+        "calls": 0,
+    }
+
+    with _lock:
+        model_versions[version] = entry
+        active_version = version
+        # 보관 한도 초과 시 오래된 비활성 버전 해제
+        while len(model_versions) > MAX_VERSIONS:
+            oldest = min(
+                (v for v in model_versions.values() if v["version"] != active_version),
+                key=lambda v: v["loaded_at"]
+            )
+            del model_versions[oldest["version"]]
+
+    logger.info(f"✅ {source} 모델 로드 성공 (version={version}, {load_seconds:.2f}s)")
+    return entry
+
+
+def get_active():
+    """활성 모델 정보 반환 (없으면 None)"""
+    with _lock:
+        return model_versions.get(active_version) if active_version else None
+
+
 def load_model():
-    """모델 로드 (S3 우선, 실패 시 로컬)"""
-    global model
-    
+    """모델 로드 (S3 우선, 실패 시 로컬) 후 새 버전으로 교체"""
     # 1. S3에서 시도
-    model = load_model_from_s3()
+    raw, source = _read_s3_model(), "S3"
     
     # 2. S3 실패 시 로컬에서 시도
-    if model is None:
-        model = load_model_from_local()
+    if raw is None:
+        raw, source = _read_local_model(), "Local"
+    
+    if raw is None:
+        return get_active()
     
-    return model
+    try:
+        return _register_version(raw, source)
+    except Exception as e:
+        logger.warning(f"⚠️ {source} 모델 로드 실패: {e}")
+        return get_active()
+
+
+def _version_stats(entry):
+    """버전별 로드 시간/메모리/지연 시간 통계"""
+    with _lock:
+        latencies = np.fromiter(entry["latencies"], dtype=float)
+        calls = entry["calls"]
+    p50, p99 = (np.percentile(latencies, [50, 99]) * 1000).tolist() if latencies.size else (None, None)
+    return {
+        "version": entry["version"],
+        "source": entry["source"],
+        "loaded_at": entry["loaded_at"].isoformat(),
+        "load_seconds": round(entry["load_seconds"], 4),
+        "memory_bytes": entry["memory_bytes"],
+        "calls": calls,
+        "p50_ms": p50,
+        "p99_ms": p99,
+    }
 
 
 # 시작 시 모델 로드
@@ -82,23 +162,56 @@ load_model()
 
 @app.get("/")
 def health():
+    entry = get_active()
     return {
         "status": "ok", 
-        "model_loaded": model is not None,
-        "model_source": "S3" if (AWS_ACCESS_KEY_ID and model) else ("Local" if model else "None")
+        "model_loaded": entry is not None,
+        "model_source": entry["source"] if entry else "None",
+        "active_version": entry["version"] if entry else None
     }
 
 
 @app.get("/predict")
 def predict(value: float):
-    if model is None:
+    # 요청 시점의 활성 버전을 끝까지 사용 (도중 교체되어도 안전)
+    entry = get_active()
+    if entry is None:
         return {"error": "모델이 로드되지 않음", "prediction": None}
-    result = model.predict([[value]])
-    return {"prediction": result[0]}
+    start = time.perf_counter()
+    result = entry["model"].predict([[value]])
+    elapsed = time.perf_counter() - start
+    with _lock:
+        entry["latencies"].append(elapsed)
+        entry["calls"] += 1
+    return {"prediction": result[0], "version": entry["version"]}
 
 
 @app.post("/reload")
 def reload_model():
-    """모델 수동 재로드"""
-    load_model()
-    return {"status": "reloaded", "model_loaded": model is not None}
+    """모델 수동 재로드 (새 버전 로드 후 원자적으로 교체, 실패 시 기존 버전 유지)"""
+    entry = load_model()
+    return {
+        "status": "reloaded",
+        "model_loaded": entry is not None,
+        "active_version": entry["version"] if entry else None
+    }
+
+
+@app.get("/models")
+def list_models():
+    """보관 중인 모델 버전 목록과 버전별 통계"""
+    with _lock:
+        entries = list(model_versions.values())
+        current = active_version
+    return {"active_version": current, "versions": [_version_stats(e) for e in entries]}
+
+
+@app.post("/models/{version}/activate")
+def activate_model(version: str):
+    """보관 중인 버전으로 활성 모델 교체 (롤백용)"""
+    global active_version
+    with _lock:
+        if version not in model_versions:
+            raise HTTPException(status_code=404, detail=f"버전 없음: {version}")
+        active_version = version
+    return {"status": "activated", "active_version": version}